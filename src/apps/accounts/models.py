@@ -1,5 +1,3 @@
-import contextlib
-
 from django.contrib.auth.models import Group
 from django.core.validators import URLValidator
 from django.db.models import (
@@ -15,11 +13,16 @@ from django.utils.translation import ugettext_lazy as _
 
 
 class GroupInformationQuerySet(QuerySet):
+    def _child_exists_sql(self):
+        table = GroupInformation._meta.db_table
+        return f'EXISTS (SELECT 1 FROM "{table}" AS "child" WHERE "child"."parent_id" = "{table}"."id")'
+
+    def with_has_child(self):
+        """ annotate GroupInformation.has_child with one EXISTS subquery """
+        return self.extra(select={'child_exists': self._child_exists_sql()})
+
     def end_groups(self):
-        ids = []
-        with contextlib.suppress(Exception):
-            ids.extend(group.id for group in self.all() if not group.has_child)
-            return self.filter(id__in=ids)
+        return self.extra(where=[f'NOT {self._child_exists_sql()}'])
 
 
 class GroupInformation(Model):
@@ -57,4 +60,7 @@ class GroupInformation(Model):
 
     @property
     def has_child(self):
-        return GroupInformation.objects.filter(parent=self).count() > 0
+        if 'child_exists' in self.__dict__:
+            return self.child_exists
+
+        return GroupInformation.objects.filter(parent=self).exists()
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class ConfigsConfig(AppConfig):
     name = 'apps.configs'
+
+    def ready(self):
+        import apps.configs.signals  # noqa: F401
@@ -0,0 +1,95 @@
+"""
+Redis cache for the serialized navigation menu (see apps.configs.menu).
+
+Every key embeds a version counter, saving or deleting anything the menu
+is built from bumps the counter (see signals), so stale trees are never
+read again and simply expire. If Redis is unreachable the menu is built
+from the database as usual.
+"""
+import json
+import logging
+
+import redis
+from django.conf import settings
+
+from apps.configs.menu import load_menu
+
+logger = logging.getLogger(__name__)
+
+
+class MenuCache:
+    VERSION_KEY = 'menu:version'
+    HITS_KEY = 'menu:hits'
+    MISSES_KEY = 'menu:misses'
+
+    def __init__(self, url=None, timeout=None):
+        self.url = url
+        self.timeout = timeout
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = redis.StrictRedis.from_url(
+                self.url or settings.MENU_CACHE_URL,
+                socket_timeout=1,
+                socket_connect_timeout=1,
+            )
+        return self._client
+
+    def version(self):
+        return int(self.client.get(self.VERSION_KEY) or 0)
+
+    def bump(self):
+        try:
+            return self.client.incr(self.VERSION_KEY)
+        except redis.RedisError as e:
+            logger.error(f'Can not invalidate menu cache: {e}')
+
+    def key(self, version, name):
+        return f'menu:{version}:{name}'
+
+    def get_or_build(self, name, build):
+        try:
+            key = self.key(self.version(), name)
+            data = self.client.get(key)
+
+            if data is not None:
+                self.client.incr(self.HITS_KEY)
+                return json.loads(data.decode('utf-8'))
+        except redis.RedisError as e:
+            logger.warning(f'Menu cache unavailable: {e}')
+            return build()
+
+        value = build()
+
+        try:
+            pipe = self.client.pipeline()
+            pipe.incr(self.MISSES_KEY)
+            pipe.set(key, json.dumps(value), ex=self.timeout or settings.MENU_CACHE_TIMEOUT)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f'Menu cache unavailable: {e}')
+
+        return value
+
+    def get_menu(self, watchlist=None):
+        """ serialized menu of all configs, or of the configs related to watchlist """
+        name = f'watchlist:{watchlist.id}' if watchlist else 'all'
+
+        return self.get_or_build(name, lambda: [node.to_dict() for node in load_menu(watchlist=watchlist)])
+
+    def get_config_menu(self, config):
+        return self.get_or_build(f'config:{config.id}', lambda: config.menu().to_dict())
+
+    def stats(self):
+        hits, misses, version = self.client.mget(self.HITS_KEY, self.MISSES_KEY, self.VERSION_KEY)
+
+        return {
+            'hits': int(hits or 0),
+            'misses': int(misses or 0),
+            'version': int(version or 0),
+        }
+
+
+menu_cache = MenuCache()
@@ -0,0 +1,85 @@
+"""
+Lunar to Gregorian conversion for FestivalName.lunar_month/lunar_day.
+
+Dates come from a precomputed table shipped in data/lunar.bin (built by
+manage.py build_lunar_table), one row of ROW_SIZE unsigned 32-bit little
+endian integers per lunar year from FIRST_YEAR to LAST_YEAR:
+
+    [leap month (0 if none), ordinal of the first day of each of the 13
+     month slots in calendar order, ordinal of the next new year]
+
+so a conversion is a couple of array lookups, e.g.
+
+    lunar_calendar.to_gregorian(2024, 5, 5)  # datetime.date(2024, 6, 10)
+"""
+import datetime
+import os
+import sys
+from array import array
+
+FIRST_YEAR = 1900
+LAST_YEAR = 2100
+ROW_SIZE = 15
+
+TABLE_PATH = os.path.join(os.path.dirname(__file__), 'data', 'lunar.bin')
+
+
+def load_table(path=TABLE_PATH):
+    table = array('I')
+    with open(path, 'rb') as f:
+        table.frombytes(f.read())
+
+    if sys.byteorder == 'big':
+        table.byteswap()
+
+    if len(table) != (LAST_YEAR - FIRST_YEAR + 1) * ROW_SIZE:
+        raise ValueError(f'Broken lunar table {path}')
+
+    return table
+
+
+class LunarCalendar:
+    def __init__(self, path=TABLE_PATH):
+        self.path = path
+        self._table = None
+
+    @property
+    def table(self):
+        if self._table is None:
+            self._table = load_table(self.path)
+        return self._table
+
+    def ordinal(self, lunar_year, month, day, leap=False):
+        """ Gregorian ordinal of month/day of lunar_year, day 30 of a 29 days month becomes day 29 """
+        if not FIRST_YEAR <= lunar_year <= LAST_YEAR or not 1 <= month <= 12 or not 1 <= day <= 30:
+            raise ValueError(f'Invalid lunar date {lunar_year}/{month}/{day}')
+
+        row = (lunar_year - FIRST_YEAR) * ROW_SIZE
+        leap_month = self.table[row]
+
+        if leap:
+            if month != leap_month:
+                raise ValueError(f'Lunar year {lunar_year} has no leap month {month}')
+            slot = month
+        else:
+            slot = month - 1 if not leap_month or month <= leap_month else month
+
+        start = self.table[row + 1 + slot]
+        end = self.table[row + 2 + slot]
+        return start + min(day, end - start) - 1
+
+    def to_gregorian(self, year, month, day, leap=False):
+        """
+        Date of lunar month/day falling in Gregorian year, e.g. 除夕 (12/30)
+        of 2024 is 2024-02-09, which is in lunar year 2023.
+        """
+        month, day = int(month), int(day)
+
+        ordinal = self.ordinal(year, month, day, leap)
+        if ordinal >= datetime.date(year + 1, 1, 1).toordinal():
+            ordinal = self.ordinal(year - 1, month, day, leap)
+
+        return datetime.date.fromordinal(ordinal)
+
+
+lunar_calendar = LunarCalendar()
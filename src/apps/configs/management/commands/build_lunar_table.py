@@ -0,0 +1,57 @@
+import datetime
+import sys
+from array import array
+
+import sxtwl
+from django.core.management.base import BaseCommand
+
+from apps.configs.lunar import FIRST_YEAR, LAST_YEAR, TABLE_PATH
+
+
+def ordinal(day):
+    return datetime.date(day.y, day.m, day.d).toordinal()
+
+
+def year_row(lunar, year):
+    """ [leap month, first day ordinal of each of the 13 month slots, next new year ordinal] of lunar year """
+    leap_month = 0
+    for month in range(1, 13):
+        try:
+            lunar.getDayByLunar(year, month, 1, True)
+            leap_month = month
+            break
+        except sxtwl.LunarException:
+            pass
+
+    starts = []
+    for month in range(1, 13):
+        starts.append(ordinal(lunar.getDayByLunar(year, month, 1, False)))
+        if month == leap_month:
+            starts.append(ordinal(lunar.getDayByLunar(year, month, 1, True)))
+
+    end = ordinal(lunar.getDayByLunar(year + 1, 1, 1, False))
+    starts += [end] * (13 - len(starts))
+
+    return [leap_month] + starts + [end]
+
+
+class Command(BaseCommand):
+    help = 'Build the lunar to Gregorian table of apps.configs.lunar with sxtwl'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=TABLE_PATH)
+
+    def handle(self, *args, **options):
+        lunar = sxtwl.Lunar()
+
+        table = array('I')
+        for year in range(FIRST_YEAR, LAST_YEAR + 1):
+            table.extend(year_row(lunar, year))
+
+        if sys.byteorder == 'big':
+            table.byteswap()
+
+        with open(options['output'], 'wb') as f:
+            table.tofile(f)
+
+        self.stdout.write(f'{LAST_YEAR - FIRST_YEAR + 1} lunar years written to {options["output"]}')
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from apps.configs.cache import menu_cache
+
+
+class Command(BaseCommand):
+    help = 'Show hit/miss counters and the current version of the menu cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--invalidate', action='store_true', help='Bump the version to drop every cached menu')
+
+    def handle(self, *args, **options):
+        if options['invalidate']:
+            menu_cache.bump()
+
+        stats = menu_cache.stats()
+        total = stats['hits'] + stats['misses']
+        ratio = stats['hits'] / total if total else 0
+
+        self.stdout.write(f"version: {stats['version']}")
+        self.stdout.write(f"hits: {stats['hits']}, misses: {stats['misses']}, hit ratio: {ratio:.2%}")
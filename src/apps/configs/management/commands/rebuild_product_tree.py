@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.configs.models import ProductClosure
+
+
+class Command(BaseCommand):
+    help = 'Rebuild ProductClosure and the tree_depth/tree_path of every AbstractProduct'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        trees = ProductClosure.objects.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(f'Rebuilt tree of {len(trees)} products')
@@ -0,0 +1,201 @@
+"""
+Front-end navigation tree: config -> product -> type -> source.
+
+load_menu() loads every node of the requested configs with a fixed number
+of bulk queries and returns in-memory nodes mirroring Config.products(),
+AbstractProduct.children(), types(), sources(), has_child and has_source,
+so rendering the menu never touches the database again.
+
+e.g.
+    for config in load_menu(watchlist=watchlist):
+        for product in config.roots():
+            product.children(), product.types(), product.sources()
+"""
+from collections import defaultdict
+
+from apps.configs.models import AbstractProduct, Config, Source, Type
+
+
+def serialize_type(type_instance):
+    return {'id': type_instance.id, 'name': type_instance.name}
+
+
+def serialize_source(source):
+    return {'id': source.id, 'name': source.name, 'code': source.code, 'type_id': source.type_id}
+
+
+class ConfigNode:
+    def __init__(self, config, menu):
+        self.config = config
+        self.menu = menu
+        self.id = config.id
+        self.name = config.name
+        self.code = config.code
+        self.type_level = config.type_level
+        self.to_direct = config.to_direct
+        self.nodes = []
+
+    def __str__(self):
+        return str(self.name)
+
+    def products(self):
+        """ same as Config.products(), filtered by the watchlist of the menu if any """
+        return [node for node in self.nodes if self.menu.is_watched(node.id)]
+
+    def roots(self):
+        return [node for node in self.products() if node.parent is None]
+
+    def types(self):
+        type_ids = {node.type_id for node in self.nodes}
+        return self.menu.types_of(type_ids)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'code': self.code,
+            'type_level': self.type_level,
+            'types': [serialize_type(t) for t in self.types()],
+            'products': [node.to_dict() for node in self.roots()],
+        }
+
+
+class ProductNode:
+    def __init__(self, product, config_node):
+        self.product = product
+        self.config = config_node
+        self.menu = config_node.menu
+        self.id = product.id
+        self.name = product.name
+        self.code = product.code
+        self.type_id = product.type_id
+        self.parent = None
+        self.nodes = []
+
+    def __str__(self):
+        return str(self.name)
+
+    @property
+    def type(self):
+        return self.menu.type_map.get(self.type_id)
+
+    @property
+    def level(self):
+        if self.product.tree_depth is not None:
+            return self.product.tree_depth
+
+        return self.parent.level + 1 if self.parent else 1
+
+    @property
+    def to_direct(self):
+        return self.level >= self.config.type_level
+
+    @property
+    def has_child(self):
+        return len(self.nodes) > 0
+
+    @property
+    def has_source(self):
+        return len(self.menu.config_sources(self.config.id, self.type_id)) > 0
+
+    def children(self):
+        return [node for node in self.nodes if self.menu.is_watched(node.id)]
+
+    def types(self):
+        if self.has_child:
+            return self.menu.types_of({node.type_id for node in self.children()})
+        elif self.type:
+            return [self.type]
+        else:
+            return []
+
+    def sources(self):
+        if self.menu.watchlist:
+            return self.menu.item_sources.get(self.id, [])
+        else:
+            return self.menu.config_sources(self.config.id, self.type_id)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'code': self.code,
+            'level': self.level,
+            'to_direct': self.to_direct,
+            'has_child': self.has_child,
+            'has_source': self.has_source,
+            'type': serialize_type(self.type) if self.type else None,
+            'types': [serialize_type(t) for t in self.types()],
+            'sources': [serialize_source(source) for source in self.sources()],
+            'children': [node.to_dict() for node in self.children()],
+        }
+
+
+class Menu:
+    """
+    Bulk loader behind load_menu(), queries:
+    configs(optional), products, types, config/source links,
+    and with a watchlist its items, item sources and related product ids.
+    """
+
+    def __init__(self, configs=None, watchlist=None):
+        self.watchlist = watchlist
+        self.watched_ids = None
+        self.item_sources = {}
+
+        if configs is None:
+            configs = watchlist.related_configs() if watchlist and not watchlist.watch_all \
+                else Config.objects.order_by('id')
+
+        self.configs = [ConfigNode(config, self) for config in configs]
+        config_map = {node.id: node for node in self.configs}
+
+        products = AbstractProduct.objects.filter(
+            config_id__in=list(config_map)
+        ).select_subclasses().order_by('id')
+
+        product_map = {}
+        for product in products:
+            node = ProductNode(product, config_map[product.config_id])
+            node.config.nodes.append(node)
+            product_map[node.id] = node
+
+        for node in product_map.values():
+            parent = product_map.get(node.product.parent_id)
+            if parent:
+                node.parent = parent
+                parent.nodes.append(node)
+
+        type_ids = {node.type_id for node in product_map.values() if node.type_id}
+        self.type_map = {t.id: t for t in Type.objects.filter(id__in=type_ids)}
+
+        self.source_map = defaultdict(list)
+        links = Source.configs.through.objects.filter(
+            config_id__in=list(config_map)
+        ).select_related('source').order_by('source_id')
+        for link in links:
+            self.source_map[(link.config_id, link.source.type_id)].append(link.source)
+
+        if watchlist:
+            if not watchlist.watch_all:
+                self.watched_ids = watchlist.related_product_ids
+
+            for item in watchlist.children().order_by('id').prefetch_related('sources'):
+                self.item_sources.setdefault(item.product_id, sorted(item.sources.all(), key=lambda s: s.id))
+
+    def is_watched(self, product_id):
+        return self.watched_ids is None or product_id in self.watched_ids
+
+    def types_of(self, type_ids):
+        return [self.type_map[i] for i in sorted(type_ids) if i in self.type_map]
+
+    def config_sources(self, config_id, type_id):
+        return self.source_map.get((config_id, type_id), [])
+
+
+def load_menu(configs=None, watchlist=None):
+    """
+    Load the navigation tree of configs (all configs by default, or those
+    related to watchlist) and return a list of ConfigNode.
+    """
+    return Menu(configs=configs, watchlist=watchlist).configs
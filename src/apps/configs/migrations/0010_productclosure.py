@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.13 on 2026-10-18 10:12
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_closure(apps, schema_editor):
+    AbstractProduct = apps.get_model('configs', 'AbstractProduct')
+    ProductClosure = apps.get_model('configs', 'ProductClosure')
+
+    parents = dict(AbstractProduct.objects.values_list('id', 'parent_id'))
+    links = []
+
+    for product_id in parents:
+        depth = 0
+        ancestor_id = product_id
+        visited = set()
+
+        while ancestor_id is not None and ancestor_id not in visited:
+            visited.add(ancestor_id)
+            links.append(ProductClosure(ancestor_id=ancestor_id, descendant_id=product_id, depth=depth))
+            ancestor_id = parents.get(ancestor_id)
+            depth += 1
+
+    ProductClosure.objects.bulk_create(links, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('configs', '0009_auto_20240123_2252'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductClosure',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.IntegerField(default=0, verbose_name='Depth')),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='configs.AbstractProduct', verbose_name='Ancestor')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='configs.AbstractProduct', verbose_name='Descendant')),
+            ],
+            options={
+                'verbose_name': 'Product Closure',
+                'verbose_name_plural': 'Product Closures',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='productclosure',
+            unique_together=set([('ancestor', 'descendant')]),
+        ),
+        migrations.RunPython(build_closure, migrations.RunPython.noop),
+    ]
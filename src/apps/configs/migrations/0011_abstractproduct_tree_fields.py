@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.13 on 2026-10-18 11:05
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('configs', '0010_productclosure'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='abstractproduct',
+            name='tree_depth',
+            field=models.IntegerField(blank=True, editable=False, null=True, verbose_name='Tree Depth'),
+        ),
+        migrations.AddField(
+            model_name='abstractproduct',
+            name='tree_path',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=255, null=True, verbose_name='Tree Path'),
+        ),
+    ]
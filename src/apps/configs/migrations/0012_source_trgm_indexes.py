@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.13 on 2026-10-18 14:20
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+INDEXES = [
+    ('configs_source_name_trgm', 'name'),
+    ('configs_source_alias_trgm', 'alias'),
+]
+
+
+def create_trgm_indexes(apps, schema_editor):
+    """
+    GIN indexes on UPPER(field::text), the expression Django emits for icontains,
+    skipped on databases without the pg_trgm extension (e.g. sqlite for local settings).
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return
+
+        cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for index, field in INDEXES:
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS "{index}" ON "configs_source" '
+                f'USING gin (UPPER("{field}"::text) gin_trgm_ops)'
+            )
+
+
+def drop_trgm_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        for index, _ in INDEXES:
+            cursor.execute(f'DROP INDEX IF EXISTS "{index}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('configs', '0011_abstractproduct_tree_fields'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trgm_indexes, drop_trgm_indexes),
+    ]
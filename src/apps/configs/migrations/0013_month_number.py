@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.13 on 2026-10-18 09:12
+from __future__ import unicode_literals
+
+import calendar
+import re
+
+import django.core.validators
+from django.db import migrations, models
+
+NUMERALS = {'一': 1, '二': 2, '三': 3, '四': 4, '五': 5, '六': 6, '七': 7, '八': 8, '九': 9}
+
+
+def parse_month(name):
+    """ calendar month of a Month name, e.g. 3, 3月, 三月, 十二月, March or Mar, None otherwise """
+    name = name.strip()
+
+    digits = re.match(r'0?(\d{1,2})\s*月?$', name)
+    if digits:
+        return int(digits.group(1))
+
+    numerals = re.match(r'(十?)([一二三四五六七八九]?)月$', name)
+    if numerals and any(numerals.groups()):
+        tens, ones = numerals.groups()
+        return (10 if tens else 0) + NUMERALS.get(ones, 0)
+
+    english = [month.lower() for month in calendar.month_name]
+    abbr = [month.lower() for month in calendar.month_abbr]
+    for names in (english, abbr):
+        if name.lower() in names[1:]:
+            return names.index(name.lower())
+
+    return None
+
+
+def fill_month_number(apps, schema_editor):
+    Month = apps.get_model('configs', 'Month')
+
+    used = set()
+    for month in Month.objects.order_by('id'):
+        number = parse_month(month.name)
+        if number is None or not 1 <= number <= 12 or number in used:
+            continue
+
+        used.add(number)
+        Month.objects.filter(id=month.id).update(number=number)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('configs', '0012_source_trgm_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='month',
+            name='number',
+            field=models.IntegerField(blank=True, null=True, unique=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(12)], verbose_name='Month Number'),
+        ),
+        migrations.RunPython(fill_month_number, migrations.RunPython.noop),
+    ]
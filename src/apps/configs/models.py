@@ -1,11 +1,49 @@
-from django.db import models
-from django.db.models import Model, DateTimeField, ManyToManyField, ForeignKey, SET_NULL, Q
+from django.db import models, transaction
+from django.db.models import Model, DateTimeField, ManyToManyField, ForeignKey, SET_NULL, CASCADE, Case, When, Value, Q
 from django.db.models.fields import CharField, IntegerField, BooleanField
 from django.utils import timezone
+from django.utils.functional import cached_property
 from django.utils.translation import ugettext_lazy as _
-from model_utils.managers import InheritanceManager
+from model_utils.managers import InheritanceManager, InheritanceQuerySet
 from django.core.validators import MaxLengthValidator, MinValueValidator, MaxValueValidator
 
+from apps.configs.lunar import lunar_calendar
+
+
+class AbstractProductQuerySet(InheritanceQuerySet):
+    """
+    with_has_child() / with_has_source() annotate each row with an EXISTS
+    subquery, AbstractProduct.has_child / has_source read the annotated
+    value instead of running a query per instance.
+
+    Annotations are added with extra(select=...) since InheritanceQuerySet
+    only copies the last annotate() call onto subclass instances.
+
+    e.g.
+    AbstractProduct.objects.filter(config=config).with_has_child().with_has_source().select_subclasses()
+    """
+
+    def with_has_child(self):
+        product_table = AbstractProduct._meta.db_table
+
+        return self.extra(select={
+            'child_exists': f'EXISTS (SELECT 1 FROM "{product_table}" AS "child" '
+                            f'WHERE "child"."parent_id" = "{product_table}"."id")'
+        })
+
+    def with_has_source(self):
+        product_table = AbstractProduct._meta.db_table
+        source_table = Source._meta.db_table
+        through_table = Source.configs.through._meta.db_table
+
+        return self.extra(select={
+            'source_exists': f'EXISTS (SELECT 1 FROM "{source_table}" AS "s" '
+                             f'INNER JOIN "{through_table}" AS "sc" ON "sc"."source_id" = "s"."id" '
+                             f'WHERE "sc"."config_id" = "{product_table}"."config_id" '
+                             f'AND ("s"."type_id" = "{product_table}"."type_id" '
+                             f'OR ("s"."type_id" IS NULL AND "{product_table}"."type_id" IS NULL)))'
+        })
+
 
 class AbstractProduct(Model):
     """
@@ -38,7 +76,14 @@ class AbstractProduct(Model):
     track_item = BooleanField(default=True, verbose_name=_('Track Item'))
     update_time = DateTimeField(auto_now=True, null=True, blank=True, verbose_name=_('Updated'))
 
-    objects = InheritanceManager()
+    # maintained by ProductClosure.objects.rebuild_subtree(), e.g. tree_path = '/1/5/12/', tree_depth = 3
+    tree_depth = IntegerField(null=True, blank=True, editable=False, verbose_name=_('Tree Depth'))
+    tree_path = CharField(max_length=255, null=True, blank=True, editable=False, db_index=True,
+                          verbose_name=_('Tree Path'))
+
+    TREE_FIELDS = ('tree_depth', 'tree_path')
+
+    objects = InheritanceManager.from_queryset(AbstractProductQuerySet)()
 
     class Meta:
         verbose_name = _('Abstract Product')
@@ -51,6 +96,19 @@ class AbstractProduct(Model):
     def __unicode__(self):
         return str(self.name)
 
+    def save(self, force_insert=False, force_update=False, using=None, update_fields=None):
+        """
+        tree_depth 與 tree_path 只由 ProductClosure.objects.rebuild_subtree() 以 update 寫入，
+        一般的 save 不回寫，避免祖先移動後，先前載入的 instance 以舊值覆蓋。
+        """
+        if update_fields is None and not force_insert and not self._state.adding:
+            update_fields = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.TREE_FIELDS
+            ]
+
+        super().save(force_insert=force_insert, force_update=force_update, using=using, update_fields=update_fields)
+
     @property
     def to_direct(self):
         """
@@ -61,14 +119,23 @@ class AbstractProduct(Model):
 
     @property
     def has_source(self):
-        return self.sources().count() > 0
+        if 'source_exists' in self.__dict__:
+            return self.source_exists
+
+        return self.sources().exists()
 
     @property
     def has_child(self):
-        return self.children().count() > 0
+        if 'child_exists' in self.__dict__:
+            return self.child_exists
+
+        return self.children().exists()
     
     @property
     def level(self):
+        if self.tree_depth is not None:
+            return self.tree_depth
+
         level = 1
 
         lock = False
@@ -84,6 +151,23 @@ class AbstractProduct(Model):
 
         return level
 
+    @property
+    def ancestor_ids(self):
+        """ 祖先產品 id，由根節點開始排列(不含自己) """
+        if not self.tree_path:
+            return []
+
+        return [int(i) for i in self.tree_path.strip('/').split('/')[:-1]]
+
+    def is_ancestor_of(self, product):
+        if not self.tree_path or not product.tree_path or self.id == product.id:
+            return False
+
+        return product.tree_path.startswith(self.tree_path)
+
+    def is_descendant_of(self, product):
+        return product.is_ancestor_of(self)
+
     def children(self, watchlist=None):
         """
         如果在 select_subclasses() 方法中指定了子類別，那麼實際上的 SQL 會使用 join。
@@ -116,13 +200,13 @@ class AbstractProduct(Model):
         return products.order_by('id')
 
     def children_all(self):
-        q_object = Q()
-        parent_attr = 'parent'
-        for _ in range(5):
-            q_object |= Q(**{parent_attr: self})
-            parent_attr += '__parent'
-
-        return AbstractProduct.objects.filter(q_object).select_subclasses().order_by('id')
+        """
+        所有子孫產品(不含自己)，由 ProductClosure 一次查詢取得，不受層數限制。
+        """
+        return AbstractProduct.objects.filter(
+            ancestor_links__ancestor=self,
+            ancestor_links__depth__gt=0,
+        ).select_subclasses().order_by('id')
     
     def types(self, watchlist=None):
         if self.has_child:
@@ -142,21 +226,199 @@ class AbstractProduct(Model):
         else:
             return Source.objects.filter(configs__id__exact=self.config.id).filter(type=self.type).order_by('id')
     
-    @property
+    @cached_property
     def related_product_ids(self):
-        ids = list(self.children().values_list('id', flat=True))
+        """ 自己、所有祖先及直屬子產品的 id，只需一次查詢，結果暫存於 instance """
+        return ProductClosure.objects.related_ids([self.id])
 
-        lock = False
-        product = self
 
-        while not lock:
-            ids.append(product.id)
-            if product.parent is not None:
-                product = product.parent
-            else:
-                lock = True
+class ProductClosureQuerySet(models.QuerySet):
+    """
+    Keep the ancestor/descendant closure of AbstractProduct in sync.
+
+    Every product owns one row pointing to itself (depth 0) plus one row
+    for each of its ancestors, so a whole subtree or ancestor chain can be
+    read with a single indexed lookup at any depth.
+    """
 
-        return ids
+    def related_ids(self, product_ids):
+        """
+        Collect product_ids with all of their ancestors and direct children in
+        one query. product_ids may be a list or a values('...') subquery.
+
+        Every row matched by either condition links a requested product to a
+        related one, so both ends of each row belong to the result.
+        """
+        rows = self.filter(
+            Q(descendant_id__in=product_ids) | Q(ancestor_id__in=product_ids, depth=1)
+        ).values_list('ancestor_id', 'descendant_id')
+
+        ids = set()
+        for ancestor_id, descendant_id in rows:
+            ids.add(ancestor_id)
+            ids.add(descendant_id)
+
+        return frozenset(ids)
+
+    def is_stale(self, product):
+        """
+        Check whether the ancestor rows of product still match its parent chain,
+        and its tree_path and tree_depth still extend the stored ones of its parent
+        """
+        current = set(self.filter(descendant=product).values_list('ancestor_id', 'depth'))
+        expected = {(product.id, 0)}
+        parent_path = '/'
+
+        if product.parent_id:
+            expected.update(
+                (ancestor_id, depth + 1)
+                for ancestor_id, depth in self.filter(
+                    descendant_id=product.parent_id
+                ).values_list('ancestor_id', 'depth')
+            )
+            parent_path = AbstractProduct.objects.filter(
+                id=product.parent_id
+            ).values_list('tree_path', flat=True).first() or ''
+
+        tree_path = f'{parent_path}{product.id}/'
+        tree_depth = tree_path.count('/') - 1
+
+        return current != expected or product.tree_path != tree_path or product.tree_depth != tree_depth
+
+    def rebuild_subtree(self, product):
+        """
+        Rebuild the rows of product and all of its descendants.
+
+        Descendants are collected through the parent column level by level
+        instead of the closure itself, so rows loaded out of order (e.g. by
+        loaddata) are fixed as soon as their ancestor is saved.
+        """
+        parents = {product.id: product.parent_id}
+        frontier = [product.id]
+
+        while frontier:
+            rows = AbstractProduct.objects.filter(
+                parent_id__in=frontier
+            ).exclude(id__in=list(parents)).values_list('id', 'parent_id')
+
+            frontier = []
+            for product_id, parent_id in rows:
+                parents[product_id] = parent_id
+                frontier.append(product_id)
+
+        ancestors = []
+        if product.parent_id:
+            ancestors = list(
+                self.filter(descendant_id=product.parent_id)
+                    .exclude(ancestor_id__in=list(parents))
+                    .values_list('ancestor_id', 'depth')
+            )
+
+        outer_ids = [ancestor_id for ancestor_id, _ in sorted(ancestors, key=lambda i: i[1], reverse=True)]
+        links = []
+        trees = {}
+
+        for product_id in parents:
+            depth = 0
+            ancestor_id = product_id
+            chain = []
+
+            while True:
+                chain.append(ancestor_id)
+                links.append(ProductClosure(ancestor_id=ancestor_id, descendant_id=product_id, depth=depth))
+                if ancestor_id == product.id:
+                    break
+                ancestor_id = parents[ancestor_id]
+                depth += 1
+
+            links.extend(
+                ProductClosure(ancestor_id=ancestor_id, descendant_id=product_id, depth=depth + offset + 1)
+                for ancestor_id, offset in ancestors
+            )
+
+            path_ids = outer_ids + chain[::-1]
+            trees[product_id] = (len(path_ids), self.format_path(path_ids))
+
+        with transaction.atomic():
+            self.filter(descendant_id__in=list(parents)).delete()
+            self.bulk_create(links)
+            self.update_trees(trees)
+
+        product.tree_depth, product.tree_path = trees[product.id]
+
+        return trees
+
+    def rebuild(self, batch_size=1000):
+        """ Rebuild the whole closure and the tree fields of every product in bulk """
+        parents = dict(AbstractProduct.objects.values_list('id', 'parent_id'))
+        links = []
+        trees = {}
+
+        for product_id in parents:
+            depth = 0
+            ancestor_id = product_id
+            chain = []
+
+            while ancestor_id is not None and ancestor_id not in chain:
+                chain.append(ancestor_id)
+                links.append(ProductClosure(ancestor_id=ancestor_id, descendant_id=product_id, depth=depth))
+                ancestor_id = parents.get(ancestor_id)
+                depth += 1
+
+            trees[product_id] = (len(chain), self.format_path(chain[::-1]))
+
+        with transaction.atomic():
+            self.all().delete()
+            self.bulk_create(links, batch_size=batch_size)
+            self.update_trees(trees, batch_size=batch_size)
+
+        return trees
+
+    def update_trees(self, trees, batch_size=1000):
+        """ Write {product_id: (tree_depth, tree_path)} back to AbstractProduct with one UPDATE per batch """
+        items = list(trees.items())
+
+        for i in range(0, len(items), batch_size):
+            batch = items[i:i + batch_size]
+            AbstractProduct.objects.filter(id__in=[product_id for product_id, _ in batch]).update(
+                tree_depth=Case(
+                    *[When(id=product_id, then=Value(depth)) for product_id, (depth, _) in batch],
+                    output_field=IntegerField()
+                ),
+                tree_path=Case(
+                    *[When(id=product_id, then=Value(path)) for product_id, (_, path) in batch],
+                    output_field=CharField()
+                ),
+            )
+
+    @staticmethod
+    def format_path(ids):
+        return '/{}/'.format('/'.join(str(i) for i in ids))
+
+
+class ProductClosure(Model):
+    """
+    AbstractProduct 樹狀結構的閉包表(closure table)，
+    記錄每一組祖先與子孫的關係及其距離(depth)，由 signals 在產品儲存、刪除時維護。
+    """
+    ancestor = ForeignKey('configs.AbstractProduct', on_delete=CASCADE, related_name='descendant_links',
+                          verbose_name=_('Ancestor'))
+    descendant = ForeignKey('configs.AbstractProduct', on_delete=CASCADE, related_name='ancestor_links',
+                            verbose_name=_('Descendant'))
+    depth = IntegerField(default=0, verbose_name=_('Depth'))
+
+    objects = ProductClosureQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _('Product Closure')
+        verbose_name_plural = _('Product Closures')
+        unique_together = ('ancestor', 'descendant')
+
+    def __str__(self):
+        return f'{self.ancestor_id} -> {self.descendant_id} ({self.depth})'
+
+    def __unicode__(self):
+        return f'{self.ancestor_id} -> {self.descendant_id} ({self.depth})'
 
 
 class SourceQuerySet(models.QuerySet):
@@ -170,10 +432,28 @@ class SourceQuerySet(models.QuerySet):
         qs = self.filter(name=name)
 
         if not qs:
-            qs = self.filter(alias__icontains=name)
+            qs = self.search(name, fields=('alias',))
 
         return qs
 
+    def search(self, term, fields=('name', 'alias')):
+        """
+        Case-insensitive substring search on name and/or alias, 台 is normalized to 臺.
+
+        icontains compiles to UPPER("field"::text) LIKE UPPER('%term%') on PostgreSQL,
+        which is served by the pg_trgm GIN indexes of migration 0012_source_trgm_indexes
+        instead of a sequential scan (terms shorter than 3 characters still scan).
+        """
+        if not isinstance(term, str):
+            raise TypeError('Term must be a string')
+
+        term = term.replace('台', '臺')
+        q_object = Q()
+        for field in fields:
+            q_object |= Q(**{f'{field}__icontains': term})
+
+        return self.filter(q_object)
+
 
 class Source(Model):
     """
@@ -254,6 +534,12 @@ class Config(Model):
     def products(self):
         return AbstractProduct.objects.filter(config=self).select_subclasses().order_by('id')
 
+    def menu(self, watchlist=None):
+        """ the whole navigation tree of this config, see apps.configs.menu """
+        from apps.configs.menu import load_menu
+
+        return load_menu(configs=[self], watchlist=watchlist)[0]
+
     def types(self):
         products_qs = self.products().values('type').distinct()
         types_ids = [product['type'] for product in products_qs]
@@ -359,6 +645,9 @@ class Chart(Model):
 
 class Month(Model):
     name = CharField(max_length=120, unique=True, verbose_name=_('Name'))
+    # 月份數字 1 ~ 12，由 migration 0013 依名稱填入，MonitorProfile 依此比對當月
+    number = IntegerField(null=True, blank=True, unique=True, validators=[MinValueValidator(1), MaxValueValidator(12)],
+                          verbose_name=_('Month Number'))
 
     class Meta:
         verbose_name = _('Month')
@@ -389,6 +678,14 @@ class Festival(Model):
     def __unicode__(self):
         return f"{self.roc_year}_{self.name.name}"
 
+    @property
+    def gregorian_date(self):
+        """ 節日在該民國年的國曆日期，由預先建好的農曆對照表查得 """
+        if self.name is None:
+            return None
+
+        return lunar_calendar.to_gregorian(int(self.roc_year) + 1911, self.name.lunar_month, self.name.lunar_day)
+
 
 class FestivalName(Model):
     name = CharField(max_length=20, unique=True, verbose_name=_('Name'),
@@ -0,0 +1,115 @@
+"""
+In-process market name resolver for ingest.
+
+SourceQuerySet.filter_by_name() costs one or two queries per record, the
+resolver loads every Source once and answers the same question from
+dictionaries, e.g.
+
+    source_resolver.resolve('台北一', config=config, type=type_instance)
+
+returns the same sources, in the same order, as
+
+    Source.objects.filter(configs=config, type=type_instance).filter_by_name('台北一')
+
+The index is dropped by signals when a Source changes in this process and
+rebuilt after SOURCE_RESOLVER_TTL seconds to pick up changes made by others.
+"""
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+from apps.configs.models import Source
+
+ANY = object()
+
+
+class SourceResolver:
+    def __init__(self, ttl=None):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.built_at = None
+        self.sources = {}
+        self.configs = {}
+        self.names = {}
+        self.aliases = []
+        self.memo = {}
+
+    def invalidate(self):
+        with self.lock:
+            self.built_at = None
+
+    @property
+    def expired(self):
+        ttl = self.ttl if self.ttl is not None else getattr(settings, 'SOURCE_RESOLVER_TTL', 300)
+        return self.built_at is None or time.monotonic() - self.built_at > ttl
+
+    def build(self):
+        sources = {source.id: source for source in Source.objects.select_related('type').order_by('id')}
+
+        configs = defaultdict(set)
+        for source_id, config_id in Source.configs.through.objects.values_list('source_id', 'config_id'):
+            configs[source_id].add(config_id)
+
+        names = defaultdict(list)
+        aliases = []
+        for source in sources.values():
+            names[source.name].append(source.id)
+            if source.alias:
+                aliases.append((source.id, source.alias.upper()))
+
+        self.sources = sources
+        self.configs = configs
+        self.names = dict(names)
+        self.aliases = aliases
+        self.memo = {}
+        self.built_at = time.monotonic()
+
+    def in_scope(self, source_id, config_id, type_id):
+        if config_id is None and self.configs.get(source_id):
+            return False
+        if config_id not in (ANY, None) and config_id not in self.configs.get(source_id, ()):
+            return False
+        if type_id is not ANY and self.sources[source_id].type_id != type_id:
+            return False
+        return True
+
+    def resolve(self, name, config=ANY, type=ANY):
+        """
+        Sources named name (台 is normalized to 臺) or, failing that, whose alias
+        contains name, limited to config/type when given, None means the
+        source has no config/type as in Source.objects.filter(type=None).
+        """
+        if not isinstance(name, str):
+            raise TypeError('Name must be a string')
+
+        config_id = config if config is ANY or config is None else getattr(config, 'id', config)
+        type_id = type if type is ANY or type is None else getattr(type, 'id', type)
+
+        with self.lock:
+            if self.expired:
+                self.build()
+
+            key = (name, config_id, type_id)
+            if key not in self.memo:
+                self.memo[key] = self._lookup(name, config_id, type_id)
+
+            return [self.sources[source_id] for source_id in self.memo[key]]
+
+    def resolve_one(self, name, config=ANY, type=ANY):
+        sources = self.resolve(name, config=config, type=type)
+        return sources[0] if sources else None
+
+    def _lookup(self, name, config_id, type_id):
+        name = name.replace('台', '臺')
+
+        ids = [i for i in self.names.get(name, []) if self.in_scope(i, config_id, type_id)]
+        if ids:
+            return ids
+
+        name = name.upper()
+        return [i for i, alias in self.aliases if name in alias and self.in_scope(i, config_id, type_id)]
+
+
+source_resolver = SourceResolver()
@@ -0,0 +1,60 @@
+from django.db import transaction
+from django.db.models.signals import post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from apps.configs.cache import menu_cache
+from apps.configs.models import AbstractProduct, ProductClosure, Source, Config, Type
+from apps.configs.resolvers import source_resolver
+
+
+@receiver(post_save)
+def update_product_tree(sender, instance, created, **kwargs):
+    """
+    Subclasses of AbstractProduct (multi-table inheritance) send post_save with
+    their own class as sender, so listen to every model and filter here.
+    """
+    if not isinstance(instance, AbstractProduct):
+        return
+
+    if created or instance.tree_path is None or ProductClosure.objects.is_stale(instance):
+        ProductClosure.objects.rebuild_subtree(instance)
+        instance.__dict__.pop('related_product_ids', None)
+
+
+@receiver(pre_delete, sender=AbstractProduct)
+def collect_product_children(sender, instance, **kwargs):
+    instance._tree_children = list(AbstractProduct.objects.filter(parent=instance))
+
+
+@receiver(post_delete, sender=AbstractProduct)
+def rebuild_product_children(sender, instance, **kwargs):
+    # children were SET_NULL by the delete and now become roots
+    for child in getattr(instance, '_tree_children', []):
+        child.parent = None
+        ProductClosure.objects.rebuild_subtree(child)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_menu_cache(sender, instance, **kwargs):
+    if isinstance(instance, (AbstractProduct, Source, Config, Type)):
+        # bump after commit, or a concurrent read could cache the old tree under the new version
+        transaction.on_commit(menu_cache.bump)
+
+
+@receiver(m2m_changed, sender=Source.configs.through)
+def invalidate_menu_cache_by_source_configs(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        transaction.on_commit(menu_cache.bump)
+
+
+@receiver(post_save, sender=Source)
+@receiver(post_delete, sender=Source)
+def invalidate_source_resolver(sender, **kwargs):
+    source_resolver.invalidate()
+
+
+@receiver(m2m_changed, sender=Source.configs.through)
+def invalidate_source_resolver_by_configs(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        source_resolver.invalidate()
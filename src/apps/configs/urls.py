@@ -0,0 +1,9 @@
+from django.conf.urls import url
+
+from apps.configs.views import (
+    menu_view,
+)
+
+urlpatterns = [
+    url(r'^menu/$', menu_view, name='menu'),
+]
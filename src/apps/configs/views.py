@@ -1,3 +1,23 @@
-from django.shortcuts import render
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
 
-# Create your views here.
+from apps.configs.cache import menu_cache
+from apps.configs.models import Config
+from apps.watchlists.models import Watchlist
+from utils.dashboard.utils import login_required
+
+
+@login_required
+def menu_view(request):
+    """
+    Serialized navigation menu, read through apps.configs.cache, e.g.
+    /configs/menu/, /configs/menu/?watchlist=1 or /configs/menu/?config=2
+    """
+    config_id = request.GET.get('config')
+    if config_id:
+        config = get_object_or_404(Config, id=config_id)
+        return JsonResponse(menu_cache.get_config_menu(config))
+
+    watchlist_id = request.GET.get('watchlist')
+    watchlist = get_object_or_404(Watchlist, id=watchlist_id) if watchlist_id else None
+    return JsonResponse(menu_cache.get_menu(watchlist), safe=False)
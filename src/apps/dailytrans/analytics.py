@@ -0,0 +1,170 @@
+"""
+Vectorized DailyTran analytics.
+
+load_series() reads (date, avg_price, volume) of a product/source set with
+values_list straight into NumPy arrays, every statistic below works on
+whole arrays instead of looping over model instances, e.g.
+
+    series = load_series(products=[product], sources=sources).daily()
+    series.rolling_mean(7)
+    series.year_over_year()
+    series.month_day_stats(years=5)
+
+Missing volumes are NaN, a weighted average falls back to the plain mean
+when no volume is known, as DailyTranRollup does.
+"""
+import numpy as np
+
+from apps.dailytrans.models import DailyTran
+
+
+def weighted_average(prices, volumes):
+    prices = np.asarray(prices, dtype=float)
+    volumes = np.asarray(volumes, dtype=float)
+
+    known = ~np.isnan(prices) & ~np.isnan(volumes)
+    total = volumes[known].sum()
+    if total > 0:
+        return float((prices[known] * volumes[known]).sum() / total)
+
+    prices = prices[~np.isnan(prices)]
+    return float(prices.mean()) if prices.size else np.nan
+
+
+def _group_weighted_average(groups, count, prices, volumes):
+    """ weighted average of prices per group index (0 ~ count - 1), plain mean for groups without volume """
+    known = ~np.isnan(volumes) & ~np.isnan(prices)
+    weights = np.where(known, volumes, 0.0)
+    weighted = np.bincount(groups, weights=np.where(known, prices * weights, 0.0), minlength=count)
+    total = np.bincount(groups, weights=weights, minlength=count)
+
+    valid = ~np.isnan(prices)
+    sums = np.bincount(groups, weights=np.where(valid, prices, 0.0), minlength=count)
+    counts = np.bincount(groups, weights=valid.astype(float), minlength=count)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(total > 0, weighted / total, sums / counts)
+
+
+def _nansum_by_group(groups, count, values):
+    """ sum of values per group, NaN for groups without any value """
+    valid = ~np.isnan(values)
+    sums = np.bincount(groups, weights=np.where(valid, values, 0.0), minlength=count)
+    counts = np.bincount(groups, weights=valid.astype(float), minlength=count)
+    return np.where(counts > 0, sums, np.nan)
+
+
+class PriceSeries:
+    def __init__(self, dates, prices, volumes):
+        self.dates = np.asarray(dates, dtype='datetime64[D]')
+        self.prices = np.asarray(prices, dtype=float)
+        self.volumes = np.asarray(volumes, dtype=float)
+
+    def __len__(self):
+        return self.dates.size
+
+    @property
+    def years(self):
+        return self.dates.astype('datetime64[Y]').astype(int) + 1970
+
+    @property
+    def month_days(self):
+        """ same as DailyTran.month_day, e.g. 1231 """
+        months = self.dates.astype('datetime64[M]')
+        return (months.astype(int) % 12 + 1) * 100 + (self.dates - months).astype(int) + 1
+
+    def daily(self):
+        """ one point per date: volume-weighted price of every product/source, summed volume """
+        dates, groups = np.unique(self.dates, return_inverse=True)
+        prices = _group_weighted_average(groups, dates.size, self.prices, self.volumes)
+        volumes = _nansum_by_group(groups, dates.size, self.volumes)
+        return PriceSeries(dates, prices, volumes)
+
+    def weighted_average(self):
+        return weighted_average(self.prices, self.volumes)
+
+    def rolling_mean(self, window):
+        """ mean of the last window points (NaN ignored), NaN until window points are seen """
+        valid = ~np.isnan(self.prices)
+        sums = np.cumsum(np.where(valid, self.prices, 0.0))
+        counts = np.cumsum(valid)
+        sums[window:] = sums[window:] - sums[:-window]
+        counts[window:] = counts[window:] - counts[:-window]
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = np.where(counts > 0, sums / counts, np.nan)
+        means[:window - 1] = np.nan
+        return means
+
+    def year_over_year(self):
+        """
+        (previous, delta, ratio) arrays of the price on the same month/day
+        of the previous year, NaN when that day has no price.
+        Expects one point per date, see daily().
+        """
+        keys = self.years * 10000 + self.month_days
+        order = np.argsort(keys)
+        sorted_keys = keys[order]
+
+        previous_keys = keys - 10000
+        index = np.clip(np.searchsorted(sorted_keys, previous_keys), 0, max(keys.size - 1, 0))
+        found = sorted_keys[index] == previous_keys
+
+        previous = np.where(found, self.prices[order][index], np.nan)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return previous, self.prices - previous, self.prices / previous - 1
+
+    def month_day_stats(self, years=None, end_year=None):
+        """
+        Statistics per month_day over the last years (all by default) up to
+        end_year: {'month_day', 'mean', 'min', 'max', 'weighted_avg', 'count'} arrays.
+        """
+        mask = ~np.isnan(self.prices)
+        if years and len(self):
+            if end_year is None:
+                end_year = int(self.years.max())
+            mask &= (self.years > end_year - years) & (self.years <= end_year)
+
+        month_days = self.month_days[mask]
+        prices = self.prices[mask]
+        volumes = self.volumes[mask]
+
+        keys, groups = np.unique(month_days, return_inverse=True)
+        if not keys.size:
+            empty = np.zeros(0)
+            return {'month_day': keys, 'mean': empty, 'min': empty, 'max': empty,
+                    'weighted_avg': empty, 'count': np.zeros(0, dtype=int)}
+
+        order = np.argsort(groups, kind='mergesort')
+        starts = np.searchsorted(groups[order], np.arange(keys.size))
+        counts = np.bincount(groups, minlength=keys.size)
+
+        return {
+            'month_day': keys,
+            'mean': np.bincount(groups, weights=prices, minlength=keys.size) / counts,
+            'min': np.minimum.reduceat(prices[order], starts),
+            'max': np.maximum.reduceat(prices[order], starts),
+            'weighted_avg': _group_weighted_average(groups, keys.size, prices, volumes),
+            'count': counts,
+        }
+
+
+def load_series(products=None, sources=None, start_date=None, end_date=None, queryset=None):
+    """ PriceSeries of DailyTran filtered by products/sources (instances or ids) and dates """
+    queryset = DailyTran.objects.all() if queryset is None else queryset
+
+    if products is not None:
+        queryset = queryset.filter(product_id__in=[getattr(p, 'id', p) for p in products])
+    if sources is not None:
+        queryset = queryset.filter(source_id__in=[getattr(s, 'id', s) for s in sources])
+    if start_date:
+        queryset = queryset.filter(date__gte=start_date)
+    if end_date:
+        queryset = queryset.filter(date__lte=end_date)
+
+    rows = list(queryset.order_by('date').values_list('date', 'avg_price', 'volume'))
+    if not rows:
+        return PriceSeries([], [], [])
+
+    dates, prices, volumes = zip(*rows)
+    return PriceSeries(dates, np.array(prices, dtype=float), np.array(volumes, dtype=float))
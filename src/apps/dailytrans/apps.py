@@ -2,4 +2,7 @@ from django.apps import AppConfig
 
 
 class DailytransConfig(AppConfig):
-    name = 'dailytrans'
+    name = 'apps.dailytrans'
+
+    def ready(self):
+        import apps.dailytrans.signals  # noqa: F401
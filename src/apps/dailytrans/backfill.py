@@ -0,0 +1,173 @@
+"""
+Parallel historical backfill of DailyTran from a DAILYTRAN_BUILDER_API feed.
+
+Backfill splits since ~ until into shards of shard_days days, each shard is
+fetched by OpenDataFetcher (with CrawlState, so unchanged days are skipped)
+and its records turned into rows by the DAILYTRAN_INGESTERS parser of the
+feed, then written with DailyTran.objects.bulk_upsert. The rows of skipped
+days count one more not_updated, for the configs of the feed in
+DAILYTRAN_FEED_CONFIGS.
+
+Shards run in a process pool, or as a Celery chord (see tasks), and are
+checkpointed in BackfillShard: a rerun only processes the shards which did
+not finish. Once every shard is done, finish() merges duplicated rows of
+the range, refreshes the rollups and the Last5YearsItems stats and checks
+the MonitorProfile alerts (see apps.watchlists.alerts.log_alerts).
+
+e.g.
+    result = Backfill('eir030', datetime.date(2011, 1, 1), datetime.date(2023, 12, 31), workers=4).run()
+    result.rows_per_second
+"""
+import datetime
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from apps.dailytrans.fetcher import HOST_CONCURRENCY, OpenDataFetcher, date_ranges
+from apps.dailytrans.models import FIRST_YEAR, BackfillShard, DailyTran, DailyTranRollup, Last5YearsDailyStat
+from apps.dailytrans.utils import merge_duplicates
+from apps.watchlists.alerts import log_alerts
+
+SHARD_DAYS = 30
+
+ShardResult = namedtuple('ShardResult', ['start_date', 'end_date', 'rows', 'seconds', 'resumed'])
+
+
+class BackfillResult(namedtuple('BackfillResult', ['shards', 'resumed', 'rows', 'seconds', 'finish'])):
+    __slots__ = ()
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def first_date():
+    """ first day of DailyTran history, see FIRST_YEAR """
+    return datetime.date(FIRST_YEAR, 1, 1)
+
+
+def ingester(feed):
+    """ records parser of feed from DAILYTRAN_INGESTERS """
+    path = settings.DAILYTRAN_INGESTERS.get(feed)
+    if not path:
+        raise KeyError(f'No DAILYTRAN_INGESTERS parser for {feed}')
+    return import_string(path)
+
+
+def feed_trans(feed):
+    """ DailyTran of the DAILYTRAN_FEED_CONFIGS configs of feed, None when it has none """
+    codes = settings.DAILYTRAN_FEED_CONFIGS.get(feed)
+    if not codes:
+        return None
+    return DailyTran.objects.filter(product__config__code__in=codes)
+
+
+def run_shard(feed, start_date, end_date, host_concurrency=HOST_CONCURRENCY):
+    """ fetch and upsert start_date ~ end_date of feed unless its checkpoint is finished, return ShardResult """
+    shard, _ = BackfillShard.objects.get_or_create(feed=feed, start_date=start_date, end_date=end_date)
+    if shard.finish_time:
+        return ShardResult(start_date, end_date, shard.rows, shard.seconds, True)
+
+    parse = ingester(feed)
+    trans = feed_trans(feed)
+    rows = 0
+
+    def ingest(api, start, end, records):
+        nonlocal rows
+        result = DailyTran.objects.bulk_upsert(parse(records))
+        rows += sum(result)
+
+    def unchanged(api, date):
+        trans.mark_not_updated(date)
+
+    stats = OpenDataFetcher(host_concurrency=host_concurrency, use_state=True).run(
+        feed, start_date, end_date, ingest=ingest, unchanged=unchanged if trans is not None else None
+    )
+
+    shard.rows = rows
+    shard.seconds = stats.seconds
+    shard.finish_time = timezone.now()
+    shard.save()
+
+    return ShardResult(start_date, end_date, rows, stats.seconds, False)
+
+
+def _run_shard(args):
+    """ process pool entry, connections are opened again in each worker """
+    return run_shard(*args)
+
+
+def finish(since, until):
+    """ merge duplicated rows of since ~ until, refresh the derived tables and check alerts, return their counts """
+    groups, deleted = merge_duplicates(DailyTran.objects.filter(date__range=(since, until)))
+
+    return {
+        'merged_groups': groups,
+        'merged_rows': deleted,
+        'rollups': sum(DailyTranRollup.objects.refresh_all().values()),
+        'last5years_items': len(Last5YearsDailyStat.objects.refresh_all()),
+        'alerts': len(log_alerts()),
+    }
+
+
+class Backfill:
+    def __init__(self, feed, since=None, until=None, workers=None, shard_days=SHARD_DAYS,
+                 host_concurrency=HOST_CONCURRENCY):
+        self.feed = feed
+        self.since = since or first_date()
+        self.until = until or datetime.date.today()
+        self.workers = workers
+        self.shard_days = shard_days
+        self.host_concurrency = host_concurrency
+
+    def shards(self):
+        return date_ranges(self.since, self.until, days=self.shard_days)
+
+    def reset(self):
+        """ drop the checkpoints of the range to process every shard again """
+        return BackfillShard.objects.filter(
+            feed=self.feed, start_date__gte=self.since, end_date__lte=self.until
+        ).delete()[0]
+
+    def run(self):
+        """ process the unfinished shards, then finish(), return BackfillResult """
+        ingester(self.feed)
+        started = time.monotonic()
+        jobs = [(self.feed, start, end, self.host_concurrency) for start, end in self.shards()]
+
+        # workers=0 runs the shards in this process, e.g. for tests
+        if self.workers == 0:
+            results = [_run_shard(job) for job in jobs]
+        else:
+            # forked workers must not share the connection of this process
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                results = list(executor.map(_run_shard, jobs))
+
+        processed = [result for result in results if not result.resumed]
+        finished = self.finish()
+
+        return BackfillResult(
+            shards=len(results),
+            resumed=len(results) - len(processed),
+            rows=sum(result.rows for result in processed),
+            seconds=time.monotonic() - started,
+            finish=finished,
+        )
+
+    def finish(self):
+        return finish(self.since, self.until)
+
+    def dispatch(self):
+        """ run the shards as a Celery chord of BackfillShard tasks calling FinishBackfill, return its AsyncResult """
+        from celery import chord
+        from apps.dailytrans.tasks import backfill_shard, finish_backfill
+
+        ingester(self.feed)
+        header = [backfill_shard.s(self.feed, start.isoformat(), end.isoformat()) for start, end in self.shards()]
+        return chord(header)(finish_backfill.s(self.since.isoformat(), self.until.isoformat()))
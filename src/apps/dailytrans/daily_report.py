@@ -0,0 +1,198 @@
+"""
+Daily report pipeline: one report per date with the prices of that date
+compared with the WINDOW_DAYS days before it.
+
+DailyReportPipeline.run() only regenerates the reports whose window has
+DailyTran updated or created since the last complete run, so a crawler
+backfilling historical data rebuilds just the affected dates:
+
+1. pending_dates() finds the changed dates and the reports covering them,
+   the DailyTran high-water mark is taken first and stored in
+   DailyReportWatermark once all of them are generated;
+2. payload() reads the rows of one report window with a single query;
+3. the payload is serialized canonically and hashed, the rendered file is
+   cached on disk under its hash, and uploader(date, path) is only called
+   when the hash differs from DailyReport.content_hash. Files of older
+   hashes of the same date are removed.
+
+e.g.
+    DailyReportPipeline(uploader=drive_uploader).run()
+"""
+import datetime
+import glob
+import hashlib
+import json
+import os
+import shutil
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Max, Q
+
+from apps.dailytrans.models import DailyReport, DailyReportWatermark, DailyTran
+
+WINDOW_DAYS = 7
+
+# rows committed a little after the last generation may carry an older update_time
+OVERLAP = datetime.timedelta(minutes=10)
+
+
+def local_uploader(date, path):
+    """ default uploader, keep the reports under DAILY_REPORT_DIR and use the file names as ids """
+    os.makedirs(settings.DAILY_REPORT_DIR, exist_ok=True)
+
+    name = os.path.basename(path)
+    shutil.copy(path, os.path.join(settings.DAILY_REPORT_DIR, name))
+    return name
+
+
+def weighted(prices_volumes):
+    known = [(p, v) for p, v in prices_volumes if v]
+    volume = sum(v for _, v in known)
+    if volume:
+        return sum(p * v for p, v in known) / volume
+    return sum(p for p, _ in prices_volumes) / len(prices_volumes) if prices_volumes else None
+
+
+class DailyReportPipeline:
+    def __init__(self, uploader=None, cache_dir=None, window_days=WINDOW_DAYS):
+        self.uploader = uploader or local_uploader
+        self.cache_dir = cache_dir
+        self.window_days = window_days
+
+    def watermark(self):
+        """ DailyTran high-water mark of the last complete run, None before the first one """
+        return DailyReportWatermark.objects.values_list('last_tran_update', flat=True).first()
+
+    @staticmethod
+    def tran_watermark():
+        """ latest update_time/create_time of DailyTran """
+        latest = DailyTran.objects.aggregate(update=Max('update_time'), create=Max('create_time'))
+        return max((t for t in latest.values() if t is not None), default=None)
+
+    def advance(self, watermark):
+        if watermark is not None:
+            DailyReportWatermark.objects.update_or_create(pk=1, defaults={'last_tran_update': watermark})
+
+    def pending_dates(self, since=None, today=None):
+        """
+        Report dates to regenerate: every date having DailyTran whose window
+        (the date and the window_days before it) holds DailyTran changed
+        after since, up to today.
+        """
+        today = today or datetime.date.today()
+
+        trans = DailyTran.objects.all()
+        if since is not None:
+            trans = trans.filter(
+                Q(update_time__gt=since - OVERLAP) | Q(update_time__isnull=True, create_time__gt=since - OVERLAP)
+            )
+
+        changed = trans.order_by().values_list('date', flat=True).distinct()
+
+        dates = set()
+        for date in changed:
+            for i in range(self.window_days + 1):
+                report_date = date + datetime.timedelta(days=i)
+                if report_date > today:
+                    break
+                dates.add(report_date)
+
+        with_data = DailyTran.objects.filter(date__in=dates).order_by().values_list('date', flat=True).distinct()
+        return sorted(with_data)
+
+    def payload(self, date):
+        """ {'date', 'rows'}: price of each product/source on date and its volume-weighted average before it """
+        start = date - datetime.timedelta(days=self.window_days)
+        rows = DailyTran.objects.filter(date__range=(start, date)).values_list(
+            'product_id', 'product__name', 'source_id', 'source__name', 'date', 'avg_price', 'volume', 'avg_weight'
+        )
+
+        current = {}
+        previous = defaultdict(list)
+        for product_id, product_name, source_id, source_name, day, avg_price, volume, avg_weight in rows:
+            key = (product_id, source_id)
+            if day == date:
+                current[key] = {
+                    'product_id': product_id,
+                    'product': product_name,
+                    'source_id': source_id,
+                    'source': source_name,
+                    'avg_price': avg_price,
+                    'volume': volume,
+                    'avg_weight': avg_weight,
+                }
+            else:
+                previous[key].append((avg_price, volume))
+
+        report_rows = []
+        for key in sorted(current, key=lambda k: (k[0], k[1] or 0)):
+            row = current[key]
+            row['previous_avg_price'] = weighted(previous.get(key, []))
+            report_rows.append(row)
+
+        return {'date': date.isoformat(), 'window_days': self.window_days, 'rows': report_rows}
+
+    @staticmethod
+    def serialize(payload):
+        return json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+    def render(self, date, payload):
+        """ (content hash, path of the rendered report), rendering is skipped when the hash is cached """
+        content = self.serialize(payload)
+        content_hash = hashlib.sha256(content).hexdigest()
+
+        cache_dir = self.cache_dir or settings.DAILY_REPORT_CACHE_DIR
+        os.makedirs(cache_dir, exist_ok=True)
+        path = os.path.join(cache_dir, f'daily_report_{date:%Y%m%d}_{content_hash[:12]}.json')
+
+        if not os.path.exists(path):
+            tmp_path = f'{path}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+
+        for old_path in glob.glob(os.path.join(cache_dir, f'daily_report_{date:%Y%m%d}_*.json')):
+            if old_path != path:
+                os.remove(old_path)
+
+        return content_hash, path
+
+    def generate(self, date):
+        """ regenerate the report of date, return (report, uploaded) """
+        content_hash, path = self.render(date, self.payload(date))
+
+        report = DailyReport.objects.filter(date=date).order_by('-update_time').first()
+        if report and report.content_hash == content_hash:
+            return report, False
+
+        file_id = self.uploader(date, path)
+        if report is None:
+            report = DailyReport(date=date)
+        report.file_id = file_id
+        report.content_hash = content_hash
+        report.save()
+
+        return report, True
+
+    def run(self, dates=None, full=False, today=None):
+        """
+        Regenerate the given dates, or those changed since the last complete
+        run (every date when full), return (generated, uploaded) counts.
+        The watermark only moves when the pending dates were all generated,
+        never for explicit dates.
+        """
+        watermark = None
+        if dates is None:
+            # taken before looking for changes, rows written meanwhile are picked up by the next run
+            watermark = self.tran_watermark()
+            dates = self.pending_dates(since=None if full else self.watermark(), today=today)
+
+        uploaded = 0
+        for date in dates:
+            _, is_uploaded = self.generate(date)
+            uploaded += is_uploaded
+
+        self.advance(watermark)
+
+        return len(dates), uploaded
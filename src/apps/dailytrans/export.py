@@ -0,0 +1,122 @@
+"""
+Streaming DailyTran export.
+
+Rows are read through a PostgreSQL server-side (named) cursor, chunk_size
+rows at a time, as plain tuples without instantiating models, and every
+chunk is serialized and handed out before the next one is fetched, so the
+memory used does not depend on the number of exported rows.
+
+e.g.
+    queryset = export_queryset(product=product, start_date=start, end_date=end)
+    for chunk in csv_chunks(iter_chunks(queryset)):
+        output.write(chunk)
+
+Formats:
+    csv       a header line followed by one line per row
+    columnar  newline delimited JSON, one object of column arrays per chunk
+"""
+import csv
+import io
+import json
+import uuid
+
+from django.db import connection, transaction
+
+from apps.configs.models import ProductClosure
+from apps.dailytrans.models import DailyTran
+
+EXPORT_FIELDS = (
+    'product_id',
+    'product__name',
+    'source_id',
+    'source__name',
+    'up_price',
+    'mid_price',
+    'low_price',
+    'avg_price',
+    'volume',
+    'avg_weight',
+    'date',
+)
+
+EXPORT_COLUMNS = tuple(field.replace('__', '_') for field in EXPORT_FIELDS)
+
+CHUNK_SIZE = 5000
+
+
+def export_queryset(product=None, watchlist=None, start_date=None, end_date=None):
+    """
+    DailyTran of product or of the watchlist items' products, including their descendants,
+    a watch_all watchlist does not filter
+    """
+    queryset = DailyTran.objects.all()
+
+    if watchlist is not None and watchlist.watch_all:
+        # watches every product and usually has no items
+        watchlist = None
+
+    ancestor_ids = []
+    if product is not None:
+        ancestor_ids.append(product.id)
+    if watchlist is not None:
+        ancestor_ids.extend(watchlist.children().values_list('product_id', flat=True))
+
+    if product is not None or watchlist is not None:
+        product_ids = ProductClosure.objects.filter(
+            ancestor_id__in=ancestor_ids
+        ).values_list('descendant_id', flat=True).distinct()
+        queryset = queryset.filter(product_id__in=list(product_ids))
+
+    if start_date:
+        queryset = queryset.filter(date__gte=start_date)
+    if end_date:
+        queryset = queryset.filter(date__lte=end_date)
+
+    return queryset.order_by('product_id', 'source_id', 'date')
+
+
+def iter_chunks(queryset, chunk_size=CHUNK_SIZE):
+    """ yield lists of EXPORT_FIELDS tuples of queryset, read by a server-side cursor """
+    sql, params = queryset.values_list(*EXPORT_FIELDS).query.sql_with_params()
+
+    # named cursors only live inside a transaction
+    with transaction.atomic():
+        cursor = connection.connection.cursor(name=f'dailytran_export_{uuid.uuid4().hex}')
+        cursor.itersize = chunk_size
+        try:
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
+
+
+def csv_chunks(chunks):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def columnar_chunks(chunks):
+    for rows in chunks:
+        columns = dict(zip(EXPORT_COLUMNS, (list(column) for column in zip(*rows))))
+        columns['date'] = [date.isoformat() for date in columns['date']]
+        yield json.dumps(columns, ensure_ascii=False) + '\n'
+
+
+FORMATS = {
+    'csv': (csv_chunks, 'text/csv', 'csv'),
+    'columnar': (columnar_chunks, 'application/x-ndjson', 'ndjson'),
+}
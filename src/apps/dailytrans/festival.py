@@ -0,0 +1,221 @@
+"""
+Festival reports: prices and volumes of the FestivalItems of a festival
+in the days before it, this year compared with the previous years.
+
+FestivalReportBuilder works in three steps:
+
+1. resolve the Gregorian dates of every festival through the shipped lunar
+   table (apps.configs.lunar) and fetch the DailyTran of all its items and
+   years with one query per festival, in the main process;
+2. compute the tables and write the price and volume workbooks of each
+   festival in a process pool, workers only get plain data and never
+   touch the database;
+3. hand the files to uploader(festival, price_path, volume_path), which
+   returns (file_id, file_volume_id) stored in FestivalReport.
+
+e.g.
+    FestivalReportBuilder(workers=4).build(roc_years=['112', '113'])
+"""
+import datetime
+import os
+import shutil
+import tempfile
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db.models import Q
+from openpyxl import Workbook
+
+from apps.configs.lunar import lunar_calendar
+from apps.configs.models import Festival, FestivalItems
+from apps.dailytrans.models import DailyTran, FestivalReport
+
+DAYS_BEFORE = 14
+COMPARE_YEARS = 2
+
+
+def local_uploader(festival, price_path, volume_path):
+    """ default uploader, keep the workbooks under FESTIVAL_REPORT_DIR and use the file names as ids """
+    os.makedirs(settings.FESTIVAL_REPORT_DIR, exist_ok=True)
+
+    file_ids = []
+    for path in (price_path, volume_path):
+        name = os.path.basename(path)
+        shutil.move(path, os.path.join(settings.FESTIVAL_REPORT_DIR, name))
+        file_ids.append(name)
+
+    return tuple(file_ids)
+
+
+def item_rows(rows, product_ids, source_ids):
+    """ rows (product_id, source_id, date, avg_price, volume) of an item, any source when it has none """
+    product_ids = set(product_ids)
+    source_ids = set(source_ids)
+    return [row for row in rows if row[0] in product_ids and (not source_ids or row[1] in source_ids)]
+
+
+def summarize(rows):
+    """ (volume-weighted average price, total volume) of rows, plain mean when no volume is known """
+    if not rows:
+        return None, None
+
+    weighted = [(row[3], row[4]) for row in rows if row[4]]
+    volume = sum(v for _, v in weighted)
+    price = sum(p * v for p, v in weighted) / volume if volume else sum(row[3] for row in rows) / len(rows)
+
+    return price, volume or None
+
+
+def compute_table(job):
+    """ [(item name, [price per year], [volume per year])] of a festival job """
+    table = []
+    for name, product_ids, source_ids in job['items']:
+        rows = item_rows(job['rows'], product_ids, source_ids)
+
+        prices, volumes = [], []
+        for _, start, end in job['windows']:
+            price, volume = summarize([row for row in rows if start <= row[2] <= end])
+            prices.append(price)
+            volumes.append(volume)
+
+        table.append((name, prices, volumes))
+
+    return table
+
+
+def change(current, previous):
+    if current is None or not previous:
+        return None
+    return round((current - previous) / previous * 100, 2)
+
+
+def write_workbook(path, title, years, values):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = title[:31]
+
+    header = ['品項'] + [str(year - 1911) for year in years]
+    if len(years) > 1:
+        header.append('增減(%)')
+    sheet.append(header)
+
+    for name, row in values:
+        line = [name] + [round(value, 2) if value is not None else None for value in row]
+        if len(years) > 1:
+            line.append(change(row[-1], row[-2]))
+        sheet.append(line)
+
+    workbook.save(path)
+
+
+def render_festival(job):
+    """ process pool worker: write the price and volume workbooks of a festival job, return their paths """
+    table = compute_table(job)
+    years = [year for year, _, _ in job['windows']]
+    prefix = os.path.join(job['output_dir'], f"festival_{job['roc_year']}_{job['festival_id']}")
+
+    price_path = f'{prefix}_price.xlsx'
+    volume_path = f'{prefix}_volume.xlsx'
+    write_workbook(price_path, job['title'], years, [(name, prices) for name, prices, _ in table])
+    write_workbook(volume_path, job['title'], years, [(name, volumes) for name, _, volumes in table])
+
+    return job['festival_id'], price_path, volume_path
+
+
+class FestivalReportBuilder:
+    def __init__(self, workers=None, days_before=DAYS_BEFORE, compare_years=COMPARE_YEARS, uploader=None):
+        self.workers = workers
+        self.days_before = days_before
+        self.compare_years = compare_years
+        self.uploader = uploader or local_uploader
+
+    def festivals(self, roc_years=None):
+        festivals = Festival.objects.filter(enable=True, name__enable=True).select_related('name')
+        if roc_years:
+            festivals = festivals.filter(roc_year__in=[str(year) for year in roc_years])
+        return list(festivals)
+
+    def items_by_festival_name(self, festival_names):
+        """ {festival name id: [(item name, product ids, source ids)]}, with 3 queries for all festivals """
+        items = FestivalItems.objects.filter(
+            enable=True, festival_name__in=festival_names
+        ).prefetch_related('festival_name', 'product_id', 'source').distinct()
+
+        result = defaultdict(list)
+        for item in sorted(items, key=lambda i: (i.order_sn, i.id)):
+            entry = (
+                item.name,
+                [product.id for product in item.product_id.all()],
+                [source.id for source in item.source.all()],
+            )
+            for festival_name in item.festival_name.all():
+                result[festival_name.id].append(entry)
+
+        return result
+
+    def windows(self, festival):
+        """ [(year, first day, last day)] of the days before festival, oldest year first """
+        name = festival.name
+        year = int(festival.roc_year) + 1911
+
+        windows = []
+        for y in range(year - self.compare_years, year + 1):
+            date = lunar_calendar.to_gregorian(y, name.lunar_month, name.lunar_day)
+            windows.append((y, date - datetime.timedelta(days=self.days_before), date - datetime.timedelta(days=1)))
+
+        return windows
+
+    def job(self, festival, items, output_dir):
+        windows = self.windows(festival)
+        product_ids = {product_id for _, product_ids, _ in items for product_id in product_ids}
+
+        rows = []
+        if product_ids:
+            rows = list(DailyTran.objects.filter(
+                reduce(or_, [Q(date__range=(start, end)) for _, start, end in windows]),
+                product_id__in=product_ids,
+            ).values_list('product_id', 'source_id', 'date', 'avg_price', 'volume'))
+
+        return {
+            'festival_id': festival.id,
+            'roc_year': festival.roc_year,
+            'title': str(festival.name),
+            'windows': windows,
+            'items': items,
+            'rows': rows,
+            'output_dir': output_dir,
+        }
+
+    def build(self, roc_years=None):
+        """ build and upload the reports of every enabled festival, return the saved FestivalReport """
+        festivals = self.festivals(roc_years)
+        if not festivals:
+            return []
+
+        festival_map = {festival.id: festival for festival in festivals}
+        items = self.items_by_festival_name({festival.name_id for festival in festivals})
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            jobs = [self.job(festival, items[festival.name_id], output_dir) for festival in festivals]
+
+            # workers=0 renders in this process, e.g. for tests
+            if self.workers == 0:
+                results = [render_festival(job) for job in jobs]
+            else:
+                with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                    results = list(executor.map(render_festival, jobs))
+
+            reports = []
+            for festival_id, price_path, volume_path in results:
+                festival = festival_map[festival_id]
+                file_id, file_volume_id = self.uploader(festival, price_path, volume_path)
+                report, _ = FestivalReport.objects.update_or_create(
+                    festival_id=festival,
+                    defaults={'file_id': file_id, 'file_volume_id': file_volume_id},
+                )
+                reports.append(report)
+
+        return reports
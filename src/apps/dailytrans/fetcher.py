@@ -0,0 +1,253 @@
+"""
+Concurrent fetcher of the DAILYTRAN_BUILDER_API open data endpoints.
+
+OpenDataFetcher splits a date range into ranges of `days` days and pages
+through each of them ($top/$skip) concurrently on an asyncio loop. The
+requests themselves run in a thread pool sharing one pooled
+requests.Session, keep-alive connections are reused across pages and a
+semaphore per host bounds the requests in flight to each upstream.
+
+Failed requests (connection errors, timeouts, 429 and 5xx) are retried
+with exponential backoff. Every page is parsed and handed to
+ingest(api, start, end, records) as soon as it arrives, so the records
+stream into the ingest pipeline (e.g. a builder calling
+DailyTran.objects.bulk_upsert) while the next pages are downloading.
+
+ingest, unchanged and the CrawlState queries never run on the loop
+thread, where they would stall every download in flight, but one at a
+time on a single database thread with its own connection (closed when
+the run ends). They are therefore not part of a transaction of the caller.
+
+With use_state, every day is fetched on its own and checked against its
+CrawlState: the first page is requested with the stored ETag and
+Last-Modified, and the records of the day are hashed once downloaded. A
+not modified answer or an unchanged hash skips the ingest of that day and
+calls unchanged(api, date) instead, e.g. to count DailyTran.not_updated
+with DailyTranQuerySet.mark_not_updated(). The pages of a day are only
+handed to ingest once the whole day is downloaded.
+
+e.g.
+    fetcher = OpenDataFetcher(host_concurrency=4)
+    stats = fetcher.run('eir030', datetime.date(2023, 1, 1), datetime.date(2023, 12, 31), ingest=build_rows)
+
+    fetcher = OpenDataFetcher(use_state=True)
+    fetcher.run('eir030', start, end, ingest=build_rows,
+                unchanged=lambda api, date: DailyTran.objects.filter(product__config=config).mark_not_updated(date))
+
+Only the JSON endpoints apply, the naif feeds are scraped behind a login.
+"""
+import asyncio
+import datetime
+import hashlib
+import json
+import logging
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import urlparse
+
+import requests
+from django.conf import settings
+from django.db import connections
+from requests.adapters import HTTPAdapter
+
+from apps.dailytrans.models import CrawlState
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 1000
+RANGE_DAYS = 7
+HOST_CONCURRENCY = 4
+RETRIES = 3
+BACKOFF = 1.0
+TIMEOUT = 30
+
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+FetchStats = namedtuple('FetchStats', ['ranges', 'pages', 'records', 'skipped', 'retries', 'seconds'])
+
+Page = namedtuple('Page', ['records', 'not_modified', 'etag', 'last_modified'])
+
+
+class FetchError(Exception):
+    pass
+
+
+def roc_date(date):
+    """ date as used by the MOA open data, e.g. 112.01.31 """
+    return f'{date.year - 1911}.{date:%m.%d}'
+
+
+def date_ranges(start_date, end_date, days=RANGE_DAYS):
+    """ [(first, last)] ranges of days days covering start_date ~ end_date """
+    ranges = []
+    while start_date <= end_date:
+        last = min(start_date + datetime.timedelta(days=days - 1), end_date)
+        ranges.append((start_date, last))
+        start_date = last + datetime.timedelta(days=1)
+    return ranges
+
+
+def records_hash(pages):
+    """ sha256 of the records of pages, independent of the key order of each record """
+    digest = hashlib.sha256()
+    for records in pages:
+        for record in records:
+            digest.update(json.dumps(record, ensure_ascii=False, sort_keys=True).encode('utf-8'))
+            digest.update(b'\n')
+    return digest.hexdigest()
+
+
+class OpenDataFetcher:
+    def __init__(self, host_concurrency=HOST_CONCURRENCY, page_size=PAGE_SIZE, range_days=RANGE_DAYS,
+                 retries=RETRIES, backoff=BACKOFF, timeout=TIMEOUT, session=None, use_state=False):
+        self.host_concurrency = host_concurrency
+        self.page_size = page_size
+        # CrawlState is kept per day
+        self.range_days = 1 if use_state else range_days
+        self.use_state = use_state
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.session = session or self.create_session()
+        self.semaphores = {}
+        self.retried = 0
+
+    def create_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.host_concurrency)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        if getattr(settings, 'USER_AGENT', None):
+            session.headers['User-Agent'] = settings.USER_AGENT
+        return session
+
+    def url(self, api):
+        url = settings.DAILYTRAN_BUILDER_API.get(api)
+        if not url:
+            raise FetchError(f'No DAILYTRAN_BUILDER_API url for {api}')
+        return url
+
+    def range_params(self, api, start, end):
+        """ query parameters selecting start ~ end, override for endpoints named otherwise """
+        return {'StartDate': roc_date(start), 'EndDate': roc_date(end)}
+
+    def semaphore(self, url):
+        host = urlparse(url).netloc
+        if host not in self.semaphores:
+            self.semaphores[host] = asyncio.Semaphore(self.host_concurrency)
+        return self.semaphores[host]
+
+    def get(self, url, params, headers=None):
+        """ blocking request run in the executor, the parsed Page """
+        response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+        if response.status_code in RETRY_STATUS:
+            raise requests.ConnectionError(f'{response.status_code} from {response.url}')
+
+        etag, last_modified = response.headers.get('ETag'), response.headers.get('Last-Modified')
+        if response.status_code == 304:
+            return Page([], True, etag, last_modified)
+
+        response.raise_for_status()
+        records = response.json() if response.content.strip() else []
+        return Page(records, False, etag, last_modified)
+
+    async def get_page(self, loop, executor, url, params, headers=None):
+        for attempt in range(self.retries + 1):
+            async with self.semaphore(url):
+                try:
+                    return await loop.run_in_executor(executor, partial(self.get, url, params, headers))
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    if attempt == self.retries:
+                        raise FetchError(f'{url} {params}: {e}') from e
+                    logger.warning(f'Retry {url} {params} after: {e}')
+
+            self.retried += 1
+            await asyncio.sleep(self.backoff * 2 ** attempt)
+
+    async def fetch_range(self, loop, executor, db_executor, api, start, end, ingest, unchanged=None):
+        """ page through start ~ end, return (pages, records, skipped) """
+        def db(func, *args, **kwargs):
+            return loop.run_in_executor(db_executor, partial(func, *args, **kwargs))
+
+        url = self.url(api)
+        headers = await db(CrawlState.objects.conditional_headers, api, start) if self.use_state else None
+        pages = []
+        records = 0
+
+        while True:
+            params = dict(self.range_params(api, start, end), **{'$top': self.page_size, '$skip': records})
+            # validators only apply to the first page
+            page = await self.get_page(loop, executor, url, params, headers=None if pages else headers)
+
+            if page.not_modified:
+                await db(self.skip, api, start, unchanged)
+                return 1, 0, True
+
+            pages.append(page)
+            records += len(page.records)
+
+            if page.records and not self.use_state:
+                await db(ingest, api, start, end, page.records)
+            if len(page.records) < self.page_size:
+                break
+
+        if not self.use_state:
+            return len(pages), records, False
+
+        content_hash = records_hash(page.records for page in pages)
+        if await db(CrawlState.objects.is_unchanged, api, start, content_hash):
+            await db(self.skip, api, start, unchanged)
+            return len(pages), records, True
+
+        for page in pages:
+            if page.records:
+                await db(ingest, api, start, end, page.records)
+
+        await db(
+            CrawlState.objects.record,
+            api, start, content_hash, etag=pages[0].etag, last_modified=pages[0].last_modified, row_count=records
+        )
+        return len(pages), records, False
+
+    def skip(self, api, date, unchanged):
+        CrawlState.objects.record(api, date)
+        if unchanged:
+            unchanged(api, date)
+
+    async def fetch(self, api, start_date, end_date, ingest, unchanged=None):
+        """ [(pages, records, skipped)] of every range of start_date ~ end_date """
+        loop = asyncio.get_event_loop()
+        ranges = date_ranges(start_date, end_date, days=self.range_days)
+
+        with ThreadPoolExecutor(max_workers=self.host_concurrency) as executor, \
+                ThreadPoolExecutor(max_workers=1) as db_executor:
+            try:
+                return await asyncio.gather(*[
+                    self.fetch_range(loop, executor, db_executor, api, start, end, ingest, unchanged)
+                    for start, end in ranges
+                ])
+            finally:
+                await loop.run_in_executor(db_executor, connections.close_all)
+
+    def run(self, api, start_date, end_date, ingest, unchanged=None):
+        """ fetch start_date ~ end_date of api on a new event loop, return FetchStats """
+        self.semaphores = {}
+        self.retried = 0
+        started = time.monotonic()
+
+        loop = asyncio.new_event_loop()
+        try:
+            results = loop.run_until_complete(self.fetch(api, start_date, end_date, ingest, unchanged))
+        finally:
+            loop.close()
+
+        return FetchStats(
+            ranges=len(results),
+            pages=sum(pages for pages, _, _ in results),
+            records=sum(records for _, records, _ in results),
+            skipped=sum(skipped for _, _, skipped in results),
+            retries=self.retried,
+            seconds=time.monotonic() - started,
+        )
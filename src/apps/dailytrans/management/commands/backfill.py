@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from apps.dailytrans.backfill import SHARD_DAYS, Backfill, ingester
+from apps.dailytrans.fetcher import HOST_CONCURRENCY
+
+
+class Command(BaseCommand):
+    help = 'Rebuild DailyTran history of a feed in parallel date range shards, resuming unfinished shards'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--feed', required=True, help='DAILYTRAN_BUILDER_API key, e.g. eir030')
+        parser.add_argument('--since', type=parse_date, help='First date, YYYY-MM-DD, 2011-01-01 by default')
+        parser.add_argument('--until', type=parse_date, help='Last date, YYYY-MM-DD, today by default')
+        parser.add_argument('--workers', type=int, help='Worker processes, 0 runs in this process')
+        parser.add_argument('--shard-days', type=int, default=SHARD_DAYS)
+        parser.add_argument('--host-concurrency', type=int, default=HOST_CONCURRENCY,
+                            help='Requests in flight per worker')
+        parser.add_argument('--restart', action='store_true', help='Drop the checkpoints of the range first')
+        parser.add_argument('--celery', action='store_true', help='Dispatch the shards as a Celery chord and exit')
+
+    def handle(self, *args, **options):
+        try:
+            ingester(options['feed'])
+        except (KeyError, ImportError) as e:
+            raise CommandError(e)
+
+        backfill = Backfill(
+            options['feed'],
+            since=options['since'],
+            until=options['until'],
+            workers=options['workers'],
+            shard_days=options['shard_days'],
+            host_concurrency=options['host_concurrency'],
+        )
+
+        if options['restart']:
+            self.stdout.write(f'{backfill.reset()} checkpoints dropped')
+
+        if options['celery']:
+            result = backfill.dispatch()
+            self.stdout.write(f'{len(backfill.shards())} shards dispatched, FinishBackfill task {result.id}')
+            return
+
+        result = backfill.run()
+
+        self.stdout.write(f'{result.shards} shards, {result.resumed} resumed from checkpoints')
+        self.stdout.write(f'{result.rows} rows in {result.seconds:.1f}s, {result.rows_per_second:.1f} rows/sec')
+        for name, value in result.finish.items():
+            self.stdout.write(f'{name}: {value}')
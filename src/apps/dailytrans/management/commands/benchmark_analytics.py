@@ -0,0 +1,70 @@
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+
+from apps.dailytrans.analytics import load_series
+from apps.dailytrans.models import DailyTran
+
+
+def instance_loop(queryset, years):
+    """ the per-instance way: month_day statistics of the last years with Python loops """
+    trans = list(queryset.order_by('date'))
+    if not trans:
+        return {}
+
+    end_year = max(tran.date.year for tran in trans)
+    groups = defaultdict(list)
+    for tran in trans:
+        if end_year - years < tran.date.year <= end_year:
+            groups[tran.month_day].append(tran)
+
+    stats = {}
+    for month_day, items in groups.items():
+        prices = [tran.avg_price for tran in items]
+        volume = sum(tran.volume for tran in items if tran.volume)
+        stats[month_day] = {
+            'mean': sum(prices) / len(prices),
+            'min': min(prices),
+            'max': max(prices),
+            'weighted_avg': sum(tran.avg_price * tran.volume for tran in items if tran.volume) / volume
+            if volume else sum(prices) / len(prices),
+        }
+    return stats
+
+
+def vectorized(queryset, years):
+    return load_series(queryset=queryset).month_day_stats(years=years)
+
+
+class Command(BaseCommand):
+    help = 'Compare month_day statistics computed by a model instance loop and by NumPy'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--product', type=int, action='append', help='AbstractProduct id, repeatable')
+        parser.add_argument('--source', type=int, action='append', help='Source id, repeatable')
+        parser.add_argument('--years', type=int, default=5)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        queryset = DailyTran.objects.all()
+        if options['product']:
+            queryset = queryset.filter(product_id__in=options['product'])
+        if options['source']:
+            queryset = queryset.filter(source_id__in=options['source'])
+
+        self.stdout.write(f'{queryset.count()} rows')
+
+        timings = {}
+        for name, func in (('instance loop', instance_loop), ('numpy', vectorized)):
+            best = None
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                func(queryset, options['years'])
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            timings[name] = best
+            self.stdout.write(f'{name}: {best:.4f}s')
+
+        if timings['numpy']:
+            self.stdout.write(f'speedup: {timings["instance loop"] / timings["numpy"]:.1f}x')
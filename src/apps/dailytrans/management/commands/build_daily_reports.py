@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.utils.dateparse import parse_date
+
+from apps.dailytrans.daily_report import DailyReportPipeline
+
+
+class Command(BaseCommand):
+    help = 'Regenerate the daily reports whose DailyTran changed since the last generation'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', type=parse_date, action='append', help='Only this date, repeatable')
+        parser.add_argument('--full', action='store_true', help='Regenerate every date with DailyTran')
+
+    def handle(self, *args, **options):
+        generated, uploaded = DailyReportPipeline().run(dates=options['date'], full=options['full'])
+
+        self.stdout.write(f'{generated} daily reports generated, {uploaded} uploaded')
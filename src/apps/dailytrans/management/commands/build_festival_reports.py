@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from apps.dailytrans.festival import COMPARE_YEARS, DAYS_BEFORE, FestivalReportBuilder
+
+
+class Command(BaseCommand):
+    help = 'Build the price and volume reports of every enabled festival'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--roc-year', action='append', help='Only festivals of this ROC year, repeatable')
+        parser.add_argument('--workers', type=int, default=None, help='Processes, 0 to render in this process')
+        parser.add_argument('--days-before', type=int, default=DAYS_BEFORE)
+        parser.add_argument('--compare-years', type=int, default=COMPARE_YEARS)
+
+    def handle(self, *args, **options):
+        builder = FestivalReportBuilder(
+            workers=options['workers'],
+            days_before=options['days_before'],
+            compare_years=options['compare_years'],
+        )
+        reports = builder.build(roc_years=options['roc_year'])
+
+        for report in reports:
+            self.stdout.write(str(report))
+        self.stdout.write(f'{len(reports)} festival reports built')
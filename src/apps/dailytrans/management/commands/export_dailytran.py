@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from apps.configs.models import AbstractProduct
+from apps.dailytrans.export import CHUNK_SIZE, FORMATS, export_queryset, iter_chunks
+from apps.watchlists.models import Watchlist
+
+
+class Command(BaseCommand):
+    help = 'Stream DailyTran of a product or watchlist as csv or columnar json'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--product', type=int, help='AbstractProduct id, descendants included')
+        parser.add_argument('--watchlist', type=int, help='Watchlist id')
+        parser.add_argument('--start', type=parse_date, help='First date, YYYY-MM-DD')
+        parser.add_argument('--end', type=parse_date, help='Last date, YYYY-MM-DD')
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument('--output', help='File path, stdout by default')
+
+    def handle(self, *args, **options):
+        try:
+            product = AbstractProduct.objects.get(id=options['product']) if options['product'] else None
+            watchlist = Watchlist.objects.get(id=options['watchlist']) if options['watchlist'] else None
+        except (AbstractProduct.DoesNotExist, Watchlist.DoesNotExist) as e:
+            raise CommandError(e)
+
+        queryset = export_queryset(
+            product=product,
+            watchlist=watchlist,
+            start_date=options['start'],
+            end_date=options['end'],
+        )
+        serialize = FORMATS[options['format']][0]
+        chunks = serialize(iter_chunks(queryset, chunk_size=options['chunk_size']))
+
+        if not options['output']:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+
+        with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+            for chunk in chunks:
+                output.write(chunk)
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from apps.dailytrans.models import DailyTran
+from apps.dailytrans.utils import merge_duplicates
+
+
+class Command(BaseCommand):
+    help = 'Merge DailyTran rows sharing the same (product, source, date)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report the duplicated groups')
+
+    def handle(self, *args, **options):
+        groups, deleted = merge_duplicates(DailyTran.objects.all(), dry_run=options['dry_run'])
+
+        action = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(f'{groups} duplicated groups found, {action} {deleted} rows')
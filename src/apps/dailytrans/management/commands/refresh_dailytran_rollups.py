@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from apps.dailytrans.models import DailyTranRollup
+
+
+class Command(BaseCommand):
+    help = 'Recompute DailyTran week/month/year rollups touched since the last run'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Recompute every period')
+
+    def handle(self, *args, **options):
+        result = DailyTranRollup.objects.refresh_all(full=options['full'])
+
+        for grain, written in result.items():
+            self.stdout.write(f'{grain}: {written} rows written')
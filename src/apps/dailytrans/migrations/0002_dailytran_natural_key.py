@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.13 on 2026-10-18 15:02
+from __future__ import unicode_literals
+
+from django.db import migrations
+from django.db.models import Count
+
+MERGE_FIELDS = ('up_price', 'mid_price', 'low_price', 'avg_price', 'avg_weight', 'volume')
+
+NULL_SOURCE_INDEX = 'dailytrans_dailytran_product_id_date_null_source_uniq'
+
+
+def merge_duplicates(apps, schema_editor):
+    """
+    Frozen copy of apps.dailytrans.utils.merge_duplicates at the time of this migration:
+    keep the most recently updated row of each (product, source, date), fill its empty
+    values from the other rows (newest first) and delete them.
+    """
+    DailyTran = apps.get_model('dailytrans', 'DailyTran')
+
+    groups = DailyTran.objects.order_by().values('product_id', 'source_id', 'date').annotate(
+        count=Count('id')
+    ).filter(count__gt=1)
+
+    for group in list(groups):
+        rows = sorted(
+            DailyTran.objects.filter(product_id=group['product_id'], source_id=group['source_id'], date=group['date']),
+            key=lambda row: (row.update_time is not None, row.update_time, row.id),
+            reverse=True,
+        )
+        keep, others = rows[0], rows[1:]
+
+        values = {}
+        for field in MERGE_FIELDS:
+            if getattr(keep, field) is None:
+                value = next((getattr(row, field) for row in others if getattr(row, field) is not None), None)
+                if value is not None:
+                    values[field] = value
+
+        DailyTran.objects.filter(id__in=[row.id for row in others]).delete()
+        if values:
+            # update() keeps update_time of the kept row, auto_now only applies on save()
+            DailyTran.objects.filter(id=keep.id).update(**values)
+
+
+def create_null_source_index(apps, schema_editor):
+    """ (product, date) is unique among the rows without source, needs a PostgreSQL partial index """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute(
+        f'CREATE UNIQUE INDEX "{NULL_SOURCE_INDEX}" '
+        f'ON "dailytrans_dailytran" ("product_id", "date") WHERE "source_id" IS NULL'
+    )
+
+
+def drop_null_source_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute(f'DROP INDEX IF EXISTS "{NULL_SOURCE_INDEX}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dailytrans', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='dailytran',
+            unique_together=set([('product', 'source', 'date')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='dailytran',
+            index_together=set([('date', 'product')]),
+        ),
+        migrations.RunPython(create_null_source_index, drop_null_source_index),
+    ]
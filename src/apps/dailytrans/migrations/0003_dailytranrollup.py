@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.13 on 2026-10-18 08:08
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('configs', '0012_source_trgm_indexes'),
+        ('dailytrans', '0002_dailytran_natural_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyTranRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('grain', models.CharField(choices=[('week', 'Week'), ('month', 'Month'), ('year', 'Year')], max_length=5, verbose_name='Grain')),
+                ('period_start', models.DateField(verbose_name='Period Start')),
+                ('avg_price', models.FloatField(verbose_name='Average Price')),
+                ('volume', models.FloatField(blank=True, null=True, verbose_name='Volume')),
+                ('avg_weight', models.FloatField(blank=True, null=True, verbose_name='Average Weight')),
+                ('days', models.IntegerField(default=0, verbose_name='Days')),
+                ('last_tran_update', models.DateTimeField(blank=True, null=True, verbose_name='Last Transition Update')),
+                ('update_time', models.DateTimeField(auto_now=True, null=True, verbose_name='Updated')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='configs.AbstractProduct', verbose_name='Product')),
+                ('source', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='configs.Source', verbose_name='Source')),
+                ('type', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='configs.Type', verbose_name='Type')),
+            ],
+            options={
+                'verbose_name': 'Daily Transition Rollup',
+                'verbose_name_plural': 'Daily Transition Rollups',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='dailytranrollup',
+            unique_together=set([('grain', 'product', 'source', 'period_start')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='dailytranrollup',
+            index_together=set([('grain', 'product', 'period_start')]),
+        ),
+    ]
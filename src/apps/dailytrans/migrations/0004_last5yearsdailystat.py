@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.13 on 2026-10-18 08:12
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('configs', '0012_source_trgm_indexes'),
+        ('dailytrans', '0003_dailytranrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Last5YearsDailyStat',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('year', models.IntegerField(verbose_name='Year')),
+                ('month_day', models.IntegerField(verbose_name='Month Day')),
+                ('mean', models.FloatField(verbose_name='Mean')),
+                ('min', models.FloatField(verbose_name='Min')),
+                ('max', models.FloatField(verbose_name='Max')),
+                ('weighted_avg', models.FloatField(verbose_name='Weighted Average')),
+                ('volume', models.FloatField(blank=True, null=True, verbose_name='Volume')),
+                ('count', models.IntegerField(default=0, verbose_name='Count')),
+                ('last_tran_update', models.DateTimeField(blank=True, null=True, verbose_name='Last Transition Update')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='configs.Last5YearsItems', verbose_name='Last5YearsItems')),
+            ],
+            options={
+                'verbose_name': 'Last5YearsDailyStat',
+                'verbose_name_plural': 'Last5YearsDailyStats',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='last5yearsdailystat',
+            unique_together=set([('item', 'date')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='last5yearsdailystat',
+            index_together=set([('item', 'month_day')]),
+        ),
+    ]
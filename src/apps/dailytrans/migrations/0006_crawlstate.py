@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.13 on 2026-10-18 08:30
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dailytrans', '0005_dailyreport_content_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CrawlState',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('feed', models.CharField(max_length=50, verbose_name='Feed')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('response_hash', models.CharField(max_length=64, verbose_name='Response Hash')),
+                ('etag', models.CharField(blank=True, max_length=255, null=True, verbose_name='ETag')),
+                ('last_modified', models.CharField(blank=True, max_length=64, null=True, verbose_name='Last Modified')),
+                ('row_count', models.IntegerField(default=0, verbose_name='Row Count')),
+                ('last_success', models.DateTimeField(blank=True, null=True, verbose_name='Last Success')),
+                ('update_time', models.DateTimeField(auto_now=True, null=True, verbose_name='Updated')),
+            ],
+            options={
+                'verbose_name': 'Crawl State',
+                'verbose_name_plural': 'Crawl States',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='crawlstate',
+            unique_together=set([('feed', 'date')]),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.13 on 2026-10-18 08:32
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dailytrans', '0006_crawlstate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackfillShard',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('feed', models.CharField(max_length=50, verbose_name='Feed')),
+                ('start_date', models.DateField(verbose_name='Start Date')),
+                ('end_date', models.DateField(verbose_name='End Date')),
+                ('rows', models.IntegerField(default=0, verbose_name='Rows')),
+                ('seconds', models.FloatField(blank=True, null=True, verbose_name='Seconds')),
+                ('finish_time', models.DateTimeField(blank=True, null=True, verbose_name='Finish Time')),
+                ('update_time', models.DateTimeField(auto_now=True, null=True, verbose_name='Updated')),
+            ],
+            options={
+                'verbose_name': 'Backfill Shard',
+                'verbose_name_plural': 'Backfill Shards',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='backfillshard',
+            unique_together=set([('feed', 'start_date', 'end_date')]),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.13 on 2026-10-18 08:46
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dailytrans', '0007_backfillshard'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyReportWatermark',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_tran_update', models.DateTimeField(blank=True, null=True, verbose_name='Last Transition Update')),
+                ('update_time', models.DateTimeField(auto_now=True, null=True, verbose_name='Updated')),
+            ],
+            options={
+                'verbose_name': 'Daily Report Watermark',
+                'verbose_name_plural': 'Daily Report Watermarks',
+            },
+        ),
+    ]
@@ -1,9 +1,20 @@
 from django.utils import timezone
+import calendar
 import datetime
-from dateutil import rrule
+from functools import reduce
+from operator import or_
+
+from django.db import connection, transaction
 from django.db.models import (
+    Avg,
+    Count,
+    F,
+    Max,
+    Min,
     Model,
+    Sum,
     CASCADE,
+    SET_NULL,
     DateTimeField,
     DateField,
     ForeignKey,
@@ -11,27 +22,75 @@ from django.db.models import (
     QuerySet,
     IntegerField,
     CharField,
+    Q,
 )
 from django.utils.translation import ugettext_lazy as _
 
 
+# the first year of transaction data
+FIRST_YEAR = 2011
+
+
+def month_day_of_year(year, month, day, start=False):
+    """ date of month/day in year, Feb 29 becomes Mar 1 (start) or Feb 28 in common years """
+    if month == 2 and day == 29 and not calendar.isleap(year):
+        return datetime.date(year, 3, 1) if start else datetime.date(year, 2, 28)
+
+    return datetime.date(year, month, day)
+
+
+def month_day_ranges(start_date, end_date, first_year=FIRST_YEAR):
+    """ (start, end) of the month/day window of start_date ~ end_date in every year since first_year """
+    ranges = []
+    for i in range(start_date.year - first_year + 1):
+        start = month_day_of_year(start_date.year - i, start_date.month, start_date.day, start=True)
+        end = month_day_of_year(end_date.year - i, end_date.month, end_date.day)
+        if start <= end:
+            ranges.append((start, end))
+    return ranges
+
+
 class DailyTranQuerySet(QuerySet):
     def update(self, *args, **kwargs):
         kwargs['update_time'] = timezone.now()
-        super(DailyTranQuerySet, self).update(*args, **kwargs)
+        return super(DailyTranQuerySet, self).update(*args, **kwargs)
+
+    def bulk_upsert(self, rows, batch_size=5000):
+        """
+        Insert or update rows (dicts of field values, e.g. {'product': product,
+        'source': source, 'date': date, 'avg_price': 30.5, ...}) on
+        (product, source, date), see apps.dailytrans.utils.bulk_upsert.
+        """
+        from apps.dailytrans.utils import bulk_upsert
+
+        return bulk_upsert(self.model, rows, batch_size=batch_size)
+
+    def mark_not_updated(self, date):
+        """
+        Count one more unchanged crawl for the rows of date without comparing
+        them, used when CrawlState tells the upstream day did not change.
+        """
+        # bypass update() to keep update_time, as bulk_upsert does for unchanged rows
+        return self.model._base_manager.filter(
+            id__in=self.filter(date=date).values('id')
+        ).update(not_updated=F('not_updated') + 1)
 
     def between_month_day_filter(self, start_date: datetime.date = None, end_date: datetime.date = None):
+        """
+        Rows between the month/day of start_date and end_date of every year
+        since FIRST_YEAR, e.g. 12/20 ~ 01/10 of 2011-2012, ..., 2023-2024.
+
+        Emits one date range per year instead of listing every day, Feb 29
+        falls back to Mar 1 as start and Feb 28 as end in common years.
+        """
         if not start_date or not end_date:
             return self
-        date_ranges = []
-        start_year = start_date.year
-        end_year = end_date.year
-        for i in range(start_year - 2011 + 1):
-            start_date = datetime.date(start_year - i, start_date.month, start_date.day)
-            end_date = datetime.date(end_year - i, end_date.month, end_date.day)
-            date_range = list(rrule.rrule(rrule.DAILY, dtstart=start_date, until=end_date))
-            date_ranges.extend(date_range)
-        return self.filter(date__in=date_ranges)
+
+        ranges = month_day_ranges(start_date, end_date)
+        if not ranges:
+            return self.none()
+
+        return self.filter(reduce(or_, [Q(date__range=date_range) for date_range in ranges]))
 
 
 class DailyTran(Model):
@@ -53,6 +112,10 @@ class DailyTran(Model):
     class Meta:
         verbose_name = _('Daily Transition')
         verbose_name_plural = _('Daily Transitions')
+        # the unique index also serves (product, source, date) lookups,
+        # rows without source are kept unique by a partial index, see migration 0002
+        unique_together = ('product', 'source', 'date')
+        index_together = [('date', 'product')]
 
     def __str__(self):
         return (f''
@@ -79,9 +142,256 @@ class DailyTran(Model):
         return int(self.date.strftime('%m%d'))
 
 
+class DailyTranRollupQuerySet(QuerySet):
+    # rows committed a little after the last refresh may carry an older update_time
+    OVERLAP = datetime.timedelta(minutes=10)
+
+    def watermark(self, grain):
+        """ newest update/create time of the DailyTran rows rolled up at grain """
+        return self.filter(grain=grain).aggregate(watermark=Max('last_tran_update'))['watermark']
+
+    def refresh(self, grain, since=None):
+        """
+        Recompute the periods of grain that have DailyTran rows updated or
+        created after since, or every period when since is None.
+
+        Return the number of rollup rows written.
+        """
+        if grain not in dict(DailyTranRollup.GRAINS):
+            raise ValueError(f'Unknown grain {grain}')
+
+        table = self.model._meta.db_table
+        tran_table = DailyTran._meta.db_table
+        product_table = DailyTran._meta.get_field('product').related_model._meta.db_table
+        period = f"date_trunc('{grain}', d.date)::date"
+        changed = "coalesce(d.update_time, d.create_time, '-infinity') > %s"
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            if since is None:
+                cursor.execute(f'DELETE FROM {table} WHERE grain = %s', [grain])
+                touched = ''
+            else:
+                cursor.execute(
+                    f'CREATE TEMP TABLE {table}_touched ON COMMIT DROP AS '
+                    f'SELECT DISTINCT d.product_id, d.source_id, {period} AS period_start '
+                    f'FROM {tran_table} d WHERE {changed}',
+                    [since]
+                )
+                cursor.execute(
+                    f'DELETE FROM {table} r USING {table}_touched t '
+                    f'WHERE r.grain = %s AND r.product_id = t.product_id '
+                    f'AND r.source_id IS NOT DISTINCT FROM t.source_id AND r.period_start = t.period_start',
+                    [grain]
+                )
+                touched = (
+                    f'JOIN {table}_touched t ON t.product_id = d.product_id '
+                    f'AND t.source_id IS NOT DISTINCT FROM d.source_id AND t.period_start = {period}'
+                )
+
+            cursor.execute(
+                f'INSERT INTO {table} (grain, product_id, source_id, type_id, period_start, '
+                f'avg_price, volume, avg_weight, days, last_tran_update, update_time) '
+                f'SELECT %s, d.product_id, d.source_id, p.type_id, {period}, '
+                f'CASE WHEN sum(d.volume) > 0 '
+                f'THEN sum(d.avg_price * d.volume) / sum(d.volume) ELSE avg(d.avg_price) END, '
+                f'sum(d.volume), avg(d.avg_weight), count(*), '
+                f'max(coalesce(d.update_time, d.create_time)), now() '
+                f'FROM {tran_table} d JOIN {product_table} p ON p.id = d.product_id {touched} '
+                f'GROUP BY d.product_id, d.source_id, p.type_id, {period}',
+                [grain]
+            )
+            written = cursor.rowcount
+
+            if since is not None:
+                cursor.execute(f'DROP TABLE {table}_touched')
+
+        return written
+
+    def refresh_all(self, full=False):
+        """ incremental refresh of every grain since its watermark, return {grain: rows written} """
+        result = {}
+        for grain, label in DailyTranRollup.GRAINS:
+            watermark = None if full else self.watermark(grain)
+            since = watermark - self.OVERLAP if watermark else None
+            result[grain] = self.refresh(grain, since=since)
+        return result
+
+
+class DailyTranRollup(Model):
+    """
+    DailyTran pre-aggregated by week, month or year of each product/source,
+    avg_price is weighted by volume when volume is known.
+    """
+    GRAINS = (
+        ('week', _('Week')),
+        ('month', _('Month')),
+        ('year', _('Year')),
+    )
+
+    grain = CharField(max_length=5, choices=GRAINS, verbose_name=_('Grain'))
+    product = ForeignKey('configs.AbstractProduct', on_delete=CASCADE, verbose_name=_('Product'))
+    source = ForeignKey('configs.Source', null=True, blank=True, on_delete=CASCADE, verbose_name=_('Source'))
+    type = ForeignKey('configs.Type', null=True, blank=True, on_delete=SET_NULL, verbose_name=_('Type'))
+    period_start = DateField(verbose_name=_('Period Start'))
+    avg_price = FloatField(verbose_name=_('Average Price'))
+    volume = FloatField(null=True, blank=True, verbose_name=_('Volume'))
+    avg_weight = FloatField(null=True, blank=True, verbose_name=_('Average Weight'))
+    days = IntegerField(default=0, verbose_name=_('Days'))
+    last_tran_update = DateTimeField(null=True, blank=True, verbose_name=_('Last Transition Update'))
+    update_time = DateTimeField(auto_now=True, null=True, blank=True, verbose_name=_('Updated'))
+
+    objects = DailyTranRollupQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _('Daily Transition Rollup')
+        verbose_name_plural = _('Daily Transition Rollups')
+        unique_together = ('grain', 'product', 'source', 'period_start')
+        index_together = [('grain', 'product', 'period_start')]
+
+    def __str__(self):
+        return f'{self.grain} {self.period_start}, product: {self.product_id}, source: {self.source_id}'
+
+
+class Last5YearsDailyStatQuerySet(QuerySet):
+    YEARS = 5
+    OVERLAP = datetime.timedelta(minutes=10)
+
+    def horizon(self, today=None):
+        """ first date kept: Jan 1 of five years before this year """
+        today = today or datetime.date.today()
+        return datetime.date(today.year - self.YEARS, 1, 1)
+
+    def between_month_day_filter(self, start_date, end_date):
+        """ stats in the month/day window of start_date ~ end_date of this and the last five years """
+        ranges = month_day_ranges(start_date, end_date, first_year=start_date.year - self.YEARS)
+        if not ranges:
+            return self.none()
+
+        return self.filter(reduce(or_, [Q(date__range=date_range) for date_range in ranges]))
+
+    def by_year(self):
+        """
+        one row per item and year: mean_price, min_price, max_price, total_volume
+        and weighted_sum (weighted average * volume)
+        """
+        return self.order_by('item', 'year').values('item', 'year').annotate(
+            mean_price=Avg('mean'),
+            min_price=Min('min'),
+            max_price=Max('max'),
+            total_volume=Sum('volume'),
+            weighted_sum=Sum(F('weighted_avg') * F('volume'), output_field=FloatField()),
+            days=Count('id'),
+        )
+
+    def refresh(self, item, full=False, today=None):
+        """
+        Recompute the stats of item for the dates having DailyTran updated or
+        created since the item's watermark (every date when full or new).
+
+        Return the number of dates written.
+        """
+        horizon = self.horizon(today)
+        product_ids = list(item.product_id.values_list('id', flat=True))
+        source_ids = list(item.source.values_list('id', flat=True))
+
+        stats = self.filter(item=item)
+        watermark = None if full else stats.aggregate(watermark=Max('last_tran_update'))['watermark']
+
+        trans = DailyTran.objects.filter(product_id__in=product_ids, date__gte=horizon)
+        if source_ids:
+            trans = trans.filter(source_id__in=source_ids)
+
+        if watermark is not None:
+            dates = list(trans.filter(
+                Q(update_time__gt=watermark - self.OVERLAP) |
+                Q(update_time__isnull=True, create_time__gt=watermark - self.OVERLAP)
+            ).order_by().values_list('date', flat=True).distinct())
+            if not dates:
+                return 0
+            stats = stats.filter(date__in=dates)
+            trans = trans.filter(date__in=dates)
+
+        rows = trans.order_by().values('date').annotate(
+            mean=Avg('avg_price'),
+            min=Min('avg_price'),
+            max=Max('avg_price'),
+            total_volume=Sum('volume'),
+            weighted=Sum(F('avg_price') * F('volume'), output_field=FloatField()),
+            count=Count('id'),
+            last_update=Max('update_time'),
+            last_create=Max('create_time'),
+        )
+
+        stats_to_create = [
+            self.model(
+                item=item,
+                date=row['date'],
+                year=row['date'].year,
+                month_day=int(row['date'].strftime('%m%d')),
+                mean=row['mean'],
+                min=row['min'],
+                max=row['max'],
+                weighted_avg=row['weighted'] / row['total_volume'] if row['total_volume'] else row['mean'],
+                volume=row['total_volume'],
+                count=row['count'],
+                last_tran_update=row['last_update'] or row['last_create'],
+            )
+            for row in rows
+        ]
+
+        with transaction.atomic():
+            stats.delete()
+            self.bulk_create(stats_to_create)
+
+        return len(stats_to_create)
+
+    def refresh_all(self, full=False, today=None):
+        """ refresh every enabled item and drop the stats older than the horizon, return {item id: dates} """
+        from apps.configs.models import Last5YearsItems
+
+        self.filter(date__lt=self.horizon(today)).delete()
+
+        return {
+            item.id: self.refresh(item, full=full, today=today)
+            for item in Last5YearsItems.objects.filter(enable=True).order_by('id')
+        }
+
+
+class Last5YearsDailyStat(Model):
+    """
+    Daily price statistics of the products/sources of a Last5YearsItems for
+    this and the last five years, read by month/day windows instead of
+    running between_month_day_filter on DailyTran.
+    """
+    item = ForeignKey('configs.Last5YearsItems', on_delete=CASCADE, verbose_name=_('Last5YearsItems'))
+    date = DateField(verbose_name=_('Date'))
+    year = IntegerField(verbose_name=_('Year'))
+    month_day = IntegerField(verbose_name=_('Month Day'))
+    mean = FloatField(verbose_name=_('Mean'))
+    min = FloatField(verbose_name=_('Min'))
+    max = FloatField(verbose_name=_('Max'))
+    weighted_avg = FloatField(verbose_name=_('Weighted Average'))
+    volume = FloatField(null=True, blank=True, verbose_name=_('Volume'))
+    count = IntegerField(default=0, verbose_name=_('Count'))
+    last_tran_update = DateTimeField(null=True, blank=True, verbose_name=_('Last Transition Update'))
+
+    objects = Last5YearsDailyStatQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _('Last5YearsDailyStat')
+        verbose_name_plural = _('Last5YearsDailyStats')
+        unique_together = ('item', 'date')
+        index_together = [('item', 'month_day')]
+
+    def __str__(self):
+        return f'{self.item_id}, {self.date}, mean: {self.mean}'
+
+
 class DailyReport(Model):
     date = DateField(auto_now=False, default=timezone.now().today, verbose_name=_('Date'))
     file_id = CharField(max_length=120, unique=True, verbose_name=_('File ID'))
+    # sha256 of the report payload, see apps.dailytrans.daily_report
+    content_hash = CharField(max_length=64, null=True, blank=True, verbose_name=_('Content Hash'))
     update_time = DateTimeField(auto_now=True, null=True, blank=True, verbose_name=_('Updated'))
     create_time = DateTimeField(auto_now_add=True, null=True, blank=True, verbose_name=_('Created'))
 
@@ -93,6 +403,23 @@ class DailyReport(Model):
         return f'{self.date}, {self.file_id}'
 
 
+class DailyReportWatermark(Model):
+    """
+    Latest DailyTran update_time/create_time covered by a complete run of
+    apps.dailytrans.daily_report, a single row, only moved once every
+    pending report was generated.
+    """
+    last_tran_update = DateTimeField(null=True, blank=True, verbose_name=_('Last Transition Update'))
+    update_time = DateTimeField(auto_now=True, null=True, blank=True, verbose_name=_('Updated'))
+
+    class Meta:
+        verbose_name = _('Daily Report Watermark')
+        verbose_name_plural = _('Daily Report Watermarks')
+
+    def __str__(self):
+        return f'{self.last_tran_update}'
+
+
 class FestivalReport(Model):
     festival_id = ForeignKey('configs.Festival', on_delete=CASCADE, verbose_name=_('Festival ID'))
     file_id = CharField(max_length=120, unique=True, verbose_name=_('File ID'))
@@ -106,3 +433,83 @@ class FestivalReport(Model):
 
     def __str__(self):
         return f'{self.festival_id}, {self.file_id}, {self.file_volume_id}'
+
+
+class CrawlStateQuerySet(QuerySet):
+    def conditional_headers(self, feed, date):
+        """ If-None-Match / If-Modified-Since headers of the last successful crawl of feed on date """
+        state = self.filter(feed=feed, date=date).first()
+        headers = {}
+        if state and state.etag:
+            headers['If-None-Match'] = state.etag
+        if state and state.last_modified:
+            headers['If-Modified-Since'] = state.last_modified
+        return headers
+
+    def is_unchanged(self, feed, date, content_hash):
+        return self.filter(feed=feed, date=date, response_hash=content_hash).exists()
+
+    def record(self, feed, date, content_hash=None, etag=None, last_modified=None, row_count=None):
+        """
+        Save a successful crawl of feed on date. Without content_hash the
+        upstream answered not modified, only last_success is moved forward.
+        """
+        if content_hash is None:
+            self.filter(feed=feed, date=date).update(last_success=timezone.now())
+            return
+
+        self.update_or_create(feed=feed, date=date, defaults={
+            'response_hash': content_hash,
+            'etag': etag,
+            'last_modified': last_modified,
+            'row_count': row_count or 0,
+            'last_success': timezone.now(),
+        })
+
+
+class CrawlState(Model):
+    """
+    Last successful crawl of an upstream feed (a DAILYTRAN_BUILDER_API key)
+    on a date: hash of the records, validators and row count, used to skip
+    days whose upstream data did not change, see apps.dailytrans.fetcher.
+    """
+    feed = CharField(max_length=50, verbose_name=_('Feed'))
+    date = DateField(verbose_name=_('Date'))
+    response_hash = CharField(max_length=64, verbose_name=_('Response Hash'))
+    etag = CharField(max_length=255, null=True, blank=True, verbose_name=_('ETag'))
+    last_modified = CharField(max_length=64, null=True, blank=True, verbose_name=_('Last Modified'))
+    row_count = IntegerField(default=0, verbose_name=_('Row Count'))
+    last_success = DateTimeField(null=True, blank=True, verbose_name=_('Last Success'))
+    update_time = DateTimeField(auto_now=True, null=True, blank=True, verbose_name=_('Updated'))
+
+    objects = CrawlStateQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _('Crawl State')
+        verbose_name_plural = _('Crawl States')
+        unique_together = ('feed', 'date')
+
+    def __str__(self):
+        return f'{self.feed}, {self.date}, rows: {self.row_count}'
+
+
+class BackfillShard(Model):
+    """
+    Checkpoint of a date range of a historical backfill, finish_time is set
+    once every day of the range is ingested, see apps.dailytrans.backfill.
+    """
+    feed = CharField(max_length=50, verbose_name=_('Feed'))
+    start_date = DateField(verbose_name=_('Start Date'))
+    end_date = DateField(verbose_name=_('End Date'))
+    rows = IntegerField(default=0, verbose_name=_('Rows'))
+    seconds = FloatField(null=True, blank=True, verbose_name=_('Seconds'))
+    finish_time = DateTimeField(null=True, blank=True, verbose_name=_('Finish Time'))
+    update_time = DateTimeField(auto_now=True, null=True, blank=True, verbose_name=_('Updated'))
+
+    class Meta:
+        verbose_name = _('Backfill Shard')
+        verbose_name_plural = _('Backfill Shards')
+        unique_together = ('feed', 'start_date', 'end_date')
+
+    def __str__(self):
+        return f'{self.feed}, {self.start_date} ~ {self.end_date}, rows: {self.rows}'
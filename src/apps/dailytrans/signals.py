@@ -0,0 +1,23 @@
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
+
+from apps.configs.models import Last5YearsItems
+from apps.dailytrans.models import Last5YearsDailyStat
+
+
+@receiver(m2m_changed, sender=Last5YearsItems.product_id.through)
+@receiver(m2m_changed, sender=Last5YearsItems.source.through)
+def reset_last5years_stats(sender, instance, action, reverse, pk_set, **kwargs):
+    """ drop the stats of items whose products/sources changed, the next refresh rebuilds them """
+    if not reverse and action in ('post_add', 'post_remove', 'post_clear'):
+        item_ids = [instance.id]
+    elif reverse and action in ('post_add', 'post_remove'):
+        item_ids = pk_set
+    elif reverse and action == 'pre_clear':
+        # instance is a product or source, its items are unknown once cleared
+        field = 'product_id' if sender is Last5YearsItems.product_id.through else 'source'
+        item_ids = Last5YearsItems.objects.filter(**{field: instance}).values_list('id', flat=True)
+    else:
+        return
+
+    Last5YearsDailyStat.objects.filter(item_id__in=list(item_ids)).delete()
@@ -0,0 +1,37 @@
+from celery.task import task
+from django.utils.dateparse import parse_date
+
+from apps.dailytrans.backfill import finish, run_shard
+from apps.dailytrans.daily_report import DailyReportPipeline
+from apps.dailytrans.models import DailyTranRollup, Last5YearsDailyStat
+
+
+@task(name='RefreshDailyTranRollups')
+def refresh_daily_tran_rollups(full=False):
+    """ recompute the week/month/year rollups touched since the last run """
+    return DailyTranRollup.objects.refresh_all(full=full)
+
+
+@task(name='RefreshLast5YearsDailyStats')
+def refresh_last5years_daily_stats(full=False):
+    """ recompute the Last5YearsItems stats of the days changed since the last run """
+    return Last5YearsDailyStat.objects.refresh_all(full=full)
+
+
+@task(name='BuildDailyReports')
+def build_daily_reports():
+    """ regenerate the daily reports affected by DailyTran changed since the last run """
+    return DailyReportPipeline().run()
+
+
+@task(name='BackfillShard')
+def backfill_shard(feed, start_date, end_date):
+    """ one shard of a backfill, dates are ISO strings, see apps.dailytrans.backfill """
+    result = run_shard(feed, parse_date(start_date), parse_date(end_date))
+    return result.rows if not result.resumed else 0
+
+
+@task(name='FinishBackfill')
+def finish_backfill(rows, since, until):
+    """ chord callback of the BackfillShard tasks, rows is the list of their results """
+    return dict(finish(parse_date(since), parse_date(until)), rows=sum(rows))
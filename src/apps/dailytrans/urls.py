@@ -0,0 +1,9 @@
+from django.conf.urls import url
+
+from apps.dailytrans.views import (
+    export_view,
+)
+
+urlpatterns = [
+    url(r'^export/$', export_view, name='export'),
+]
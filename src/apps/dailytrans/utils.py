@@ -0,0 +1,152 @@
+import csv
+import io
+from collections import namedtuple
+from itertools import islice
+
+from django.db import connection, transaction
+from django.db.models import Count
+
+MERGE_FIELDS = ('up_price', 'mid_price', 'low_price', 'avg_price', 'avg_weight', 'volume')
+
+UPSERT_FIELDS = ('product_id', 'source_id', 'date') + MERGE_FIELDS
+
+UpsertResult = namedtuple('UpsertResult', ['inserted', 'updated', 'unchanged'])
+
+
+def merge_duplicates(queryset, dry_run=False):
+    """
+    Merge DailyTran rows sharing the natural key (product, source, date).
+
+    The most recently updated row of each group is kept, its empty values
+    are filled from the other rows (newest first) and the others are deleted.
+    queryset may also be a historical model's queryset inside a migration.
+
+    Return (number of duplicated groups, number of deleted rows).
+    """
+    groups = queryset.order_by().values('product_id', 'source_id', 'date').annotate(
+        count=Count('id')
+    ).filter(count__gt=1)
+
+    group_count = 0
+    deleted = 0
+
+    for group in list(groups):
+        rows = sorted(
+            queryset.filter(product_id=group['product_id'], source_id=group['source_id'], date=group['date']),
+            key=lambda row: (row.update_time is not None, row.update_time, row.id),
+            reverse=True,
+        )
+        keep, others = rows[0], rows[1:]
+
+        values = {}
+        for field in MERGE_FIELDS:
+            if getattr(keep, field) is None:
+                value = next((getattr(row, field) for row in others if getattr(row, field) is not None), None)
+                if value is not None:
+                    values[field] = value
+
+        group_count += 1
+        deleted += len(others)
+
+        if dry_run:
+            continue
+
+        with transaction.atomic():
+            queryset.filter(id__in=[row.id for row in others]).delete()
+            if values:
+                # bypass DailyTranQuerySet.update() to keep update_time of the kept row
+                queryset.model._base_manager.filter(id=keep.id).update(**values)
+
+    return group_count, deleted
+
+
+def _upsert_values(row):
+    """ values of UPSERT_FIELDS from a dict keyed by field names, product/source may be instances or ids """
+    values = []
+    for field in UPSERT_FIELDS:
+        if field in ('product_id', 'source_id') and field not in row:
+            value = row.get(field[:-3])
+            value = getattr(value, 'id', value)
+        else:
+            value = row.get(field)
+        values.append(value)
+    return values
+
+
+def bulk_upsert(model, rows, batch_size=5000):
+    """
+    Write rows (dicts of DailyTran field values) on the natural key
+    (product, source, date) with a few statements per run:
+
+    1. COPY the rows into a temp table batch by batch, the last row wins
+       when a key repeats.
+    2. Increment not_updated of the stored rows whose values are the same
+       and drop them from the temp table.
+    3. INSERT ... ON CONFLICT the remaining rows, once against the unique
+       index and once against the partial index of rows without source.
+
+    Return UpsertResult(inserted, updated, unchanged).
+    """
+    table = model._meta.db_table
+    stage = f'{table}_upsert'
+    columns = ', '.join(UPSERT_FIELDS)
+    values = ', '.join(f'{field} = EXCLUDED.{field}' for field in MERGE_FIELDS + ('update_time',))
+    same_key = 'd.product_id = s.product_id AND d.date = s.date AND d.source_id IS NOT DISTINCT FROM s.source_id'
+    same_values = ' AND '.join(f'd.{field} IS NOT DISTINCT FROM s.{field}' for field in MERGE_FIELDS)
+
+    inserted = updated = 0
+    rows = iter(rows)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TEMP TABLE {stage} ON COMMIT DROP AS '
+            f'SELECT {columns} FROM {table} WITH NO DATA'
+        )
+        cursor.execute(f'ALTER TABLE {stage} ADD COLUMN seq serial')
+
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for row in batch:
+                writer.writerow(_upsert_values(row))
+            buffer.seek(0)
+
+            cursor.copy_expert(f'COPY {stage} ({columns}) FROM STDIN WITH (FORMAT csv)', buffer)
+
+        cursor.execute(
+            f'DELETE FROM {stage} s USING {stage} d '
+            f'WHERE {same_key} AND s.seq < d.seq'
+        )
+
+        cursor.execute(
+            f'WITH unchanged AS ('
+            f'  DELETE FROM {stage} s USING {table} d WHERE {same_key} AND {same_values} RETURNING d.id'
+            f') '
+            f'UPDATE {table} SET not_updated = not_updated + 1 WHERE id IN (SELECT id FROM unchanged)'
+        )
+        unchanged = cursor.rowcount
+
+        for where, conflict in (
+            ('source_id IS NOT NULL', '(product_id, source_id, date)'),
+            ('source_id IS NULL', '(product_id, date) WHERE source_id IS NULL'),
+        ):
+            cursor.execute(
+                f'WITH upserted AS ('
+                f'  INSERT INTO {table} ({columns}, not_updated, update_time, create_time) '
+                f'  SELECT {columns}, 0, now(), now() FROM {stage} WHERE {where} '
+                f'  ON CONFLICT {conflict} DO UPDATE SET {values} '
+                f'  RETURNING xmax = 0 AS inserted'
+                f') '
+                f'SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) FROM upserted'
+            )
+            new, changed = cursor.fetchone()
+            inserted += new
+            updated += changed
+
+        cursor.execute(f'DROP TABLE {stage}')
+
+    return UpsertResult(inserted, updated, unchanged)
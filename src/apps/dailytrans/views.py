@@ -1,3 +1,34 @@
-from django.shortcuts import render
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.dateparse import parse_date
 
-# Create your views here.
+from apps.configs.models import AbstractProduct
+from apps.dailytrans.export import FORMATS, export_queryset, iter_chunks
+from apps.watchlists.models import Watchlist
+from utils.dashboard.utils import login_required
+
+
+@login_required
+def export_view(request):
+    """
+    Stream DailyTran as csv or columnar json, e.g.
+    /dailytrans/export/?product=1&start=2011-01-01&end=2023-12-31&format=csv
+    """
+    format_name = request.GET.get('format', 'csv')
+    if format_name not in FORMATS:
+        raise Http404(f'Unknown format {format_name}')
+
+    product_id = request.GET.get('product')
+    watchlist_id = request.GET.get('watchlist')
+
+    product = get_object_or_404(AbstractProduct, id=product_id) if product_id else None
+    watchlist = get_object_or_404(Watchlist, id=watchlist_id) if watchlist_id else None
+    start_date = parse_date(request.GET.get('start', ''))
+    end_date = parse_date(request.GET.get('end', ''))
+
+    serialize, content_type, extension = FORMATS[format_name]
+    queryset = export_queryset(product=product, watchlist=watchlist, start_date=start_date, end_date=end_date)
+
+    response = StreamingHttpResponse(serialize(iter_chunks(queryset)), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="dailytran.{extension}"'
+    return response
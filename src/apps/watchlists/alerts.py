@@ -0,0 +1,126 @@
+"""
+Vectorized MonitorProfile alert checking.
+
+triggered() applies the COMPARATORS operator of every profile to whole
+NumPy arrays of prices and thresholds at once, one pass per comparator
+instead of one MonitorProfile.active_compare() call per price point.
+
+scan_alerts() checks every active profile monitoring the current month
+(Month.number): profiles are resolved per watchlist by evaluate_watchlist(),
+the DailyTran of the last LOOKBACK_DAYS days of all their products are read
+with one query, and the latest price of a profile is the volume-weighted
+price of its products and sources on the last date they traded. A profile
+without months monitors no month.
+
+log_alerts() is the hook run once new prices are in: by the CheckMonitorAlerts
+task on the beat schedule and by apps.dailytrans.backfill.finish(), in a
+process pool or a Celery chord alike. Crawl tasks should chain
+CheckMonitorAlerts after their ingest, otherwise their prices are only
+checked by the next beat.
+
+e.g.
+    for profile, price in scan_alerts():
+        ...
+"""
+import datetime
+import logging
+
+import numpy as np
+
+from apps.dailytrans.analytics import weighted_average
+from apps.dailytrans.models import DailyTran
+from apps.watchlists.models import COMPARATORS, MonitorProfile, Watchlist
+from apps.watchlists.monitor import evaluate_watchlist
+
+logger = logging.getLogger(__name__)
+
+LOOKBACK_DAYS = 14
+
+
+def triggered(prices, thresholds, comparators):
+    """ boolean mask of the prices triggering the comparator and threshold at the same index, NaN never triggers """
+    prices = np.asarray(prices, dtype=float)
+    thresholds = np.asarray(thresholds, dtype=float)
+    comparators = np.asarray(comparators)
+
+    mask = np.zeros(prices.shape, dtype=bool)
+    for comparator, compare in COMPARATORS.items():
+        mask |= (comparators == comparator) & compare(prices, thresholds)
+
+    return mask
+
+
+def check_alerts(profiles, prices):
+    """ [(profile, price)] of the profiles triggered by prices, aligned with profiles """
+    prices = np.asarray(prices, dtype=float)
+    mask = triggered(
+        prices,
+        [profile.price for profile in profiles],
+        [profile.comparator for profile in profiles],
+    )
+    return [(profiles[i], float(prices[i])) for i in np.flatnonzero(mask)]
+
+
+def latest_prices(evaluations, today=None, lookback=LOOKBACK_DAYS):
+    """ latest price of each ProfileEvaluation within lookback days before today, NaN when none """
+    today = today or datetime.date.today()
+    product_ids = {product.id for evaluation in evaluations for product in evaluation.product_list}
+
+    rows = []
+    if product_ids:
+        rows = list(DailyTran.objects.filter(
+            product_id__in=product_ids,
+            date__range=(today - datetime.timedelta(days=lookback), today),
+        ).values_list('product_id', 'source_id', 'date', 'avg_price', 'volume'))
+
+    if not rows:
+        return np.full(len(evaluations), np.nan)
+
+    products, sources, dates, prices, volumes = zip(*rows)
+    products = np.array(products)
+    sources = np.array([source or 0 for source in sources])
+    dates = np.array(dates, dtype='datetime64[D]')
+    prices = np.array(prices, dtype=float)
+    volumes = np.array(volumes, dtype=float)
+
+    result = np.full(len(evaluations), np.nan)
+    for i, evaluation in enumerate(evaluations):
+        mask = np.isin(products, [product.id for product in evaluation.product_list])
+        if evaluation.sources:
+            mask &= np.isin(sources, [source.id for source in evaluation.sources])
+        if not mask.any():
+            continue
+
+        mask &= dates == dates[mask].max()
+        result[i] = weighted_average(prices[mask], volumes[mask])
+
+    return result
+
+
+def scan_alerts(today=None, lookback=LOOKBACK_DAYS):
+    """ [(profile, latest price)] of the active profiles of this month triggered by their latest price """
+    today = today or datetime.date.today()
+
+    watchlist_ids = MonitorProfile.objects.filter(is_active=True).values('watchlist_id')
+
+    evaluations = []
+    for watchlist in Watchlist.objects.filter(id__in=watchlist_ids).order_by('id'):
+        evaluations += [
+            evaluation for evaluation in evaluate_watchlist(watchlist)
+            if today.month in {month.number for month in evaluation.months}
+        ]
+
+    if not evaluations:
+        return []
+
+    prices = latest_prices(evaluations, today=today, lookback=lookback)
+    return check_alerts([evaluation.profile for evaluation in evaluations], prices)
+
+
+def log_alerts(today=None):
+    """ scan_alerts() and log every triggered profile, return the alerts """
+    alerts = scan_alerts(today=today)
+    for profile, price in alerts:
+        logger.info(f'monitor profile {profile.id} triggered by {price:g} ({profile.comparator} {profile.price:g})')
+
+    return alerts
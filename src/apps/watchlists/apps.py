@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class WatchlistsConfig(AppConfig):
     name = 'apps.watchlists'
+
+    def ready(self):
+        import apps.watchlists.signals  # noqa: F401
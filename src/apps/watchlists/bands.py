@@ -0,0 +1,109 @@
+"""
+In-process price band index of MonitorProfile.
+
+Mapping a latest price to the MonitorProfile band (and color) it falls
+into used to walk price_range of every profile, two sibling queries each.
+The index loads the profiles of a watchlist once, sorts the thresholds of
+each (product, type) group per comparator side and classifies any price
+with bisect, e.g.
+
+    profile = band_index.classify(watchlist, product, type, price)
+    profile.color if profile else 'default'
+
+A price is classified to the tightest profile it triggers: the lowest
+'<'/'<=' threshold above it, otherwise the highest '>'/'>=' threshold
+below it, which is the profile whose price_range holds the price.
+
+The index of a watchlist is dropped by signals when one of its profiles
+changes in this process and rebuilt after MONITOR_BAND_TTL seconds to pick
+up changes made by others.
+"""
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+
+from django.conf import settings
+
+from apps.watchlists.models import COMPARATORS, MonitorProfile
+from apps.watchlists.monitor import LESS, GREATER
+
+
+class Bands:
+    """ thresholds of one (watchlist, product, type) group, sorted per comparator side """
+
+    def __init__(self, profiles):
+        self.less = sorted((p for p in profiles if p.comparator in LESS), key=lambda p: (p.price, p.id))
+        self.greater = sorted((p for p in profiles if p.comparator in GREATER), key=lambda p: (p.price, p.id))
+        self.less_prices = [p.price for p in self.less]
+        self.greater_prices = [p.price for p in self.greater]
+
+    def classify(self, price):
+        # first threshold >= price, skip '<' thresholds equal to price
+        index = bisect_left(self.less_prices, price)
+        while index < len(self.less):
+            profile = self.less[index]
+            if COMPARATORS[profile.comparator](price, profile.price):
+                return profile
+            index += 1
+
+        # last threshold <= price, skip '>' thresholds equal to price
+        index = bisect_right(self.greater_prices, price) - 1
+        while index >= 0:
+            profile = self.greater[index]
+            if COMPARATORS[profile.comparator](price, profile.price):
+                return profile
+            index -= 1
+
+        return None
+
+
+class BandIndex:
+    def __init__(self, ttl=None):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.indexes = {}
+
+    def invalidate(self, watchlist_id=None):
+        """ drop the index of watchlist_id, or of every watchlist """
+        with self.lock:
+            if watchlist_id is None:
+                self.indexes = {}
+            else:
+                self.indexes.pop(watchlist_id, None)
+
+    def expired(self, built_at):
+        ttl = self.ttl if self.ttl is not None else getattr(settings, 'MONITOR_BAND_TTL', 300)
+        return time.monotonic() - built_at > ttl
+
+    def build(self, watchlist_id):
+        groups = defaultdict(list)
+        for profile in MonitorProfile.objects.filter(watchlist_id=watchlist_id):
+            groups[(profile.product_id, profile.type_id)].append(profile)
+
+        return {key: Bands(profiles) for key, profiles in groups.items()}
+
+    def get(self, watchlist_id):
+        """ {(product_id, type_id): Bands} of a watchlist, built once per TTL """
+        with self.lock:
+            entry = self.indexes.get(watchlist_id)
+        if entry is not None and not self.expired(entry[0]):
+            return entry[1]
+
+        index = self.build(watchlist_id)
+        with self.lock:
+            self.indexes[watchlist_id] = (time.monotonic(), index)
+        return index
+
+    def classify(self, watchlist, product, type, price):
+        """ MonitorProfile of watchlist whose band holds price, None when price is out of every band """
+        if price is None:
+            return None
+
+        bands = self.get(getattr(watchlist, 'id', watchlist)).get(
+            (getattr(product, 'id', product), getattr(type, 'id', type))
+        )
+        return bands.classify(price) if bands else None
+
+
+band_index = BandIndex()
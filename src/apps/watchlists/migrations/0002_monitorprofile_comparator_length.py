@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.13 on 2026-10-18 08:24
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('watchlists', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='monitorprofile',
+            name='comparator',
+            field=models.CharField(choices=[('__lt__', '<'), ('__lte__', '<='), ('__gt__', '>'), ('__gte__', '>=')], default='__lt__', max_length=7, verbose_name='Comparator'),
+        ),
+    ]
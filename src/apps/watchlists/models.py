@@ -1,5 +1,8 @@
+import operator
+
 from django.conf import settings
 from django.utils import timezone
+from django.utils.functional import cached_property
 from django.db.models import (
     Model,
     CASCADE,
@@ -14,10 +17,9 @@ from django.db.models import (
     TextField,
     DateField,
     PositiveIntegerField,
-    Q,
 )
 from django.utils.translation import ugettext_lazy as _
-from apps.configs.models import Config, AbstractProduct
+from apps.configs.models import Config, AbstractProduct, ProductClosure
 
 COMPARATOR_CHOICES = [
     ('__lt__', _('<')),
@@ -26,6 +28,14 @@ COMPARATOR_CHOICES = [
     ('__gte__', _('>=')),
 ]
 
+# operator of each COMPARATOR_CHOICES, e.g. COMPARATORS['__lte__'](price, profile.price), works on NumPy arrays too
+COMPARATORS = {
+    '__lt__': operator.lt,
+    '__lte__': operator.le,
+    '__gt__': operator.gt,
+    '__gte__': operator.ge,
+}
+
 COLOR_CHOICES = [
     ('default', 'Default'),
     ('info', 'Info'),
@@ -84,12 +94,13 @@ class Watchlist(Model):
         ids = self.children().values_list('product__config__id', flat=True).distinct()
         return Config.objects.filter(id__in=ids).order_by('id')
 
-    @property
+    @cached_property
     def related_product_ids(self):
-        ids = []
-        for child in self.children():
-            ids = ids + list(child.product.related_product_ids)
-        return ids
+        """
+        Products of every item with their ancestors and direct children, resolved
+        in a single query and memoized on this instance for the rest of the request.
+        """
+        return ProductClosure.objects.related_ids(self.children().values('product_id'))
 
 
 class WatchlistItemQuerySet(QuerySet):
@@ -99,13 +110,8 @@ class WatchlistItemQuerySet(QuerySet):
         product = kwargs.get('product') or AbstractProduct.objects.filter(id=kwargs.get('product__id')).first()
 
         if product:
-            return self.filter(
-                Q(product=product)
-                | Q(product__parent=product)
-                | Q(product__parent__parent=product)
-                | Q(product__parent__parent__parent=product)
-                | Q(product__parent__parent__parent__parent=product)
-            )
+            # product itself and all of its descendants, see ProductClosure
+            return self.filter(product__ancestor_links__ancestor=product)
 
         return self.none()
 
@@ -153,7 +159,7 @@ class MonitorProfile(Model):
     watchlist = ForeignKey('watchlists.Watchlist', on_delete=CASCADE, verbose_name=_('Watchlist'))
     type = ForeignKey('configs.Type', null=True, blank=True, on_delete=SET_NULL, verbose_name=_('Type'))
     price = FloatField(verbose_name=_('Price'))
-    comparator = CharField(max_length=6, default='__lt__', choices=COMPARATOR_CHOICES, verbose_name=_('Comparator'))
+    comparator = CharField(max_length=7, default='__lt__', choices=COMPARATOR_CHOICES, verbose_name=_('Comparator'))
     color = CharField(max_length=20, default='danger', choices=COLOR_CHOICES, verbose_name=_('Color'))
     info = TextField(null=True, blank=True, verbose_name=_('Monitor Info'))
     action = TextField(null=True, blank=True, verbose_name=_('Action'))
@@ -199,14 +205,9 @@ class MonitorProfile(Model):
         return list(set(sources))
 
     def active_compare(self, price):
-        if self.comparator == '__gt__':
-            return price > self.price
-        if self.comparator == '__gte__':
-            return price >= self.price
-        if self.comparator == '__lt__':
-            return price < self.price
-        if self.comparator == '__lte__':
-            return price <= self.price
+        compare = COMPARATORS.get(self.comparator)
+        if compare:
+            return compare(price, self.price)
 
     @property
     def format_price(self):
@@ -0,0 +1,120 @@
+"""
+Batch evaluation of the MonitorProfile of a watchlist.
+
+MonitorProfile.price_range, product_list() and sources() query the database
+on every call, evaluate_watchlist() loads the profiles, months, items,
+sources and product closure of a whole watchlist with 5 queries and
+resolves them in memory with the same semantics:
+
+- price_range: the sibling prices (same product, type and watchlist) of
+  each comparator side are sorted once per group and searched with bisect;
+- product_list: products of the watchlist items under the profile product,
+  or the profile product itself when there is none;
+- sources: distinct sources of those items.
+
+e.g.
+    for evaluation in evaluate_watchlist(watchlist):
+        evaluation.profile, evaluation.low_price, evaluation.up_price
+"""
+from bisect import bisect_left, bisect_right
+from collections import defaultdict, namedtuple
+
+from apps.configs.models import ProductClosure
+from apps.watchlists.models import MonitorProfile, WatchlistItem
+
+LESS = ('__lt__', '__lte__')
+GREATER = ('__gt__', '__gte__')
+
+# up price of the highest greater band, same as MonitorProfile.price_range
+MAX_PRICE = 2 ** 50
+
+
+class ProfileEvaluation(namedtuple('ProfileEvaluation', 'profile price_range product_list sources months')):
+    __slots__ = ()
+
+    @property
+    def low_price(self):
+        return self.price_range[0]
+
+    @property
+    def up_price(self):
+        return self.price_range[1]
+
+
+def sibling_prices(profiles):
+    """ {(product_id, type_id): (sorted less prices, sorted greater prices)} of profiles """
+    groups = defaultdict(lambda: ([], []))
+    for profile in profiles:
+        less, greater = groups[(profile.product_id, profile.type_id)]
+        if profile.comparator in LESS:
+            less.append(profile.price)
+        elif profile.comparator in GREATER:
+            greater.append(profile.price)
+
+    for less, greater in groups.values():
+        less.sort()
+        greater.sort()
+
+    return dict(groups)
+
+
+def price_range(price, comparator, less, greater):
+    """ [low, up] band of a profile given the sorted prices of its group, see MonitorProfile.price_range """
+    if comparator in LESS:
+        index = bisect_left(less, price)
+        return [less[index - 1] if index else 0, price]
+
+    if comparator in GREATER:
+        index = bisect_right(greater, price)
+        return [price, greater[index] if index < len(greater) else MAX_PRICE]
+
+    return [None, None]
+
+
+def evaluate_watchlist(watchlist, active_only=True):
+    """ [ProfileEvaluation] of the (active) profiles of watchlist, ordered by id """
+    profiles = list(
+        MonitorProfile.objects.filter(watchlist=watchlist).select_related(
+            'product', 'type'
+        ).prefetch_related('months').order_by('id')
+    )
+    items = list(
+        WatchlistItem.objects.filter(parent=watchlist).select_related(
+            'product'
+        ).prefetch_related('sources').order_by('id')
+    )
+
+    descendants = defaultdict(set)
+    if profiles and items:
+        links = ProductClosure.objects.filter(
+            ancestor_id__in={profile.product_id for profile in profiles},
+            descendant_id__in={item.product_id for item in items},
+        ).values_list('ancestor_id', 'descendant_id')
+        for ancestor_id, descendant_id in links:
+            descendants[ancestor_id].add(descendant_id)
+
+    # siblings include the inactive profiles, as MonitorProfile.sibling() does
+    groups = sibling_prices(profiles)
+
+    evaluations = []
+    for profile in profiles:
+        if active_only and not profile.is_active:
+            continue
+
+        product_ids = descendants[profile.product_id]
+        matched = [item for item in items if item.product_id in product_ids]
+
+        sources = []
+        for item in matched:
+            sources.extend(source for source in item.sources.all() if source not in sources)
+
+        less, greater = groups[(profile.product_id, profile.type_id)]
+        evaluations.append(ProfileEvaluation(
+            profile=profile,
+            price_range=price_range(profile.price, profile.comparator, less, greater),
+            product_list=[item.product for item in matched] or [profile.product],
+            sources=sources,
+            months=list(profile.months.all()),
+        ))
+
+    return evaluations
@@ -0,0 +1,27 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from apps.configs.cache import menu_cache
+from apps.watchlists.bands import band_index
+from apps.watchlists.models import Watchlist, WatchlistItem, MonitorProfile
+
+
+@receiver(post_save, sender=Watchlist)
+@receiver(post_delete, sender=Watchlist)
+@receiver(post_save, sender=WatchlistItem)
+@receiver(post_delete, sender=WatchlistItem)
+def invalidate_menu_cache(sender, **kwargs):
+    transaction.on_commit(menu_cache.bump)
+
+
+@receiver(m2m_changed, sender=WatchlistItem.sources.through)
+def invalidate_menu_cache_by_item_sources(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        transaction.on_commit(menu_cache.bump)
+
+
+@receiver(post_save, sender=MonitorProfile)
+@receiver(post_delete, sender=MonitorProfile)
+def invalidate_band_index(sender, instance, **kwargs):
+    band_index.invalidate(instance.watchlist_id)
@@ -0,0 +1,13 @@
+from celery.task import task
+
+from apps.watchlists.alerts import log_alerts
+
+
+@task(name='CheckMonitorAlerts')
+def check_monitor_alerts(*args):
+    """
+    check the active MonitorProfile against the latest prices, scheduled by beat (see dashboard.celery),
+    crawl tasks may chain it after their ingest, e.g. chain(crawl.s(...), check_monitor_alerts.s()),
+    the result of the previous task is ignored
+    """
+    return [[profile.id, price] for profile, price in log_alerts()]
@@ -13,5 +13,17 @@ app.conf.beat_schedule = {
     'testing_celery_task': {
         'task': 'testing',
         'schedule': crontab(minute='*/1'),
-    }
+    },
+    'refresh_daily_tran_rollups': {
+        'task': 'RefreshDailyTranRollups',
+        'schedule': crontab(minute='*/30'),
+    },
+    'refresh_last5years_daily_stats': {
+        'task': 'RefreshLast5YearsDailyStats',
+        'schedule': crontab(hour=3, minute=0),
+    },
+    'check_monitor_alerts': {
+        'task': 'CheckMonitorAlerts',
+        'schedule': crontab(minute='5,35'),
+    },
 }
@@ -4,15 +4,35 @@ import subprocess
 from django.core.management.base import BaseCommand
 from django.utils import autoreload
 
+from dashboard.routing import WORKER_PROFILES, profile_queues
+
+
+def worker_command(profile='all'):
+    """ worker consuming the queues of profile, see dashboard.routing """
+    settings = WORKER_PROFILES[profile]
+    queues = ','.join(profile_queues(profile))
+    hostname = f'{profile}@%h'
+
+    return (
+        f'celery --app=dashboard.celery:app worker --pool={settings["pool"]} '
+        f'--concurrency={settings["concurrency"]} --prefetch-multiplier={settings["prefetch_multiplier"]} '
+        f'--queues={queues} --hostname={hostname} --loglevel=info'
+    )
+
 
 def restart_celery_worker(*args, **options):
-    cmd = "pkill -9 celery"
+    # only restart the worker of this profile, others may run on the same host
+    cmd = f'pkill -9 -f "celery.*--hostname={options["profile"]}@"'
     subprocess.call(shlex.split(cmd))
-    cmd = 'celery --app=dashboard.celery:app worker --pool=eventlet --concurrency=4  --loglevel=info'
+    cmd = worker_command(options['profile'])
     subprocess.call(shlex.split(cmd))
 
 
 class Command(BaseCommand):
+    def add_arguments(self, parser):
+        parser.add_argument('--profile', choices=sorted(WORKER_PROFILES), default='all',
+                            help='consume the queues of this profile only, every queue by default')
+
     def handle(self, *args, **options):
         print("Starting celery worker with autoreload...")
         autoreload.python_reloader(restart_celery_worker, args, options)
@@ -0,0 +1,124 @@
+"""
+Celery queues, routes and rate limits.
+
+Tasks are spread over four kinds of queues so that a slow upstream or a
+long report build cannot hold back the others:
+
+- crawl.<feed>: tasks of the CRAWL_FEEDS apps (apps.<feed>.tasks), I/O bound;
+- reports: rollups, stats and report builds, CPU and database bound;
+- backfill: shards of a historical backfill, each one fetching with its own
+  threads for minutes, see apps.dailytrans.backfill;
+- default: everything else, e.g. monitor alerts.
+
+Each crawl task is rate limited by the host of the DAILYTRAN_BUILDER_API
+endpoint it reads, given by its `api` option or CRAWL_FEED_APIS, e.g.
+
+    @task(name='DailyCropBuilder', api='eir030')
+
+gets CRAWL_HOST_RATE_LIMITS['data.moa.gov.tw']. A crawl task resolving to
+no endpoint is logged and gets the default limit. Celery applies rate
+limits per task and worker.
+
+WORKER_PROFILES are the worker settings of each kind of queue, see the
+start_celery_worker command:
+
+    python manage.py start_celery_worker --profile crawl
+"""
+import logging
+from urllib.parse import urlparse
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE = 'default'
+REPORTS_QUEUE = 'reports'
+BACKFILL_QUEUE = 'backfill'
+
+REPORT_TASKS = (
+    'RefreshDailyTranRollups',
+    'RefreshLast5YearsDailyStats',
+    'BuildDailyReports',
+    'FinishBackfill',
+)
+
+BACKFILL_TASKS = (
+    'BackfillShard',
+)
+
+WORKER_PROFILES = {
+    # waiting on sockets, many green threads, one reserved task each
+    'crawl': {'pool': 'eventlet', 'concurrency': 16, 'prefetch_multiplier': 1},
+    # one process per core at most, long tasks are never reserved ahead
+    'reports': {'pool': 'prefork', 'concurrency': 2, 'prefetch_multiplier': 1},
+    # the fetcher runs its own thread pool and event loop, which green threads do not mix with
+    'backfill': {'pool': 'prefork', 'concurrency': 4, 'prefetch_multiplier': 1},
+    'default': {'pool': 'eventlet', 'concurrency': 4, 'prefetch_multiplier': 4},
+    # a single worker for every queue, e.g. in development
+    'all': {'pool': 'eventlet', 'concurrency': 4, 'prefetch_multiplier': 1},
+}
+
+
+def crawl_queue(feed):
+    return f'crawl.{feed}'
+
+
+def profile_queues(profile):
+    """ queues consumed by the workers of profile """
+    crawl = [crawl_queue(feed) for feed in settings.CRAWL_FEEDS]
+    return {
+        'crawl': crawl,
+        'reports': [REPORTS_QUEUE],
+        'backfill': [BACKFILL_QUEUE],
+        'default': [DEFAULT_QUEUE],
+        'all': [DEFAULT_QUEUE, REPORTS_QUEUE, BACKFILL_QUEUE] + crawl,
+    }[profile]
+
+
+def task_feed(task):
+    """ CRAWL_FEEDS app of task, e.g. 'crops' for apps.crops.tasks, None otherwise """
+    parts = getattr(task, '__module__', '').split('.')
+    if len(parts) >= 2 and parts[0] == 'apps' and parts[1] in settings.CRAWL_FEEDS:
+        return parts[1]
+    return None
+
+
+def api_host(task):
+    """ host of the DAILYTRAN_BUILDER_API endpoint task reads, None when unknown """
+    api = getattr(task, 'api', None) or settings.CRAWL_FEED_APIS.get(task_feed(task))
+    url = settings.DAILYTRAN_BUILDER_API.get(api) if api else None
+    return urlparse(url).hostname if url else None
+
+
+def route_task(name, args, kwargs, options, task=None, **kw):
+    """ task_routes router: crawl.<feed>, reports, backfill, or None for the default queue """
+    if name in REPORT_TASKS:
+        return {'queue': REPORTS_QUEUE}
+
+    if name in BACKFILL_TASKS:
+        return {'queue': BACKFILL_QUEUE}
+
+    if task is None:
+        from celery import current_app
+        task = current_app.tasks.get(name)
+
+    feed = task_feed(task) if task is not None else None
+    if feed:
+        return {'queue': crawl_queue(feed)}
+
+    return None
+
+
+class FeedRateLimits:
+    """ task_annotations: rate limit of the crawl tasks by the host of their upstream """
+
+    def annotate(self, task):
+        if not task_feed(task):
+            return None
+
+        limits = settings.CRAWL_HOST_RATE_LIMITS
+        host = api_host(task)
+        if host is None:
+            logger.warning(f'No DAILYTRAN_BUILDER_API endpoint for crawl task {getattr(task, "name", task)}, '
+                           f'set its api option or CRAWL_FEED_APIS')
+        return {'rate_limit': limits.get(host, limits['default'])}
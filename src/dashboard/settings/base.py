@@ -150,6 +150,28 @@ LOGIN_URL = '/accounts/login/'
 
 REDIS_URL = 'redis://{host}:{port}'.format(host=env.str('REDIS_HOST'), port=6379)
 
+# Menu cache, see apps.configs.cache
+
+MENU_CACHE_URL = f'{REDIS_URL}/3'
+MENU_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+# Seconds before apps.configs.resolvers.source_resolver reloads Source names and aliases
+
+SOURCE_RESOLVER_TTL = 300
+
+# Seconds before apps.watchlists.bands.band_index reloads the MonitorProfile of a watchlist
+
+MONITOR_BAND_TTL = 300
+
+# Festival reports kept by apps.dailytrans.festival.local_uploader
+
+FESTIVAL_REPORT_DIR = str(BASE_DIR('reports', 'festival'))
+
+# Daily reports kept by apps.dailytrans.daily_report.local_uploader and rendered payloads by content hash
+
+DAILY_REPORT_DIR = str(BASE_DIR('reports', 'daily'))
+DAILY_REPORT_CACHE_DIR = str(BASE_DIR('reports', 'cache'))
+
 # Celery
 
 CELERY_BROKER_URL = f'{REDIS_URL}/1'
@@ -162,6 +184,99 @@ CELERY_TIMEZONE = TIME_ZONE
 CELERY_IMPORTS = (
     'dashboard.tasks',
     'apps.configs.tasks',
+    'apps.dailytrans.tasks',
+    'apps.watchlists.tasks',
+)
+
+# Queues and routing, see dashboard.routing: each feed app crawls on its own
+# crawl.<feed> queue, report builds on the reports queue, backfill shards on the
+# backfill queue, anything else on default.
+# Crawl workers only reserve one task at a time and ack it once done, so a slow
+# feed holds a single slot of its own queue instead of a batch of the others.
+CELERY_TASK_DEFAULT_QUEUE = 'default'
+CELERY_TASK_ROUTES = ('dashboard.routing.route_task',)
+CELERY_TASK_ANNOTATIONS = ('dashboard.routing.FeedRateLimits',)
+CELERY_TASK_ACKS_LATE = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+# Redis redelivers a reserved task not acked within visibility_timeout (1 hour by default),
+# it must outlast the longest task, e.g. a full rollup refresh or a backfill shard
+CELERY_BROKER_TRANSPORT_OPTIONS = {'visibility_timeout': 12 * 60 * 60}
+
+# Apps whose tasks crawl DAILYTRAN_BUILDER_API
+
+CRAWL_FEEDS = (
+    'rices',
+    'crops',
+    'fruits',
+    'hogs',
+    'rams',
+    'chickens',
+    'ducks',
+    'gooses',
+    'seafoods',
+    'cattles',
+    'feed',
+    'naifchickens',
 )
 
+# Upstream open data endpoints of the crawlers
+
+DAILYTRAN_BUILDER_API = {
+    'cattle': 'https://data.moa.gov.tw/Service/OpenData/BeefPriceService.aspx?',
+    'eir019': 'https://data.moa.gov.tw/Service/OpenData/FromM/AnimalTransData.aspx?',
+    'eir030': 'https://data.moa.gov.tw/Service/OpenData/FromM/FarmTransData.aspx?',
+    'eir032': 'https://data.moa.gov.tw/Service/OpenData/FromM/AquaticTransData.aspx?',
+    'eir49': 'https://data.moa.gov.tw/Service/OpenData/FromM/PoultryTransBoiledChickenData.aspx?',
+    'eir049': 'https://data.moa.gov.tw/Service/OpenData/FromM/PoultryTransLocalRedChickenData.aspx?',
+    'eir50': 'https://data.moa.gov.tw/Service/OpenData/FromM/PoultryTransGooseDailyPriceData.aspx?',
+    'eir050': 'https://data.moa.gov.tw/Service/OpenData/FromM/PoultryTransLocalBlackChickenData.aspx?',
+    'eir51': 'https://data.moa.gov.tw/Service/OpenData/FromM/PoultryTransGooseDuckData.aspx?',
+    'eir097': 'https://data.moa.gov.tw/Service/OpenData/FromM/RicepriceData.aspx?',
+    'eir107': 'https://data.moa.gov.tw/Service/OpenData/FromM/SheepTransData.aspx?',
+    'rice_avg': 'https://data.moa.gov.tw/Service/OpenData/Ricepriceavg.aspx?',
+    'amis': env.str('BUILDER_API_AMIS_URL', default=''),
+    'apis': env.str('BUILDER_API_APIS_URL', default=''),
+    'efish': env.str('BUILDER_API_EFISH_URL', default=''),
+    'feed': 'https://www.naif.org.tw/memberLogin.aspx?frontTitleMenuID=105',
+    'naifchickens': 'https://www.naif.org.tw/memberLogin.aspx?frontTitleMenuID=105',
+}
+
+# DAILYTRAN_BUILDER_API key read by the tasks of each CRAWL_FEEDS app, its host gives
+# their rate limit, a task with an `api` option uses that key instead
+
+CRAWL_FEED_APIS = {
+    'rices': 'eir097',
+    'crops': 'eir030',
+    'fruits': 'eir030',
+    'hogs': 'eir019',
+    'rams': 'eir107',
+    'chickens': 'eir49',
+    'ducks': 'eir51',
+    'gooses': 'eir50',
+    'seafoods': 'eir032',
+    'cattles': 'cattle',
+    'feed': 'feed',
+    'naifchickens': 'naifchickens',
+}
+
+# Record parsers of the feeds, dotted paths to callables turning a page of
+# DAILYTRAN_BUILDER_API records into DailyTran.objects.bulk_upsert rows,
+# e.g. {'eir030': 'apps.crops.builder.upsert_rows'}, see apps.dailytrans.backfill
+
+DAILYTRAN_INGESTERS = {}
+
+# Config.code of the products each DAILYTRAN_BUILDER_API feed writes, the rows of
+# days skipped as unchanged by a backfill count one more DailyTran.not_updated
+
+DAILYTRAN_FEED_CONFIGS = {}
+
+# Celery rate limit of every crawl task by the host of its DAILYTRAN_BUILDER_API
+# endpoint, hosts not listed here use the default
+
+CRAWL_HOST_RATE_LIMITS = {
+    'default': '30/m',
+    'data.moa.gov.tw': '60/m',
+    'www.naif.org.tw': '6/m',
+}
+
 APRP_VERSION = '1.0.0'
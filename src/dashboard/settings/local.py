@@ -11,6 +11,8 @@ DATABASES['default'] = {
 
 REDIS_URL = 'redis://{host}:{port}'.format(host=env.str('REDIS_HOST', 'REDIS_HOST'), port=6379)
 
+MENU_CACHE_URL = f'{REDIS_URL}/3'
+
 
 # Celery
 
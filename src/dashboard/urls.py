@@ -9,6 +9,8 @@ from dashboard.views import Index
 urlpatterns = [
     # url(r'^admin/', admin.site.urls),
     url(r'^accounts/', include('apps.accounts.urls', namespace='accounts')),
+    url(r'^configs/', include('apps.configs.urls', namespace='configs')),
+    url(r'^dailytrans/', include('apps.dailytrans.urls', namespace='dailytrans')),
 ]
 
 urlpatterns += i18n_patterns(
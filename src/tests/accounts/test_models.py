@@ -56,3 +56,11 @@ class TestGroupInformationModel:
 
         assert end_groups.count() == 1
         assert end_groups.first() == group_info_of_afa_stat
+
+    def test_query_set_with_has_child_method(self, group_info_of_afa_stat, django_assert_num_queries):
+        # Act
+        with django_assert_num_queries(1):
+            result = {info.name: info.has_child for info in GroupInformation.objects.with_has_child()}
+
+        # Assert
+        assert result == {'農業部': True, '農糧署': True, '統計室': False}
@@ -0,0 +1,76 @@
+import pytest
+import redis
+from django.db import transaction
+
+from apps.configs.cache import MenuCache
+from tests.configs.factories import TypeFactory
+
+
+class BrokenRedis:
+    def __getattr__(self, name):
+        def method(*args, **kwargs):
+            raise redis.ConnectionError('Connection refused')
+        return method
+
+
+@pytest.mark.django_db
+class TestMenuCache:
+    def test_get_menu_hit_and_miss(self, menu_cache, product_of_rice, django_assert_num_queries):
+        # Act
+        first = menu_cache.get_menu()
+
+        with django_assert_num_queries(0):
+            second = menu_cache.get_menu()
+
+        # Assert
+        assert first == second
+        assert first[0]['products'][0]['id'] == product_of_rice.id
+        assert menu_cache.stats()['hits'] == 1
+        assert menu_cache.stats()['misses'] == 1
+
+    @pytest.mark.django_db(transaction=True)
+    def test_signals_bump_version(self, menu_cache, product_of_rice, watchlist_item):
+        # Arrange
+        version = menu_cache.version()
+
+        # Act
+        TypeFactory()
+
+        # Assert
+        assert menu_cache.version() == version + 1
+
+        # Act
+        product_of_rice.name = 'rice'
+        product_of_rice.save()
+        watchlist_item.sources.clear()
+        watchlist_item.delete()
+
+        # Assert
+        assert menu_cache.version() == version + 4
+
+    @pytest.mark.django_db(transaction=True)
+    def test_signals_bump_version_after_commit(self, menu_cache):
+        # Arrange
+        version = menu_cache.version()
+
+        # Act
+        with transaction.atomic():
+            TypeFactory()
+
+            # Assert
+            assert menu_cache.version() == version
+
+        # Assert
+        assert menu_cache.version() == version + 1
+
+    def test_get_config_menu_without_redis(self, product_of_rice):
+        # Arrange
+        cache = MenuCache()
+        cache._client = BrokenRedis()
+
+        # Act
+        result = cache.get_config_menu(product_of_rice.config)
+
+        # Assert
+        assert result['id'] == product_of_rice.config.id
+        assert result['products'][0]['children'][0]['level'] == 2
@@ -0,0 +1,43 @@
+import datetime as dt
+
+import pytest
+
+from apps.configs.lunar import FIRST_YEAR, LAST_YEAR, LunarCalendar, lunar_calendar
+
+
+class TestLunarCalendar:
+    @pytest.mark.parametrize('year, month, day, expected', [
+        (2024, '01', '01', dt.date(2024, 2, 10)),
+        (2024, '05', '05', dt.date(2024, 6, 10)),
+        (2023, '08', '15', dt.date(2023, 9, 29)),
+        # 除夕 falls in the Gregorian year, taken from the previous lunar year
+        (2024, '12', '30', dt.date(2024, 2, 9)),
+        # the 12th month of lunar 2024 has 29 days
+        (2025, '12', '30', dt.date(2025, 1, 28)),
+        (1900, '01', '01', dt.date(1900, 1, 31)),
+        (2100, '01', '01', dt.date(2100, 2, 9)),
+    ])
+    def test_to_gregorian(self, year, month, day, expected):
+        assert lunar_calendar.to_gregorian(year, month, day) == expected
+
+    def test_leap_month(self):
+        # lunar 2023 has a leap 2nd month, later months shift by one slot
+        assert lunar_calendar.to_gregorian(2023, 2, 1, leap=True) == dt.date(2023, 3, 22)
+        assert lunar_calendar.to_gregorian(2023, 3, 1) == dt.date(2023, 4, 20)
+
+        with pytest.raises(ValueError):
+            lunar_calendar.to_gregorian(2023, 3, 1, leap=True)
+
+    def test_out_of_range(self):
+        with pytest.raises(ValueError):
+            lunar_calendar.ordinal(FIRST_YEAR - 1, 1, 1)
+
+        with pytest.raises(ValueError):
+            lunar_calendar.ordinal(LAST_YEAR, 13, 1)
+
+    def test_broken_table(self, tmpdir):
+        path = tmpdir.join('lunar.bin')
+        path.write_binary(b'\x00' * 8)
+
+        with pytest.raises(ValueError):
+            LunarCalendar(str(path)).to_gregorian(2024, 1, 1)
@@ -0,0 +1,68 @@
+import pytest
+
+from apps.configs.menu import load_menu
+from apps.configs.models import AbstractProduct
+from tests.configs.factories import ConfigFactory, AbstractProductFactory
+
+
+@pytest.mark.django_db
+class TestMenu:
+    def test_load_menu_matches_models(self, product_of_rice, source):
+        # Arrange
+        config = product_of_rice.config
+        AbstractProductFactory(config=source.configs.first(), type=source.type)
+
+        # Act
+        menu = load_menu()
+
+        # Assert
+        nodes = {node.id: node for config_node in menu for node in config_node.products()}
+
+        for product in AbstractProduct.objects.select_subclasses():
+            node = nodes[product.id]
+            assert [i.id for i in node.children()] == [i.id for i in product.children()]
+            assert [i.id for i in node.types()] == sorted(i.id for i in product.types())
+            assert [i.id for i in node.sources()] == [i.id for i in product.sources()]
+            assert node.has_child == product.has_child
+            assert node.has_source == product.has_source
+            assert node.level == product.level
+            assert node.to_direct == product.to_direct
+
+        config_node = [i for i in menu if i.id == config.id][0]
+        assert [i.id for i in config_node.roots()] == [product_of_rice.id]
+
+    def test_load_menu_query_count(self, product_of_rice, chart, unit, type_instance, django_assert_max_num_queries):
+        # Arrange
+        for i in range(12):
+            config = ConfigFactory(name=f'config-{i}', charts=[chart])
+            parent = AbstractProductFactory(config=config, type=type_instance, unit=unit)
+            AbstractProductFactory.create_batch(3, config=config, parent=parent, type=type_instance, unit=unit)
+
+        # Act
+        with django_assert_max_num_queries(4):
+            menu = load_menu()
+
+            for config_node in menu:
+                for node in config_node.products():
+                    node.children(), node.types(), node.sources(), node.has_child, node.has_source, node.to_direct
+
+        # Assert
+        assert len(menu) == 13
+
+    def test_load_menu_with_watchlist(self, monitor_profile_with_pig, watchlist_item_with_pig,
+                                      django_assert_max_num_queries):
+        # Arrange
+        watchlist = monitor_profile_with_pig.watchlist
+        product = watchlist_item_with_pig.product
+
+        # Act
+        with django_assert_max_num_queries(7):
+            menu = load_menu(watchlist=watchlist)
+            node = menu[0].products()[0]
+            sources = node.sources()
+
+        # Assert
+        assert len(menu) == 1
+        assert node.id == product.id
+        assert [i.id for i in sources] == [i.id for i in product.sources(watchlist=watchlist)]
+        assert [i.id for i in node.children()] == [i.id for i in product.children(watchlist=watchlist)]
@@ -1,12 +1,18 @@
+import datetime
+from importlib import import_module
+from io import StringIO
+
 import pytest
+from django.core.management import call_command
 
 from apps.configs.models import (
     Config,
     Source,
     Type,
-    Chart, FestivalName, Festival, AbstractProduct,
+    Chart, FestivalName, Festival, AbstractProduct, ProductClosure,
 )
 from tests.configs.factories import (
+    AbstractProductFactory,
     SourceFactory,
     ChartFactory,
     MonthFactory,
@@ -53,6 +59,46 @@ class TestAbstractProductModel:
         assert children.count() == 2
         assert children.first().children_all().count() == 0
 
+    def test_children_all_method_beyond_five_levels(self, product_of_rice):
+        # Arrange
+        parent = product_of_rice
+        for i in range(6):
+            parent = AbstractProductFactory(name=f'level-{i}', config=product_of_rice.config, parent=parent)
+
+        # Act
+        children = product_of_rice.children_all()
+
+        # Assert
+        assert children.count() == 9
+        assert parent in children
+
+    def test_children_all_method_after_reparent(self, product_of_rice):
+        # Arrange
+        rice_ja = product_of_rice.children().first()
+        other = AbstractProductFactory(config=product_of_rice.config)
+
+        # Act
+        rice_ja.parent = other
+        rice_ja.save()
+
+        # Assert
+        assert product_of_rice.children_all().count() == 0
+        assert other.children_all().count() == 3
+        assert ProductClosure.objects.filter(ancestor=other, depth=2).count() == 2
+
+    def test_children_all_method_after_delete(self, product_of_rice):
+        # Arrange
+        rice_ja = product_of_rice.children().first()
+        grandchildren = list(rice_ja.children())
+
+        # Act
+        rice_ja.delete()
+
+        # Assert
+        assert product_of_rice.children_all().count() == 0
+        for product in grandchildren:
+            assert ProductClosure.objects.filter(descendant=product).count() == 1
+
     def test_level_method(self, product_of_rice):
         parent = product_of_rice
 
@@ -62,6 +108,99 @@ class TestAbstractProductModel:
 
         assert rice_ja.level == 2
 
+    def test_level_method_without_query(self, product_of_rice, django_assert_num_queries):
+        # Arrange
+        grandchild = AbstractProduct.objects.get(code='pt_1japt')
+
+        # Act
+        with django_assert_num_queries(0):
+            level = grandchild.level
+
+        # Assert
+        assert level == 3
+        assert grandchild.ancestor_ids == [product_of_rice.id, grandchild.parent_id]
+        assert product_of_rice.is_ancestor_of(grandchild) is True
+        assert grandchild.is_descendant_of(product_of_rice) is True
+        assert grandchild.is_ancestor_of(product_of_rice) is False
+
+    def test_tree_fields_after_reparent_and_delete(self, product_of_rice):
+        # Arrange
+        rice_ja = product_of_rice.children().first()
+        other = AbstractProductFactory(config=product_of_rice.config)
+        root = AbstractProductFactory(config=product_of_rice.config)
+        other.parent = root
+        other.save()
+
+        # Act
+        rice_ja.parent = other
+        rice_ja.save()
+        grandchild = AbstractProduct.objects.get(code='pt_2japt')
+
+        # Assert
+        assert grandchild.level == 4
+        assert grandchild.tree_path == f'/{root.id}/{other.id}/{rice_ja.id}/{grandchild.id}/'
+
+        # Act
+        other.delete()
+        grandchild = AbstractProduct.objects.get(code='pt_2japt')
+
+        # Assert
+        assert grandchild.level == 2
+        assert grandchild.tree_path == f'/{rice_ja.id}/{grandchild.id}/'
+
+    def test_tree_fields_after_saving_stale_instance(self, product_of_rice):
+        # Arrange
+        stale = AbstractProduct.objects.get(code='pt_1japt')
+        root = AbstractProductFactory(config=product_of_rice.config)
+        product_of_rice.parent = root
+        product_of_rice.save()
+
+        # Act
+        stale.name = 'stale'
+        stale.save()
+        grandchild = AbstractProduct.objects.get(code='pt_1japt')
+
+        # Assert
+        assert grandchild.name == 'stale'
+        assert grandchild.level == 4
+        assert grandchild.tree_path == f'/{root.id}/{product_of_rice.id}/{stale.parent_id}/{stale.id}/'
+        assert (stale.tree_depth, stale.tree_path) == (grandchild.tree_depth, grandchild.tree_path)
+
+    def test_rebuild_product_tree_command(self, product_of_rice):
+        # Arrange
+        AbstractProduct.objects.update(tree_depth=None, tree_path=None)
+        ProductClosure.objects.all().delete()
+
+        # Act
+        call_command('rebuild_product_tree', stdout=StringIO())
+        grandchild = AbstractProduct.objects.get(code='pt_1japt')
+
+        # Assert
+        assert grandchild.level == 3
+        assert product_of_rice.children_all().count() == 3
+
+    def test_with_has_child_and_has_source_methods(self, product_of_pig, sources_for_pig, product_of_rice,
+                                                   django_assert_num_queries):
+        # Arrange
+        for source in sources_for_pig:
+            source.configs.add(product_of_pig.config)
+        expected = {
+            product.id: (product.has_child, product.has_source)
+            for product in AbstractProduct.objects.exclude(config=None)
+        }
+
+        # Act
+        with django_assert_num_queries(1):
+            products = AbstractProduct.objects.exclude(
+                config=None
+            ).with_has_child().with_has_source().select_subclasses()
+            result = {product.id: (product.has_child, product.has_source) for product in products}
+
+        # Assert
+        assert result == expected
+        assert result[product_of_pig.id] == (False, True)
+        assert result[product_of_rice.id] == (True, False)
+
     def test_to_direct_method(self, product_of_rice):
         parent = product_of_rice
 
@@ -246,6 +385,17 @@ class TestSourceModel:
         # Assert
         assert result is True
 
+    def test_search_method_of_query_set(self):
+        # Arrange
+        taipei = SourceFactory.create(name='臺北一', alias='台北一,北市一,TPE1')
+        SourceFactory.create(name='臺中市', alias='台中市')
+
+        # Act & Assert
+        assert list(Source.objects.search('台北')) == [taipei]
+        assert list(Source.objects.search('tpe')) == [taipei]
+        assert list(Source.objects.search('北市', fields=('name',))) == []
+        assert list(Source.objects.filter_by_name('北市一')) == [taipei]
+
 
 @pytest.mark.django_db
 class TestConfigModel:
@@ -370,6 +520,17 @@ class TestMonthModel:
         with pytest.raises(Exception):
             MonthFactory.create(name=month.name)
 
+    def test_month_number_from_name(self):
+        # Arrange
+        migration = import_module('apps.configs.migrations.0013_month_number')
+        names = ['1月', '03', '十月', '十二月', '三月', 'March', '閏月']
+
+        # Act
+        numbers = [migration.parse_month(name) for name in names]
+
+        # Assert
+        assert numbers == [1, 3, 10, 12, 3, 3, None]
+
 
 @pytest.mark.django_db
 class TestFestivalNameModel:
@@ -424,3 +585,15 @@ class TestFestivalModel:
 
     def test_festival_str(self, festival):
         assert str(festival) == f"{festival.roc_year}_{festival.name.name}"
+
+    def test_festival_gregorian_date(self, festival):
+        # Arrange
+        festival.roc_year = '113'
+        festival.name.lunar_month = '08'
+        festival.name.lunar_day = '15'
+
+        # Act & Assert
+        assert festival.gregorian_date == datetime.date(2024, 9, 17)
+
+        festival.name = None
+        assert festival.gregorian_date is None
@@ -0,0 +1,60 @@
+import pytest
+
+from apps.configs.models import Source
+from apps.configs.resolvers import SourceResolver
+from tests.configs.factories import SourceFactory
+
+
+@pytest.fixture
+def sources_for_market(config, type_instance):
+    return [
+        SourceFactory(name='臺北一', alias='台北一,北市一', configs=[config], type=type_instance),
+        SourceFactory(name='臺北二', alias='台北二,北市二', configs=[config], type=type_instance),
+        SourceFactory(name='臺北一', alias=None, configs=[config], type=None),
+    ]
+
+
+@pytest.mark.django_db
+class TestSourceResolver:
+    @pytest.mark.parametrize('name', ['台北一', '臺北二', '北市', '北市二', 'not-exist'])
+    def test_resolve_matches_filter_by_name(self, name, sources_for_market, config, type_instance):
+        # Arrange
+        resolver = SourceResolver()
+
+        # Act & Assert
+        assert resolver.resolve(name) == list(Source.objects.filter_by_name(name))
+        assert resolver.resolve(name, config=config, type=type_instance) == list(
+            Source.objects.filter(configs=config, type=type_instance).filter_by_name(name)
+        )
+        assert resolver.resolve(name, type=None) == list(Source.objects.filter(type=None).filter_by_name(name))
+
+    def test_resolve_without_query(self, sources_for_market, config, django_assert_num_queries):
+        # Arrange
+        resolver = SourceResolver()
+        resolver.resolve_one('台北一', config=config)
+
+        # Act
+        with django_assert_num_queries(0):
+            for _ in range(100):
+                source = resolver.resolve_one('台北一', config=config)
+
+        # Assert
+        assert source == sources_for_market[0]
+
+    def test_resolve_after_source_changed(self, sources_for_market, monkeypatch):
+        # Arrange
+        resolver = SourceResolver()
+        monkeypatch.setattr('apps.configs.signals.source_resolver', resolver)
+        assert resolver.resolve('南市') == []
+
+        # Act
+        source = sources_for_market[1]
+        source.alias = '南市'
+        source.save()
+
+        # Assert
+        assert resolver.resolve('南市') == [source]
+
+    def test_resolve_with_invalid_name(self):
+        with pytest.raises(TypeError):
+            SourceResolver().resolve(None)
@@ -0,0 +1,46 @@
+import json
+
+import pytest
+from django.core.urlresolvers import reverse
+
+from apps.configs.views import menu_view
+
+
+@pytest.mark.django_db
+class TestMenuView:
+    def test_menu_view_reads_through_cache(self, client, user_with_admin, product_of_rice, menu_cache,
+                                           django_assert_num_queries):
+        # Arrange
+        url = reverse('configs:menu')
+        client.force_login(user_with_admin)
+        request = client.factory.get(url)
+        request.user = user_with_admin
+
+        # Act
+        first = client.get(url)
+
+        with django_assert_num_queries(0):
+            second = menu_view(request)
+
+        # Assert
+        assert first.status_code == 200
+        assert json.loads(first.content.decode('utf-8')) == json.loads(second.content.decode('utf-8'))
+        assert json.loads(second.content.decode('utf-8'))[0]['products'][0]['id'] == product_of_rice.id
+        assert menu_cache.stats() == {'hits': 1, 'misses': 1, 'version': menu_cache.version()}
+
+    def test_menu_view_of_watchlist_and_config(self, client, user_with_admin, watchlist_item):
+        # Arrange
+        url = reverse('configs:menu')
+        config = watchlist_item.product.config
+        client.force_login(user_with_admin)
+
+        # Act
+        by_watchlist = client.get(url, {'watchlist': watchlist_item.parent.id})
+        by_config = client.get(url, {'config': config.id})
+        client.logout()
+        anonymous = client.get(url)
+
+        # Assert
+        assert [node['id'] for node in json.loads(by_watchlist.content.decode('utf-8'))] == [config.id]
+        assert json.loads(by_config.content.decode('utf-8'))['id'] == config.id
+        assert anonymous.status_code == 302
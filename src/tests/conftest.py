@@ -1 +1,43 @@
+import pytest
+
+from apps.configs.cache import MenuCache
+
 from .fixtures import *
+
+
+class InMemoryRedis:
+    """ the subset of redis.StrictRedis used by MenuCache """
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        value = self.data.get(key)
+        return str(value).encode('utf-8') if value is not None else None
+
+    def mget(self, *keys):
+        return [self.get(key) for key in keys]
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def incr(self, key):
+        self.data[key] = int(self.data.get(key, 0)) + 1
+        return self.data[key]
+
+    def pipeline(self):
+        return self
+
+    def execute(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def menu_cache(monkeypatch):
+    """ keep the invalidation signals and the menu view off Redis, every factory save would wait on its timeout """
+    cache = MenuCache()
+    cache._client = InMemoryRedis()
+    monkeypatch.setattr('apps.configs.signals.menu_cache', cache)
+    monkeypatch.setattr('apps.watchlists.signals.menu_cache', cache)
+    monkeypatch.setattr('apps.configs.views.menu_cache', cache)
+    return cache
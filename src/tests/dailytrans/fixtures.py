@@ -1,3 +1,10 @@
+import datetime
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import urlparse, parse_qs
+
 import pytest
 
 from tests.dailytrans.factories import (
@@ -11,3 +18,83 @@ def daily_tran(product_of_pig, sources_for_pig):
         product=product_of_pig,
         source=sources_for_pig[0],
     )
+
+
+def roc_to_date(value):
+    year, month, day = value.split('.')
+    return datetime.date(int(year) + 1911, int(month), int(day))
+
+
+class OpenDataServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, records_per_day=5, failures=0):
+        super(OpenDataServer, self).__init__(('127.0.0.1', 0), OpenDataHandler)
+        self.records_per_day = records_per_day
+        self.failures = failures
+        self.etag = None
+        self.requests = []
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_port}/Service/OpenData/FromM/FarmTransData.aspx?'
+
+
+class OpenDataHandler(BaseHTTPRequestHandler):
+    """
+    stand-in of the open data endpoints: records_per_day records each day of StartDate ~ EndDate,
+    paged by $top/$skip
+    """
+
+    def do_GET(self):
+        server = self.server
+        params = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+
+        with server.lock:
+            server.requests.append(params)
+            fail = server.failures > 0
+            server.failures -= 1
+
+        if fail:
+            self.send_response(503)
+            self.end_headers()
+            return
+
+        if server.etag and self.headers.get('If-None-Match') == server.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        start, end = (roc_to_date(params[key]) for key in ('StartDate', 'EndDate'))
+        records = [
+            {'交易日期': f'{date.year - 1911}.{date:%m.%d}', '品項': f'item-{i}'}
+            for date in (start + datetime.timedelta(days=day) for day in range((end - start).days + 1))
+            for i in range(server.records_per_day)
+        ]
+        skip, top = int(params['$skip']), int(params['$top'])
+        body = json.dumps(records[skip:skip + top]).encode('utf-8')
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if server.etag:
+            self.send_header('ETag', server.etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def open_data_server(settings):
+    server = OpenDataServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    settings.DAILYTRAN_BUILDER_API = dict(settings.DAILYTRAN_BUILDER_API, test=server.url)
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
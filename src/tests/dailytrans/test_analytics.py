@@ -0,0 +1,99 @@
+import datetime as dt
+import io
+
+import numpy as np
+import pytest
+from django.core.management import call_command
+
+from apps.dailytrans.analytics import PriceSeries, load_series, weighted_average
+from tests.dailytrans.factories import DailyTranFactory
+
+
+@pytest.fixture
+def series():
+    dates = [dt.date(2019, 1, 1), dt.date(2019, 1, 2), dt.date(2020, 1, 1), dt.date(2020, 1, 1), dt.date(2020, 1, 2)]
+    return PriceSeries(dates, [10.0, 20.0, 12.0, 15.0, 30.0], [1.0, np.nan, 1.0, 2.0, np.nan])
+
+
+class TestPriceSeries:
+    def test_weighted_average(self):
+        assert weighted_average([10.0, 20.0], [1.0, 3.0]) == 17.5
+        assert weighted_average([10.0, 20.0], [np.nan, np.nan]) == 15.0
+
+    def test_month_days_and_years(self, series):
+        assert series.month_days.tolist() == [101, 102, 101, 101, 102]
+        assert series.years.tolist() == [2019, 2019, 2020, 2020, 2020]
+
+    def test_daily(self, series):
+        # Act
+        daily = series.daily()
+
+        # Assert
+        assert daily.dates.tolist() == [dt.date(2019, 1, 1), dt.date(2019, 1, 2), dt.date(2020, 1, 1), dt.date(2020, 1, 2)]
+        assert daily.prices.tolist() == [10.0, 20.0, 14.0, 30.0]
+        assert daily.volumes[2] == 3.0
+        assert np.isnan(daily.volumes[1])
+
+    def test_rolling_mean(self):
+        # Arrange
+        series = PriceSeries([dt.date(2020, 1, day) for day in range(1, 6)], [1.0, 2.0, np.nan, 4.0, 5.0], [np.nan] * 5)
+
+        # Act
+        means = series.rolling_mean(2)
+
+        # Assert
+        assert np.isnan(means[0])
+        assert means[1:].tolist() == [1.5, 2.0, 4.0, 4.5]
+
+    def test_year_over_year(self, series):
+        # Act
+        previous, delta, ratio = series.daily().year_over_year()
+
+        # Assert
+        assert np.isnan(previous[:2]).all()
+        assert previous[2:].tolist() == [10.0, 20.0]
+        assert delta[2:].tolist() == [4.0, 10.0]
+        assert ratio[3] == 0.5
+
+    def test_month_day_stats(self, series):
+        # Act
+        stats = series.month_day_stats(years=1)
+        all_years = series.month_day_stats()
+
+        # Assert
+        assert stats['month_day'].tolist() == [101, 102]
+        assert stats['count'].tolist() == [2, 1]
+        assert stats['mean'].tolist() == [13.5, 30.0]
+        assert stats['weighted_avg'].tolist() == [14.0, 30.0]
+        assert all_years['min'].tolist() == [10.0, 20.0]
+        assert all_years['max'].tolist() == [15.0, 30.0]
+
+    def test_empty_series(self):
+        series = PriceSeries([], [], [])
+
+        assert series.month_day_stats(years=5)['month_day'].size == 0
+        assert series.daily().rolling_mean(3).size == 0
+
+
+@pytest.mark.django_db
+class TestLoadSeries:
+    def test_load_series(self, daily_tran):
+        # Arrange
+        DailyTranFactory.create(
+            product=daily_tran.product, source=daily_tran.source, date=dt.date(2020, 1, 1), avg_price=10.0, volume=None
+        )
+
+        # Act
+        series = load_series(products=[daily_tran.product], sources=[daily_tran.source], end_date=dt.date(2020, 12, 31))
+
+        # Assert
+        assert len(series) == 1
+        assert series.prices.tolist() == [10.0]
+        assert np.isnan(series.volumes[0])
+
+    def test_benchmark_command(self, daily_tran):
+        out = io.StringIO()
+
+        call_command('benchmark_analytics', product=[daily_tran.product.id], repeat=1, stdout=out)
+
+        assert 'speedup' in out.getvalue()
@@ -0,0 +1,123 @@
+import datetime
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from apps.configs.models import AbstractProduct
+from apps.dailytrans.backfill import Backfill
+from apps.dailytrans.models import BackfillShard, DailyTran, DailyTranRollup
+from tests.configs.factories import AbstractProductFactory, ConfigFactory
+from tests.dailytrans.factories import DailyTranFactory
+
+
+def upsert_rows(records):
+    """ DAILYTRAN_INGESTERS parser of the stand-in server records, 品項 is the product code """
+    products = dict(AbstractProduct.objects.filter(code__startswith='item-').values_list('code', 'id'))
+
+    rows = []
+    for record in records:
+        year, month, day = record['交易日期'].split('.')
+        rows.append({
+            'product_id': products[record['品項']],
+            'source_id': None,
+            'date': datetime.date(int(year) + 1911, int(month), int(day)),
+            'avg_price': 10.0,
+            'volume': 100.0,
+        })
+    return rows
+
+
+@pytest.fixture
+def backfill_feed(open_data_server, settings):
+    for i in range(open_data_server.records_per_day):
+        AbstractProductFactory(code=f'item-{i}')
+    settings.DAILYTRAN_INGESTERS = {'test': 'tests.dailytrans.test_backfill.upsert_rows'}
+    return 'test'
+
+
+# ingest runs on the database thread of the fetcher, which needs committed data
+@pytest.mark.django_db(transaction=True)
+class TestBackfill:
+    def test_run(self, backfill_feed):
+        # Arrange
+        backfill = Backfill(backfill_feed, datetime.date(2024, 1, 1), datetime.date(2024, 1, 10),
+                            workers=0, shard_days=4)
+
+        # Act
+        result = backfill.run()
+
+        # Assert
+        assert result.shards == 3
+        assert result.resumed == 0
+        assert result.rows == 50
+        assert result.rows_per_second > 0
+        assert DailyTran.objects.count() == 50
+        assert BackfillShard.objects.filter(finish_time__isnull=False).count() == 3
+        assert result.finish['rollups'] == DailyTranRollup.objects.count() > 0
+        assert result.finish['alerts'] == 0
+
+    def test_resume_unfinished_shards(self, backfill_feed, open_data_server):
+        # Arrange
+        backfill = Backfill(backfill_feed, datetime.date(2024, 1, 1), datetime.date(2024, 1, 10),
+                            workers=0, shard_days=4)
+        backfill.run()
+        BackfillShard.objects.filter(start_date=datetime.date(2024, 1, 5)).update(finish_time=None)
+        open_data_server.requests = []
+
+        # Act
+        result = backfill.run()
+
+        # Assert, only the days of the unfinished shard are requested again
+        assert result.resumed == 2
+        assert len(open_data_server.requests) == 4
+        assert BackfillShard.objects.filter(finish_time__isnull=False).count() == 3
+
+    def test_count_not_updated_of_unchanged_days(self, backfill_feed, settings):
+        # Arrange
+        config = ConfigFactory(code='backfill-test')
+        AbstractProduct.objects.filter(code__startswith='item-').update(config=config)
+        settings.DAILYTRAN_FEED_CONFIGS = {backfill_feed: ['backfill-test']}
+        other = DailyTranFactory(date=datetime.date(2024, 1, 2))
+
+        backfill = Backfill(backfill_feed, datetime.date(2024, 1, 1), datetime.date(2024, 1, 2), workers=0)
+        backfill.run()
+        BackfillShard.objects.update(finish_time=None)
+
+        # Act
+        backfill.run()
+
+        # Assert
+        assert set(DailyTran.objects.filter(product__config=config).values_list('not_updated', flat=True)) == {1}
+        assert DailyTran.objects.get(id=other.id).not_updated == 0
+
+    def test_backfill_command(self, backfill_feed):
+        # Arrange
+        out = StringIO()
+
+        # Act
+        call_command('backfill', '--feed', backfill_feed, '--since', '2024-01-01', '--until', '2024-01-03',
+                     '--workers', '0', stdout=out)
+
+        # Assert
+        assert '1 shards, 0 resumed' in out.getvalue()
+        assert 'rows/sec' in out.getvalue()
+        assert DailyTran.objects.count() == 15
+
+    def test_dispatch(self, backfill_feed, monkeypatch):
+        # Arrange
+        chords = []
+
+        def chord(header):
+            chords.append(header)
+            return lambda callback: callback
+
+        monkeypatch.setattr('celery.chord', chord)
+        backfill = Backfill(backfill_feed, datetime.date(2024, 1, 1), datetime.date(2024, 1, 10), shard_days=4)
+
+        # Act
+        callback = backfill.dispatch()
+
+        # Assert
+        assert [sig.task for sig in chords[0]] == ['BackfillShard'] * 3
+        assert callback.task == 'FinishBackfill'
@@ -0,0 +1,132 @@
+import datetime as dt
+import os
+
+import pytest
+from django.utils import timezone
+
+from apps.dailytrans.daily_report import DailyReportPipeline
+from apps.dailytrans.models import DailyReport, DailyReportWatermark, DailyTran
+from tests.dailytrans.factories import DailyTranFactory
+
+
+@pytest.fixture
+def pipeline(tmpdir):
+    uploads = []
+
+    def uploader(date, path):
+        uploads.append((date, path))
+        return f'file_{len(uploads)}'
+
+    pipeline = DailyReportPipeline(uploader=uploader, cache_dir=str(tmpdir), window_days=2)
+    pipeline.uploads = uploads
+    return pipeline
+
+
+@pytest.mark.django_db
+class TestDailyReportPipeline:
+    def test_payload(self, pipeline, daily_tran):
+        # Arrange
+        product, source = daily_tran.product, daily_tran.source
+        for day, price, volume in ((1, 10.0, 1.0), (2, 20.0, 3.0), (3, 30.0, None)):
+            DailyTranFactory.create(product=product, source=source, date=dt.date(2020, 1, day), avg_price=price,
+                                    volume=volume)
+
+        # Act
+        payload = pipeline.payload(dt.date(2020, 1, 3))
+
+        # Assert
+        assert payload['date'] == '2020-01-03'
+        assert len(payload['rows']) == 1
+        assert payload['rows'][0]['avg_price'] == 30.0
+        assert payload['rows'][0]['previous_avg_price'] == 17.5
+        assert payload['rows'][0]['source'] == source.name
+
+    def test_run_regenerates_only_affected_dates(self, pipeline, daily_tran):
+        # Arrange
+        today = dt.date(2020, 1, 10)
+        product, source = daily_tran.product, daily_tran.source
+        trans = [
+            DailyTranFactory.create(product=product, source=source, date=dt.date(2020, 1, day), avg_price=10.0)
+            for day in (1, 2, 5)
+        ]
+
+        # Act
+        first = pipeline.run(today=today)
+
+        # Assert
+        assert first == (3, 3)
+        assert sorted(DailyReport.objects.values_list('date', flat=True))[0] == dt.date(2020, 1, 1)
+
+        # Arrange
+        DailyTran._base_manager.update(update_time=timezone.now() - dt.timedelta(days=1))
+        DailyTran.objects.filter(id=trans[0].id).update(avg_price=12.0)
+
+        # Act
+        second = pipeline.run(today=today)
+
+        # Assert
+        # 1/1 changed, the reports of 1/1 and 1/2 show it, 1/3 has no DailyTran
+        assert second == (2, 2)
+        assert len(pipeline.uploads) == 5
+        report = DailyReport.objects.get(date=dt.date(2020, 1, 1))
+        assert report.file_id == 'file_4'
+        assert DailyReport.objects.count() == 3
+
+        # Act
+        watermark = pipeline.watermark()
+        third = pipeline.run(dates=[dt.date(2020, 1, 5)])
+
+        # Assert
+        assert third == (1, 0)
+        assert pipeline.watermark() == watermark
+
+    def test_run_keeps_watermark_when_a_date_fails(self, pipeline, daily_tran):
+        # Arrange
+        today = dt.date(2020, 1, 10)
+        product, source = daily_tran.product, daily_tran.source
+        for day in (1, 5):
+            DailyTranFactory.create(product=product, source=source, date=dt.date(2020, 1, day), avg_price=10.0)
+
+        uploader = pipeline.uploader
+
+        def failing_uploader(date, path):
+            if date == dt.date(2020, 1, 5):
+                raise IOError('upload failed')
+            return uploader(date, path)
+
+        pipeline.uploader = failing_uploader
+
+        # Act
+        with pytest.raises(IOError):
+            pipeline.run(today=today)
+
+        # Assert
+        assert pipeline.watermark() is None
+        assert DailyReport.objects.count() == 1
+
+        # Act
+        pipeline.uploader = uploader
+        result = pipeline.run(today=today)
+
+        # Assert
+        # the report already generated is unchanged, only 1/5 is uploaded
+        assert result == (2, 1)
+        assert DailyReportWatermark.objects.get().last_tran_update == pipeline.tran_watermark()
+
+    def test_render_is_cached_by_content_hash(self, pipeline, tmpdir):
+        payload = {'date': '2020-01-01', 'rows': []}
+
+        first = pipeline.render(dt.date(2020, 1, 1), payload)
+        second = pipeline.render(dt.date(2020, 1, 1), dict(reversed(list(payload.items()))))
+
+        assert first == second
+        assert len(tmpdir.listdir()) == 1
+
+    def test_render_removes_older_hashes_of_the_date(self, pipeline, tmpdir):
+        pipeline.render(dt.date(2020, 1, 1), {'date': '2020-01-01', 'rows': []})
+        pipeline.render(dt.date(2020, 1, 2), {'date': '2020-01-02', 'rows': []})
+
+        _, path = pipeline.render(dt.date(2020, 1, 1), {'date': '2020-01-01', 'rows': [{'avg_price': 1.0}]})
+
+        assert sorted(p.basename for p in tmpdir.listdir())[0] == os.path.basename(path)
+        assert len(tmpdir.listdir()) == 2
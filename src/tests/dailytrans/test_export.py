@@ -0,0 +1,105 @@
+import csv
+import datetime as dt
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+from django.core.urlresolvers import reverse
+
+from apps.dailytrans.export import (
+    EXPORT_COLUMNS,
+    columnar_chunks,
+    csv_chunks,
+    export_queryset,
+    iter_chunks,
+)
+from tests.dailytrans.factories import DailyTranFactory
+
+
+@pytest.fixture
+def daily_trans(daily_tran):
+    return [daily_tran] + [
+        DailyTranFactory(product=daily_tran.product, source=daily_tran.source, date=dt.date(2020, 1, day))
+        for day in range(1, 6)
+    ]
+
+
+@pytest.mark.django_db
+class TestDailyTranExport:
+    def test_iter_chunks(self, daily_trans):
+        # Act
+        chunks = list(iter_chunks(export_queryset(product=daily_trans[0].product), chunk_size=2))
+
+        # Assert
+        assert [len(rows) for rows in chunks] == [2, 2, 2]
+        assert chunks[0][0][0] == daily_trans[0].product.id
+        assert chunks[0][0][-1] == dt.date(2020, 1, 1)
+
+    def test_export_queryset_filter_by_product_ancestor_and_dates(self, daily_trans):
+        # Arrange
+        product = daily_trans[0].product
+
+        # Act
+        queryset = export_queryset(
+            product=product.parent or product,
+            start_date=dt.date(2020, 1, 2),
+            end_date=dt.date(2020, 1, 4),
+        )
+
+        # Assert
+        assert list(queryset.values_list('date', flat=True)) == [dt.date(2020, 1, day) for day in range(2, 5)]
+
+    def test_export_queryset_of_watch_all_watchlist(self, daily_trans, watchlist):
+        # Arrange
+        watchlist.watch_all = True
+        watchlist.save()
+
+        # Act
+        queryset = export_queryset(watchlist=watchlist)
+
+        # Assert
+        assert watchlist.children().count() == 0
+        assert queryset.count() == len(daily_trans)
+
+    def test_csv_and_columnar_chunks(self, daily_trans):
+        # Arrange
+        queryset = export_queryset(product=daily_trans[0].product)
+
+        # Act
+        lines = list(csv.reader(io.StringIO(''.join(csv_chunks(iter_chunks(queryset, chunk_size=4))))))
+        batches = [json.loads(line) for line in columnar_chunks(iter_chunks(queryset, chunk_size=4))]
+
+        # Assert
+        assert tuple(lines[0]) == EXPORT_COLUMNS
+        assert len(lines) == 7
+        assert [len(batch['date']) for batch in batches] == [4, 2]
+        assert batches[0]['date'][0] == '2020-01-01'
+        assert batches[0]['source_name'][0] == daily_trans[0].source.name
+
+    def test_export_view(self, client, user_with_admin, daily_trans):
+        # Arrange
+        url = reverse('dailytrans:export')
+        params = {'product': daily_trans[0].product.id, 'format': 'columnar'}
+
+        # Act
+        anonymous = client.get(url, params)
+        client.force_login(user_with_admin)
+        response = client.get(url, params)
+
+        # Assert
+        assert anonymous.status_code == 302
+        assert response.status_code == 200
+        assert response.streaming
+        batch = json.loads(b''.join(response.streaming_content).decode('utf-8'))
+        assert len(batch['date']) == 6
+
+    def test_export_command(self, daily_trans):
+        # Arrange
+        out = io.StringIO()
+
+        # Act
+        call_command('export_dailytran', product=daily_trans[0].product.id, end=dt.date(2020, 1, 5), stdout=out)
+
+        # Assert
+        assert len(out.getvalue().splitlines()) == 6
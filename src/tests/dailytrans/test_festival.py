@@ -0,0 +1,55 @@
+import datetime as dt
+
+import pytest
+from openpyxl import load_workbook
+
+from apps.configs.models import Festival, FestivalItems, FestivalName
+from apps.dailytrans.festival import FestivalReportBuilder
+from apps.dailytrans.models import FestivalReport
+from tests.dailytrans.factories import DailyTranFactory
+
+
+@pytest.fixture
+def festival(daily_tran):
+    name = FestivalName.objects.create(name='端午節', lunar_month='05', lunar_day='05')
+    item = FestivalItems.objects.create(name='規格豬')
+    item.festival_name.add(name)
+    item.product_id.add(daily_tran.product)
+    item.source.add(daily_tran.source)
+    return Festival.objects.create(roc_year='113', name=name)
+
+
+@pytest.mark.django_db
+class TestFestivalReportBuilder:
+    @pytest.mark.parametrize('workers', [0, 2])
+    def test_build(self, settings, tmpdir, daily_tran, festival, workers):
+        # Arrange
+        settings.FESTIVAL_REPORT_DIR = str(tmpdir)
+        product, source = daily_tran.product, daily_tran.source
+        for date, price, volume in ((dt.date(2024, 6, 1), 10.0, 1.0), (dt.date(2024, 6, 2), 20.0, 3.0),
+                                    (dt.date(2024, 6, 10), 99.0, 1.0), (dt.date(2023, 6, 15), 10.0, None)):
+            DailyTranFactory.create(product=product, source=source, date=date, avg_price=price, volume=volume)
+
+        # Act
+        reports = FestivalReportBuilder(workers=workers).build(roc_years=['113'])
+
+        # Assert
+        assert reports == list(FestivalReport.objects.all())
+        report = reports[0]
+        assert report.festival_id == festival
+        assert report.file_id == 'festival_113_{}_price.xlsx'.format(festival.id)
+
+        rows = list(load_workbook(str(tmpdir.join(report.file_id))).active.values)
+        assert rows[0] == ('品項', '111', '112', '113', '增減(%)')
+        assert rows[1] == ('規格豬', None, 10.0, 17.5, 75.0)
+
+        rows = list(load_workbook(str(tmpdir.join(report.file_volume_id))).active.values)
+        assert rows[1] == ('規格豬', None, None, 4.0, None)
+
+    def test_windows(self, festival):
+        windows = FestivalReportBuilder(days_before=7, compare_years=1).windows(festival)
+
+        assert windows == [
+            (2023, dt.date(2023, 6, 15), dt.date(2023, 6, 21)),
+            (2024, dt.date(2024, 6, 3), dt.date(2024, 6, 9)),
+        ]
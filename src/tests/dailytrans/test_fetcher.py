@@ -0,0 +1,111 @@
+import datetime
+
+import pytest
+
+from apps.dailytrans.fetcher import OpenDataFetcher, FetchError, date_ranges, roc_date
+from apps.dailytrans.models import CrawlState, DailyTran
+from tests.dailytrans.factories import DailyTranFactory
+
+
+class TestOpenDataFetcher:
+    def test_date_ranges(self):
+        # Act
+        ranges = date_ranges(datetime.date(2024, 1, 30), datetime.date(2024, 2, 3), days=2)
+
+        # Assert
+        assert ranges == [
+            (datetime.date(2024, 1, 30), datetime.date(2024, 1, 31)),
+            (datetime.date(2024, 2, 1), datetime.date(2024, 2, 2)),
+            (datetime.date(2024, 2, 3), datetime.date(2024, 2, 3)),
+        ]
+        assert roc_date(datetime.date(2024, 1, 30)) == '113.01.30'
+
+    def test_run(self, open_data_server):
+        # Arrange
+        open_data_server.failures = 2
+        received = []
+        fetcher = OpenDataFetcher(page_size=2, backoff=0.01)
+
+        # Act
+        stats = fetcher.run(
+            'test', datetime.date(2024, 1, 1), datetime.date(2024, 1, 10),
+            ingest=lambda api, start, end, records: received.append((start, len(records))),
+        )
+
+        # Assert, ranges of 7 and 3 days, 35 and 15 records in pages of 2
+        assert stats.ranges == 2
+        assert stats.pages == 26
+        assert stats.records == 50
+        assert stats.retries == 2
+        assert len(received) == 26
+        assert sum(count for _, count in received) == 50
+        assert len(open_data_server.requests) == 28
+
+    def test_run_gives_up(self, open_data_server):
+        # Arrange
+        open_data_server.failures = 10
+        fetcher = OpenDataFetcher(retries=1, backoff=0.01)
+
+        # Act & Assert
+        with pytest.raises(FetchError):
+            fetcher.run('test', datetime.date(2024, 1, 1), datetime.date(2024, 1, 1), ingest=lambda *args: None)
+
+
+# CrawlState and ingest run on the database thread of the fetcher, which needs committed data
+@pytest.mark.django_db(transaction=True)
+class TestOpenDataFetcherWithState:
+    def test_skip_unchanged_days(self, open_data_server, product_of_rice):
+        # Arrange
+        start, end = datetime.date(2024, 1, 1), datetime.date(2024, 1, 3)
+        tran = DailyTranFactory(product=product_of_rice, date=start)
+        received = []
+        fetcher = OpenDataFetcher(page_size=2, backoff=0.01, use_state=True)
+
+        def ingest(api, start, end, records):
+            received.append((start, len(records)))
+
+        def unchanged(api, date):
+            DailyTran.objects.filter(product=product_of_rice).mark_not_updated(date)
+
+        # Act
+        stats = fetcher.run('test', start, end, ingest=ingest, unchanged=unchanged)
+
+        # Assert
+        assert stats.skipped == 0
+        assert sum(count for _, count in received) == 15
+        assert CrawlState.objects.filter(feed='test', row_count=5).count() == 3
+
+        # Act
+        received = []
+        stats = fetcher.run('test', start, end, ingest=ingest, unchanged=unchanged)
+
+        # Assert
+        assert stats.skipped == 3
+        assert received == []
+        tran.refresh_from_db()
+        assert tran.not_updated == 1
+
+        # Act, upstream changed
+        open_data_server.records_per_day = 6
+        stats = fetcher.run('test', start, end, ingest=ingest, unchanged=unchanged)
+
+        # Assert
+        assert stats.skipped == 0
+        assert sum(count for _, count in received) == 18
+        assert CrawlState.objects.filter(feed='test', row_count=6).count() == 3
+
+    def test_not_modified(self, open_data_server):
+        # Arrange
+        open_data_server.etag = '"v1"'
+        date = datetime.date(2024, 1, 1)
+        fetcher = OpenDataFetcher(page_size=2, use_state=True)
+        fetcher.run('test', date, date, ingest=lambda *args: None)
+        open_data_server.requests = []
+
+        # Act
+        stats = fetcher.run('test', date, date, ingest=lambda *args: None)
+
+        # Assert
+        assert stats.skipped == 1
+        assert len(open_data_server.requests) == 1
+        assert CrawlState.objects.get(feed='test', date=date).etag == '"v1"'
@@ -2,9 +2,12 @@ import datetime as dt
 from datetime import datetime
 
 import pytest
+from django.db import IntegrityError, transaction
+from django.db.models import Max
+from django.utils import timezone
 
-from apps.configs.models import AbstractProduct, Source
-from apps.dailytrans.models import DailyTran
+from apps.configs.models import AbstractProduct, Last5YearsItems, Source
+from apps.dailytrans.models import DailyTran, DailyTranRollup, Last5YearsDailyStat
 from tests.dailytrans.factories import (
     DailyTranFactory,
 )
@@ -40,6 +43,15 @@ class TestDailyTranModel:
             Source.objects.get(id=daily_tran.source.id)
             DailyTran.objects.get(id=daily_tran.id)
 
+    def test_daily_tran_natural_key_unique_constraint(self, daily_tran):
+        with pytest.raises(IntegrityError):
+            with transaction.atomic():
+                DailyTranFactory.create(product=daily_tran.product, source=daily_tran.source, date=daily_tran.date)
+
+        with pytest.raises(IntegrityError):
+            with transaction.atomic():
+                DailyTranFactory.create_batch(2, product=daily_tran.product, source=None, date=daily_tran.date)
+
     def test_month_day_method(self, daily_tran):
         assert daily_tran.month_day == int(datetime.now().strftime('%m%d'))
 
@@ -65,3 +77,151 @@ class TestDailyTranModel:
         result = DailyTran.objects.between_month_day_filter(start_date=date, end_date=date)
 
         assert result.count() == 0
+
+    def test_between_month_day_filter_across_year_end_and_leap_day(self, daily_tran):
+        # Arrange
+        product, source = daily_tran.product, daily_tran.source
+        dates = [
+            dt.date(2010, 12, 31), dt.date(2012, 12, 31), dt.date(2013, 1, 2), dt.date(2013, 1, 3),
+            dt.date(2019, 2, 28), dt.date(2019, 3, 1), dt.date(2020, 2, 29),
+        ]
+        for date in dates:
+            DailyTranFactory.create(product=product, source=source, date=date)
+        queryset = DailyTran.objects.filter(date__lt=dt.date(2021, 1, 1))
+
+        # Act
+        year_end = queryset.between_month_day_filter(start_date=dt.date(2023, 12, 31), end_date=dt.date(2024, 1, 2))
+        leap_day = queryset.between_month_day_filter(start_date=dt.date(2024, 2, 29), end_date=dt.date(2024, 3, 1))
+
+        # Assert
+        assert sorted(year_end.values_list('date', flat=True)) == [dt.date(2012, 12, 31), dt.date(2013, 1, 2)]
+        assert sorted(leap_day.values_list('date', flat=True)) == [dt.date(2019, 3, 1), dt.date(2020, 2, 29)]
+
+    def test_update_method_of_query_set_returns_row_count(self, daily_tran):
+        assert DailyTran.objects.filter(id=daily_tran.id).update(volume=1.0) == 1
+
+    def test_bulk_upsert_method_of_query_set(self, daily_tran):
+        # Arrange
+        product, source = daily_tran.product, daily_tran.source
+        unchanged = {
+            'product': product, 'source': source, 'date': daily_tran.date,
+            'up_price': daily_tran.up_price, 'mid_price': daily_tran.mid_price, 'low_price': daily_tran.low_price,
+            'avg_price': daily_tran.avg_price, 'avg_weight': daily_tran.avg_weight, 'volume': daily_tran.volume,
+        }
+        rows = [
+            unchanged,
+            {'product': product, 'source': source, 'date': dt.date(2020, 1, 1), 'avg_price': 10.0},
+            {'product': product, 'source': source, 'date': dt.date(2020, 1, 1), 'avg_price': 11.0},
+            {'product_id': product.id, 'source_id': None, 'date': dt.date(2020, 1, 1), 'avg_price': 12.0},
+        ]
+
+        # Act
+        first = DailyTran.objects.bulk_upsert(rows, batch_size=2)
+        second = DailyTran.objects.bulk_upsert([
+            {'product': product, 'source': source, 'date': dt.date(2020, 1, 1), 'avg_price': 11.0},
+            {'product': product, 'source': None, 'date': dt.date(2020, 1, 1), 'avg_price': 13.0, 'volume': 5.0},
+        ])
+
+        # Assert
+        assert first == (2, 0, 1)
+        assert second == (0, 1, 1)
+        assert DailyTran.objects.get(id=daily_tran.id).not_updated == 1
+        assert DailyTran.objects.get(source=source, date=dt.date(2020, 1, 1)).avg_price == 11.0
+        assert DailyTran.objects.get(source=source, date=dt.date(2020, 1, 1)).not_updated == 1
+
+        tran = DailyTran.objects.get(source=None, date=dt.date(2020, 1, 1))
+        assert (tran.avg_price, tran.volume, tran.not_updated) == (13.0, 5.0, 0)
+        assert tran.update_time is not None and tran.create_time is not None
+
+
+@pytest.mark.django_db
+class TestDailyTranRollupModel:
+    def test_refresh_all_method_of_query_set(self, daily_tran):
+        # Arrange
+        product, source = daily_tran.product, daily_tran.source
+        DailyTranFactory.create(product=product, source=source, date=dt.date(2020, 1, 6), avg_price=10.0, volume=1.0)
+        DailyTranFactory.create(product=product, source=source, date=dt.date(2020, 1, 7), avg_price=20.0, volume=3.0)
+
+        # Act
+        DailyTranRollup.objects.refresh_all(full=True)
+
+        # Assert
+        week = DailyTranRollup.objects.get(grain='week', source=source, period_start=dt.date(2020, 1, 6))
+        assert (week.avg_price, week.volume, week.days, week.type_id) == (17.5, 4.0, 2, product.type_id)
+        assert DailyTranRollup.objects.watermark('week') == DailyTran.objects.aggregate(Max('update_time'))[
+            'update_time__max']
+        assert DailyTranRollup.objects.filter(grain='month').count() == 2
+
+        # Arrange
+        DailyTran._base_manager.update(update_time=timezone.make_aware(datetime(2020, 1, 1)))
+        DailyTranFactory.create(product=product, source=source, date=dt.date(2020, 2, 3), avg_price=5.0, volume=None)
+
+        # Act
+        result = DailyTranRollup.objects.refresh_all()
+
+        # Assert
+        assert result == {'week': 1, 'month': 1, 'year': 1}
+        year = DailyTranRollup.objects.get(grain='year', source=source, period_start=dt.date(2020, 1, 1))
+        assert (year.avg_price, year.volume, year.days) == (17.5, 4.0, 3)
+        assert DailyTranRollup.objects.filter(grain='month').count() == 3
+
+
+@pytest.mark.django_db
+class TestLast5YearsDailyStatModel:
+    @pytest.fixture
+    def item(self, daily_tran):
+        item = Last5YearsItems.objects.create(name='規格豬')
+        item.product_id.add(daily_tran.product)
+        item.source.add(daily_tran.source)
+        return item
+
+    def test_refresh_all_method_of_query_set(self, daily_tran, item):
+        # Arrange
+        today = dt.date(2024, 6, 1)
+        product, source = daily_tran.product, daily_tran.source
+        other = Source.objects.exclude(id=source.id).first()
+        DailyTranFactory.create(product=product, source=source, date=dt.date(2018, 12, 31), avg_price=1.0)
+        DailyTranFactory.create(product=product, source=source, date=dt.date(2020, 1, 1), avg_price=10.0, volume=1.0)
+        DailyTranFactory.create(product=product, source=other, date=dt.date(2020, 1, 1), avg_price=99.0, volume=1.0)
+        DailyTranFactory.create(product=product, source=None, date=dt.date(2021, 1, 1), avg_price=20.0, volume=3.0)
+
+        # Act
+        result = Last5YearsDailyStat.objects.refresh_all(today=today)
+
+        # Assert
+        assert result == {item.id: 2}
+        assert Last5YearsDailyStat.objects.filter(date__lt=dt.date(2019, 1, 1)).count() == 0
+        stat = Last5YearsDailyStat.objects.get(item=item, date=dt.date(2020, 1, 1))
+        assert (stat.date, stat.year, stat.month_day, stat.mean, stat.count) == (dt.date(2020, 1, 1), 2020, 101, 10.0, 1)
+
+        # Arrange
+        item.source.add(other)
+
+        # Act
+        rebuilt = Last5YearsDailyStat.objects.refresh_all(today=today)
+        DailyTran._base_manager.update(update_time=timezone.make_aware(datetime(2020, 1, 1)))
+        DailyTranFactory.create(product=product, source=source, date=dt.date(2021, 1, 2), avg_price=30.0, volume=1.0)
+        incremental = Last5YearsDailyStat.objects.refresh_all(today=today)
+
+        # Assert
+        assert rebuilt == {item.id: 2}
+        assert Last5YearsDailyStat.objects.filter(item=item).count() == 3
+        assert incremental == {item.id: 1}
+        stat = Last5YearsDailyStat.objects.get(item=item, date=dt.date(2020, 1, 1))
+        assert (stat.mean, stat.min, stat.max, stat.weighted_avg, stat.volume) == (54.5, 10.0, 99.0, 54.5, 2.0)
+
+    def test_between_month_day_filter_and_by_year(self, daily_tran, item):
+        # Arrange
+        for year, price in ((2018, 5.0), (2019, 10.0), (2020, 20.0), (2024, 40.0)):
+            DailyTranFactory.create(
+                product=daily_tran.product, source=daily_tran.source, date=dt.date(year, 12, 31), avg_price=price, volume=2.0
+            )
+        Last5YearsDailyStat.objects.refresh_all(today=dt.date(2024, 12, 31))
+
+        # Act
+        stats = Last5YearsDailyStat.objects.between_month_day_filter(dt.date(2024, 12, 30), dt.date(2025, 1, 1))
+        years = list(stats.by_year())
+
+        # Assert
+        assert [row['year'] for row in years] == [2019, 2020, 2024]
+        assert years[0]['weighted_sum'] / years[0]['total_volume'] == years[0]['mean_price'] == 10.0
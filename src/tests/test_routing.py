@@ -0,0 +1,55 @@
+import types
+
+import pytest
+
+from dashboard.routing import FeedRateLimits, route_task, profile_queues
+
+
+@pytest.fixture
+def crop_task():
+    return types.SimpleNamespace(__module__='apps.crops.tasks', api='eir030')
+
+
+class TestRouting:
+    def test_route_task(self, crop_task):
+        # Act & Assert
+        assert route_task('DailyCropBuilder', (), {}, {}, task=crop_task) == {'queue': 'crawl.crops'}
+        assert route_task('BuildDailyReports', (), {}, {}) == {'queue': 'reports'}
+        assert route_task('BackfillShard', (), {}, {}) == {'queue': 'backfill'}
+        assert route_task('CheckMonitorAlerts', (), {}, {}) is None
+
+    def test_rate_limit_by_api_host(self, crop_task, settings):
+        # Arrange
+        settings.CRAWL_HOST_RATE_LIMITS = {'default': '1/m', 'data.moa.gov.tw': '10/m'}
+        fruit_task = types.SimpleNamespace(__module__='apps.fruits.tasks')
+        feed_task = types.SimpleNamespace(__module__='apps.feed.tasks')
+        other_task = types.SimpleNamespace(__module__='apps.watchlists.tasks')
+
+        # Act & Assert
+        assert FeedRateLimits().annotate(crop_task) == {'rate_limit': '10/m'}
+        assert FeedRateLimits().annotate(fruit_task) == {'rate_limit': '10/m'}
+        assert FeedRateLimits().annotate(feed_task) == {'rate_limit': '1/m'}
+        assert FeedRateLimits().annotate(other_task) is None
+
+    def test_rate_limit_of_unknown_api(self, settings, monkeypatch):
+        # Arrange
+        warnings = []
+        monkeypatch.setattr('dashboard.routing.logger.warning', warnings.append)
+        settings.CRAWL_HOST_RATE_LIMITS = {'default': '1/m', 'data.moa.gov.tw': '10/m'}
+        settings.CRAWL_FEED_APIS = {}
+        crop_task = types.SimpleNamespace(__module__='apps.crops.tasks', name='DailyCropBuilder')
+
+        # Act
+        result = FeedRateLimits().annotate(crop_task)
+
+        # Assert
+        assert result == {'rate_limit': '1/m'}
+        assert 'DailyCropBuilder' in warnings[0]
+
+    def test_profile_queues(self):
+        # Act
+        queues = profile_queues('all')
+
+        # Assert
+        assert queues[:3] == ['default', 'reports', 'backfill']
+        assert set(profile_queues('crawl')) == set(queues[3:])
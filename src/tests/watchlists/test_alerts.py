@@ -0,0 +1,80 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from apps.watchlists.alerts import triggered, scan_alerts
+from tests.configs.factories import MonthFactory
+from tests.dailytrans.factories import DailyTranFactory
+from tests.watchlists.factories import MonitorProfileFactory
+
+
+@pytest.mark.django_db
+class TestMonitorAlerts:
+    def test_triggered(self):
+        # Arrange
+        prices = [60.0, 60.0, 80.0, 80.0, np.nan]
+        thresholds = [60.0, 60.0, 80.0, 79.0, 10.0]
+        comparators = ['__lt__', '__lte__', '__gt__', '__gte__', '__gt__']
+
+        # Act
+        result = triggered(prices, thresholds, comparators)
+
+        # Assert
+        assert result.tolist() == [False, True, False, True, False]
+
+    def test_active_compare_matches_triggered(self, monitor_profile_with_pig):
+        # Arrange
+        profile = monitor_profile_with_pig
+        prices = [78.0, 79.0, 80.0]
+
+        for comparator in ['__lt__', '__lte__', '__gt__', '__gte__']:
+            profile.comparator = comparator
+
+            # Act
+            result = triggered(prices, [profile.price] * 3, [comparator] * 3)
+
+            # Assert
+            assert result.tolist() == [profile.active_compare(price) for price in prices]
+
+    def test_scan_alerts(self, watchlist, product_of_pig, watchlist_item_with_pig, sources_for_pig):
+        # Arrange
+        today = datetime.date(2024, 5, 10)
+        may, june = MonthFactory(name='5月', number=5), MonthFactory(name='6月', number=6)
+        low = MonitorProfileFactory(
+            product=product_of_pig, watchlist=watchlist, type=product_of_pig.type,
+            price=70.0, comparator='__lte__', is_active=True, months=[may, june],
+        )
+        high = MonitorProfileFactory(
+            product=product_of_pig, watchlist=watchlist, type=product_of_pig.type,
+            price=90.0, comparator='__gte__', is_active=True, months=[may],
+        )
+        # would trigger, but monitors June only or no month at all
+        for months in ([june], []):
+            MonitorProfileFactory(
+                product=product_of_pig, watchlist=watchlist, type=product_of_pig.type,
+                price=10.0, comparator='__gte__', is_active=True, months=months,
+            )
+        for source, price, volume in [(sources_for_pig[0], 60.0, 100), (sources_for_pig[1], 80.0, 300)]:
+            DailyTranFactory(product=product_of_pig, source=source, date=today - datetime.timedelta(days=1),
+                             avg_price=price, volume=volume)
+        # older prices are ignored
+        DailyTranFactory(product=product_of_pig, source=sources_for_pig[0], date=today - datetime.timedelta(days=2),
+                         avg_price=100.0, volume=100)
+
+        # Act
+        alerts = scan_alerts(today=today)
+
+        # Assert
+        assert alerts == []
+
+        # Arrange
+        high.price = 75.0
+        high.save()
+
+        # Act
+        alerts = scan_alerts(today=today)
+
+        # Assert
+        assert [(profile.id, price) for profile, price in alerts] == [(high.id, 75.0)]
+        assert low.active_compare(75.0) is False
@@ -0,0 +1,62 @@
+import pytest
+
+from apps.watchlists.bands import BandIndex, band_index
+from tests.watchlists.factories import MonitorProfileFactory
+
+
+@pytest.fixture
+def profiles_for_pig(watchlist, product_of_pig):
+    return [
+        MonitorProfileFactory(product=product_of_pig, watchlist=watchlist, type=product_of_pig.type,
+                              price=price, comparator=comparator, color=color)
+        for price, comparator, color in [
+            (65.0, '__lt__', 'danger'),
+            (79.0, '__lte__', 'warning'),
+            (90.0, '__gt__', 'info'),
+            (110.0, '__gte__', 'success'),
+        ]
+    ]
+
+
+@pytest.mark.django_db
+class TestBandIndex:
+    @pytest.mark.parametrize('price', [10.0, 65.0, 70.0, 79.0, 80.0, 90.0, 100.0, 110.0, 200.0])
+    def test_classify_matches_price_range(self, price, watchlist, product_of_pig, profiles_for_pig):
+        # Arrange
+        index = BandIndex()
+        expected = [
+            profile for profile in profiles_for_pig
+            if profile.active_compare(price) and profile.low_price <= price <= profile.up_price
+        ]
+
+        # Act
+        result = index.classify(watchlist, product_of_pig, product_of_pig.type, price)
+
+        # Assert, a price on the boundary of two bands belongs to the tighter one
+        assert result in expected if expected else result is None
+
+    def test_classify_without_query(self, watchlist, product_of_pig, profiles_for_pig, django_assert_num_queries):
+        # Arrange
+        index = BandIndex()
+        index.classify(watchlist, product_of_pig, product_of_pig.type, 70.0)
+
+        # Act
+        with django_assert_num_queries(0):
+            colors = [index.classify(watchlist, product_of_pig, product_of_pig.type, price).color
+                      for price in (60.0, 70.0, 95.0, 120.0)]
+
+        # Assert
+        assert colors == ['danger', 'warning', 'info', 'success']
+        assert index.classify(watchlist, product_of_pig, None, 70.0) is None
+
+    def test_invalidated_on_profile_save(self, watchlist, product_of_pig, profiles_for_pig):
+        # Arrange
+        assert band_index.classify(watchlist, product_of_pig, product_of_pig.type, 70.0).color == 'warning'
+        profile = profiles_for_pig[1]
+
+        # Act
+        profile.color = 'default'
+        profile.save()
+
+        # Assert
+        assert band_index.classify(watchlist, product_of_pig, product_of_pig.type, 70.0).color == 'default'
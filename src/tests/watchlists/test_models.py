@@ -40,6 +40,22 @@ class TestWatchListModel:
     def test_festival_str(self, watchlist):
         assert str(watchlist) == watchlist.name
 
+    def test_related_product_ids_method(self, watchlist_item, watchlist_item_with_pig, django_assert_num_queries):
+        # Arrange
+        rice = watchlist_item.product
+        rice_ja = rice.children().first()
+        expected = {rice.id, rice_ja.id, watchlist_item_with_pig.product.id}
+        watchlist = Watchlist.objects.get(id=watchlist_item.parent.id)
+
+        # Act
+        with django_assert_num_queries(1):
+            result = watchlist.related_product_ids
+            assert watchlist.related_product_ids is result
+
+        # Assert
+        assert isinstance(result, frozenset)
+        assert result == expected
+
 
 @pytest.mark.django_db
 class TestWatchlistItemModel:
@@ -0,0 +1,57 @@
+import pytest
+
+from apps.watchlists.monitor import evaluate_watchlist, price_range, MAX_PRICE
+from tests.watchlists.factories import MonitorProfileFactory
+
+
+@pytest.mark.django_db
+class TestEvaluateWatchlist:
+    def test_price_range(self):
+        # Arrange
+        less, greater = [50.0, 65.0, 79.0], [90.0, 100.0]
+
+        # Act & Assert
+        assert price_range(79.0, '__lt__', less, greater) == [65.0, 79.0]
+        assert price_range(50.0, '__lte__', less, greater) == [0, 50.0]
+        assert price_range(90.0, '__gt__', less, greater) == [90.0, 100.0]
+        assert price_range(100.0, '__gte__', less, greater) == [100.0, MAX_PRICE]
+
+    def test_matches_profile_properties(self, watchlist, product_of_pig, watchlist_item_with_pig, django_assert_num_queries):
+        # Arrange
+        for price, comparator in [(65.0, '__lt__'), (79.0, '__lt__'), (90.0, '__gt__'), (110.0, '__gt__')]:
+            MonitorProfileFactory(
+                product=product_of_pig,
+                watchlist=watchlist,
+                type=product_of_pig.type,
+                price=price,
+                comparator=comparator,
+                is_active=True,
+            )
+        MonitorProfileFactory(
+            product=product_of_pig, watchlist=watchlist, type=product_of_pig.type, price=50.0, is_active=False,
+        )
+
+        # Act
+        with django_assert_num_queries(5):
+            evaluations = evaluate_watchlist(watchlist)
+
+        # Assert
+        assert len(evaluations) == 4
+        for evaluation in evaluations:
+            profile = evaluation.profile
+            assert evaluation.price_range == profile.price_range
+            assert evaluation.low_price == profile.low_price
+            assert evaluation.up_price == profile.up_price
+            assert evaluation.product_list == profile.product_list()
+            assert set(evaluation.sources) == set(profile.sources())
+            assert evaluation.months == list(profile.months.all())
+
+    def test_without_items(self, monitor_profile_with_pig):
+        # Act
+        evaluations = evaluate_watchlist(monitor_profile_with_pig.watchlist, active_only=False)
+
+        # Assert
+        assert len(evaluations) == 2
+        assert evaluations[1].price_range == [65.0, 79.0]
+        assert evaluations[1].product_list == [monitor_profile_with_pig.product]
+        assert evaluations[1].sources == []